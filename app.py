@@ -13,21 +13,46 @@ import uuid
 import html as html_module
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 import base64
+import hashlib
 import io
 import zipfile
+import zlib
+import struct
 import tempfile
-from urllib.parse import urlencode
+import mimetypes
+import importlib.util
+from urllib.parse import urlencode, quote
 from dotenv import load_dotenv
 load_dotenv()  # Load .env for local dev (Render uses env vars directly)
 
-from PIL import Image, ImageOps
-import stripe
-import resend
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from decimal import Decimal, ROUND_HALF_UP
 
+def _lazy_module(name):
+    """Import `name` on first attribute access instead of at startup.
+
+    stripe and resend take a few hundred ms to import and add to every worker's RSS,
+    while most requests (static pages, sitemap, favicon) never touch them. Setting
+    attributes such as `api_key` before first use is preserved across the real import.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+stripe = _lazy_module('stripe')
+resend = _lazy_module('resend')
+qrcode = _lazy_module('qrcode')
+
 _EASTERN = ZoneInfo('America/New_York')
 
 def _now_eastern():
@@ -60,23 +85,26 @@ def _delivery_window(ref_date=None):
         'saturday': saturday,
         'flex_end': flex_end,
     }
-from flask import Flask, render_template, render_template_string, request, redirect, url_for, flash, session, send_from_directory, send_file, jsonify, Response, make_response, abort, current_app
+from flask import Flask, render_template, render_template_string, request, redirect, url_for, flash, session, send_from_directory, send_file, jsonify, Request, Response, make_response, abort, current_app, stream_with_context, g
 import csv
 from io import StringIO, BytesIO
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import NotFound
+from itsdangerous import URLSafeSerializer, BadSignature
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import safe_join
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
-from sqlalchemy.orm import joinedload, selectinload
-from sqlalchemy import or_, and_, func, nulls_last, delete
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, defer
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import or_, and_, case, func, nulls_last, delete, event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 # PostHog analytics
 import posthog
 
 # Import Models
-from models import db, User, InventoryCategory, InventoryItem, ItemPhoto, ItemReservation, AppSetting, UploadSession, TempUpload, AdminEmail, SellerAlert, DigestLog, WorkerApplication, WorkerAvailability, ShiftWeek, Shift, ShiftAssignment, ShiftPickup, ShiftRun, WorkerPreference, StorageLocation, IntakeRecord, IntakeFlag, Referral, BuyerOrder, ShopNotifySignup, RescheduleToken, TutorialSession, DeliveryStop, DeliveryRun, Order, Cart, CartItem, MATTRESS_SIZES
+from models import db, User, InventoryCategory, InventoryItem, ItemPhoto, ItemReservation, AppSetting, UploadSession, TempUpload, AdminEmail, SellerAlert, DigestLog, WorkerApplication, WorkerAvailability, ShiftWeek, Shift, ShiftAssignment, ShiftPickup, ShiftRun, WorkerPreference, StorageLocation, IntakeRecord, IntakeFlag, Referral, BuyerOrder, ShopNotifySignup, RescheduleToken, TutorialSession, DeliveryStop, DeliveryRun, Order, Cart, CartItem, MATTRESS_SIZES, generate_password_hash, check_password_hash, password_needs_rehash, DUMMY_PASSWORD_HASH
 
 # Import Constants
 from constants import (
@@ -85,6 +113,7 @@ from constants import (
     SERVICE_FEE_CENTS, SELLER_ACTIVATION_FEE_CENTS,
     MAX_UPLOAD_SIZE, ALLOWED_EXTENSIONS, ALLOWED_MIME_TYPES,
     MAX_VIDEO_SIZE, ALLOWED_VIDEO_EXTENSIONS, ALLOWED_VIDEO_MIME_TYPES,
+    MAX_REQUEST_SIZE, IN_MEMORY_REQUEST_SIZE,
     category_requires_video, VIDEO_REQUIRED_CATEGORIES,
     IMAGE_QUALITY, THUMBNAIL_SIZE,
     MIN_PRICE, MAX_PRICE, MIN_QUALITY, MAX_QUALITY,
@@ -112,7 +141,7 @@ logger.setLevel(logging.DEBUG)
 def get_pickup_period_active():
     """Get pickup period status from database, fallback to environment variable"""
     # Check database first (allows admin toggle)
-    db_value = AppSetting.get('pickup_period_active')
+    db_value = AppSetting.get_cached('pickup_period_active')
     if db_value is not None:
         return db_value.lower() == 'true'
     # Fallback to environment variable
@@ -120,12 +149,18 @@ def get_pickup_period_active():
 
 def get_current_store():
     """Get current store location - defaults to UNC Chapel Hill"""
-    store = AppSetting.get('current_store')
+    store = AppSetting.get_cached('current_store')
     if store:
         return store
     # Default store
     return 'UNC Chapel Hill'
 
+_NO_DORMS = {}
+
+def get_current_store_dorms():
+    """Residence halls (area -> hall names) for the current store; shared static config, don't mutate."""
+    return RESIDENCE_HALLS_BY_STORE.get(get_current_store(), _NO_DORMS)
+
 def is_super_admin():
     """True if current user is a super admin (full access). Requires request context."""
     if not current_user.is_authenticated:
@@ -135,13 +170,13 @@ def is_super_admin():
 def store_is_open():
     """True if the store is live — controlled by store_open_date admin setting."""
     from datetime import date as _date
-    val = AppSetting.get('store_open_date', '2026-06-07')
+    val = AppSetting.get_cached('store_open_date', '2026-06-07')
     return _date.today() >= _date.fromisoformat(val)
 
 def store_open_date():
     """Return the store open date as a human-readable string (e.g. 'June 7th')."""
     from datetime import date as _date
-    val = AppSetting.get('store_open_date', '2026-06-07')
+    val = AppSetting.get_cached('store_open_date', '2026-06-07')
     d = _date.fromisoformat(val)
     day = d.day
     if 11 <= day <= 13:
@@ -152,7 +187,7 @@ def store_open_date():
 
 def store_open_date_raw():
     """Return the store open date as ISO string (for form inputs)."""
-    return AppSetting.get('store_open_date', '2026-06-07')
+    return AppSetting.get_cached('store_open_date', '2026-06-07')
 
 
 # Default delivery origin — Campus Swap storage warehouse at 515 S Greensboro St, Carrboro NC.
@@ -165,6 +200,10 @@ WAREHOUSE_DEFAULT_LNG = '-79.0709049'
 _catalog_cache = {"xml": None, "built_at": None}  # invalidated on redeploy
 CATALOG_CACHE_TTL = 3600  # 1 hour
 
+# --- sitemap.xml ---
+_sitemap_cache = {"xml": None, "base_url": None, "built_at": None}  # invalidated on redeploy
+SITEMAP_CACHE_TTL = 600  # 10 minutes — crawlers hit this far more often than listings change
+
 CATALOG_CATEGORY_MAP = {
     "Couch": "Furniture > Sofas & Loveseats",
     "Sofa": "Furniture > Sofas & Loveseats",
@@ -423,6 +462,26 @@ else:
     else:
         app.config['UPLOAD_FOLDER'] = 'static/uploads'
 
+# Reject oversized bodies up front (413) instead of spooling them to disk first
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_SIZE
+
+
+class _UploadRequest(Request):
+    """Request whose single-photo uploads never touch the temp disk.
+
+    Werkzeug spools any file part past 500KB to a TemporaryFile, so every phone photo was
+    written to disk and read back before Pillow saw it. Bodies up to IN_MEMORY_REQUEST_SIZE
+    (already bounded by MAX_CONTENT_LENGTH) are parsed into memory instead.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= IN_MEMORY_REQUEST_SIZE:
+            return BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+app.request_class = _UploadRequest
+
 # Temp uploads (QR mobile) always go to local disk
 app.config['TEMP_UPLOAD_FOLDER'] = app.config['UPLOAD_FOLDER']
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -445,11 +504,13 @@ try:
         raise ImportError("Rate limiting disabled via RATELIMIT_ENABLED=false")
     from flask_limiter import Limiter
     from flask_limiter.util import get_remote_address
+    # Counters live in Redis when REDIS_URL is set so every gunicorn worker shares them;
+    # the in-memory fallback is per-process (fine for local dev / a single worker).
     limiter = Limiter(
         app=app,
         key_func=get_remote_address,
         default_limits=["20000 per day", "2000 per hour"],
-        storage_uri="memory://"
+        storage_uri=os.environ.get('REDIS_URL', 'memory://')
     )
     logger.info("Rate limiting enabled")
 except ImportError:
@@ -461,6 +522,10 @@ except ImportError:
 # STRIPE
 stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
 endpoint_secret = os.environ.get('STRIPE_WEBHOOK_SECRET')
+STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
+
+# GOOGLE MAPS (browser key for the address autocomplete / map previews)
+GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
 
 # RESEND (EMAIL)
 resend.api_key = os.environ.get('RESEND_API_KEY')  # Also loaded from .env via load_dotenv()
@@ -490,7 +555,11 @@ login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None  # malformed session cookie: treat as anonymous instead of a 500
+    return db.session.get(User, user_id)
 
 
 # Carousel images: use CDN URL when CAROUSEL_CDN_URL is set (e.g. S3/CloudFront) for faster loading.
@@ -570,7 +639,9 @@ def apply_admin_email_if_pending(user):
     if not user or not user.email:
         return
     email_lower = user.email.strip().lower()
-    admin_email = AdminEmail.query.filter_by(email=email_lower).first()
+    # no_autoflush: a brand-new user is inserted with the admin flags instead of INSERT + UPDATE
+    with db.session.no_autoflush:
+        admin_email = AdminEmail.query.filter_by(email=email_lower).first()
     if admin_email:
         user.is_admin = True
         user.is_super_admin = admin_email.is_super_admin
@@ -663,59 +734,83 @@ def tutorial_gate():
 
 # --- EMAIL HELPERS ---
 
-def generate_unsubscribe_token():
-    """Generate a secure random token for unsubscribe links"""
-    return secrets.token_urlsafe(32)
-
-def ensure_unsubscribe_token(user):
-    """Ensure user has an unsubscribe token, creating one if needed"""
-    # If user is detached, merge it into the current session
-    if user not in db.session:
-        user = db.session.merge(user)
-    if not user.unsubscribe_token:
-        user.unsubscribe_token = generate_unsubscribe_token()
-        db.session.commit()
-    return user.unsubscribe_token
+def _unsubscribe_serializer():
+    return URLSafeSerializer(app.secret_key, salt='unsubscribe')
+
+def make_unsubscribe_token(user):
+    """Signed, stateless unsubscribe token for a user (no DB write).
+
+    Stable for a given user id and SECRET_KEY, so every marketing email to the same
+    person carries the same link.
+    """
+    return _unsubscribe_token_for_id(user.id)
+
+def _unsubscribe_token_for_id(user_id):
+    """make_unsubscribe_token() for callers that only have the id, e.g. marketing_recipients() rows."""
+    return _unsubscribe_serializer().dumps(user_id)
+
+def marketing_recipients(user_ids=None):
+    """(id, email) rows for users who can receive marketing email.
+
+    Unsubscribed users are filtered in SQL and only the two columns a bulk send needs are
+    selected, so a blast doesn't hydrate (or lazy-load) a full User per recipient.
+    """
+    q = db.select(User.id, User.email).where(
+        User.email.isnot(None),
+        User.unsubscribed.is_(False),
+    ).order_by(User.id)
+    if user_ids is not None:
+        q = q.where(User.id.in_(user_ids))
+    return db.session.execute(q).all()
+
+def _user_for_unsubscribe_token(token):
+    """Resolve an unsubscribe token to a User, or None.
+
+    Accepts signed tokens from make_unsubscribe_token(), plus legacy random tokens
+    stored in User.unsubscribe_token so links in already-sent emails keep working.
+    """
+    try:
+        user_id = _unsubscribe_serializer().loads(token)
+    except BadSignature:
+        return User.query.filter_by(unsubscribe_token=token).first()
+    return db.session.get(User, user_id)
+
+_WS_RE = re.compile(r'\n\s*\n')
+
+def _strip_tags(html_content):
+    """Remove <...> tags in a single left-to-right pass.
+
+    Same result as re.sub(r'<[^>]+>', '', ...) but linear: the regex rescans to the
+    end of the string from every '<' when no '>' follows, so a malformed body full
+    of '<' characters could pin a worker for seconds.
+    """
+    out = []
+    pos = 0
+    while True:
+        lt = html_content.find('<', pos)
+        if lt == -1:
+            break
+        gt = html_content.find('>', lt + 1)
+        if gt == -1:
+            break  # unclosed '<' — everything left is text
+        if gt == lt + 1:
+            out.append(html_content[pos:gt + 1])  # '<>' is not a tag
+        else:
+            out.append(html_content[pos:lt])
+        pos = gt + 1
+    out.append(html_content[pos:])
+    return ''.join(out)
 
 def html_to_text(html_content):
     """Convert HTML email content to plain text version"""
     # Remove HTML tags and decode entities
-    text = re.sub(r'<[^>]+>', '', html_content)
+    text = _strip_tags(html_content)
     text = html_module.unescape(text)
     # Clean up whitespace
-    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = _WS_RE.sub('\n\n', text)
     return text.strip()
 
-def wrap_email_template(html_content, unsubscribe_url=None, is_marketing=False):
-    """
-    Wrap email content in a proper HTML template with logo and footer.
-    
-    Args:
-        html_content: The main email content (HTML)
-        unsubscribe_url: Optional unsubscribe URL for marketing emails
-        is_marketing: Whether this is a marketing email (adds unsubscribe link)
-    """
-    # Idempotent: many callers pre-wrap their content and then pass it to send_email(),
-    # which wraps again — that would render the logo/header twice. If the content is
-    # already a full HTML document, return it untouched.
-    if html_content and html_content.lstrip()[:60].lower().startswith('<!doctype'):
-        return html_content
-    # Always build the logo URL from the public base domain — NOT url_for(_external=True),
-    # which uses the current request host (e.g. localhost in dev / an internal Render host),
-    # neither of which an email client's image proxy can reach. PNG, not SVG (clients block SVG).
-    base = (os.environ.get('APP_BASE_URL') or os.environ.get('BASE_URL') or 'https://usecampusswap.com').rstrip('/')
-    logo_url = f"{base}/static/faviconNew.png"
-    site_url = base
-    logo_block = f"""
-        <div style="text-align: center; margin-bottom: 28px;">
-            <a href="{site_url}" style="text-decoration: none;">
-                <img src="{logo_url}" alt="Campus Swap" style="height: 48px; width: auto; display: inline-block;" />
-            </a>
-        </div>
-    """
-    footer = ""
-    if is_marketing and unsubscribe_url:
-        footer = f"""
+_EMAIL_FOOTER_UNSUBSCRIBE = """
         <div style="margin-top: 40px; padding-top: 20px; border-top: 1px solid #e2e8f0; font-size: 0.85rem; color: #64748b;">
             <p style="margin: 0 0 10px;">Campus Swap</p>
             <p style="margin: 0 0 10px;">Physical address coming soon</p>
@@ -724,16 +819,33 @@ def wrap_email_template(html_content, unsubscribe_url=None, is_marketing=False):
             </p>
         </div>
         """
-    elif is_marketing:
-        # Marketing email but no unsubscribe URL provided (shouldn't happen, but handle gracefully)
-        footer = """
+
+# Marketing email but no unsubscribe URL provided (shouldn't happen, but handle gracefully)
+_EMAIL_FOOTER_NO_UNSUBSCRIBE = """
         <div style="margin-top: 40px; padding-top: 20px; border-top: 1px solid #e2e8f0; font-size: 0.85rem; color: #64748b;">
             <p style="margin: 0 0 10px;">Campus Swap</p>
             <p style="margin: 0;">Physical address coming soon</p>
         </div>
         """
-    
-    return f"""<!DOCTYPE html>
+
+_EMAIL_TAIL = """
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>"""
+
+_email_head_cache = {}  # base URL -> envelope up to the content slot
+
+
+def _email_head(base):
+    """Everything in the email envelope before the body content, built once per base URL."""
+    head = _email_head_cache.get(base)
+    if head is None:
+        head = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="utf-8">
@@ -747,19 +859,44 @@ def wrap_email_template(html_content, unsubscribe_url=None, is_marketing=False):
                 <table role="presentation" style="width: 100%; max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 8px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
                     <tr>
                         <td style="padding: 30px;">
-                            {logo_block}
-                            {html_content}
-                            {footer}
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
-    </table>
-</body>
-</html>"""
+                            
+        <div style="text-align: center; margin-bottom: 28px;">
+            <a href="{base}" style="text-decoration: none;">
+                <img src="{base}/static/faviconNew.png" alt="Campus Swap" style="height: 48px; width: auto; display: inline-block;" />
+            </a>
+        </div>
+    
+                            """
+        _email_head_cache[base] = head
+    return head
+
+def wrap_email_template(html_content, unsubscribe_url=None, is_marketing=False):
+    """
+    Wrap email content in a proper HTML template with logo and footer.
+    
+    Args:
+        html_content: The main email content (HTML)
+        unsubscribe_url: Optional unsubscribe URL for marketing emails
+        is_marketing: Whether this is a marketing email (adds unsubscribe link)
+    """
+    # Idempotent: many callers pre-wrap their content and then pass it to send_email(),
+    # which wraps again — that would render the logo/header twice. If the content is
+    # already a full HTML document, return it untouched.
+    if html_content and html_content.lstrip()[:60].lower().startswith('<!doctype'):
+        return html_content
+    # Always build the logo URL from the public base domain — NOT url_for(_external=True),
+    # which uses the current request host (e.g. localhost in dev / an internal Render host),
+    # neither of which an email client's image proxy can reach. PNG, not SVG (clients block SVG).
+    base = (os.environ.get('APP_BASE_URL') or os.environ.get('BASE_URL') or 'https://usecampusswap.com').rstrip('/')
+    footer = ""
+    if is_marketing and unsubscribe_url:
+        footer = _EMAIL_FOOTER_UNSUBSCRIBE.format(unsubscribe_url=unsubscribe_url)
+    elif is_marketing:
+        footer = _EMAIL_FOOTER_NO_UNSUBSCRIBE
+
+    return ''.join((_email_head(base), html_content or '', '\n                            ', footer, _EMAIL_TAIL))
 
-def send_email(to_email, subject, html_content, from_email=None, is_marketing=False, user=None):
+def send_email(to_email, subject, html_content, from_email=None, is_marketing=False, user=None, user_id=None):
     """
     Sends an email using Resend with automatic unsubscribe handling for marketing emails.
     
@@ -770,6 +907,8 @@ def send_email(to_email, subject, html_content, from_email=None, is_marketing=Fa
         from_email: Optional sender email (defaults to configured sender)
         is_marketing: If True, adds unsubscribe link and headers (default: False)
         user: User object (required if is_marketing=True, used for unsubscribe token)
+        user_id: Recipient's user id, in place of `user` for bulk sends from
+            marketing_recipients() that are already filtered on unsubscribed
     
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -795,11 +934,12 @@ def send_email(to_email, subject, html_content, from_email=None, is_marketing=Fa
     # Generate unsubscribe URL if marketing email
     unsubscribe_url = None
     if is_marketing:
-        if not user:
+        if user is not None:
+            user_id = user.id
+        if user_id is None:
             logger.warning(f"Marketing email to {to_email} but no user object provided. Cannot add unsubscribe link.")
         else:
-            # Ensure user has unsubscribe token
-            token = ensure_unsubscribe_token(user)
+            token = _unsubscribe_token_for_id(user_id)
             unsubscribe_url = url_for('unsubscribe', token=token, _external=True)
 
     # Wrap content in email template
@@ -835,6 +975,26 @@ def send_email(to_email, subject, html_content, from_email=None, is_marketing=Fa
         return False
 
 
+_email_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='email')
+_stripe_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='stripe')
+
+
+def queue_email(to_email, subject, html_content, **kwargs):
+    """Hand send_email() to a background thread so the Resend round trip stays off the request.
+
+    Same arguments as send_email. Build html_content (and any url_for links) before calling,
+    and pass user_id rather than a User: the worker has an app context but no request or
+    DB session of its own. Returns the Future; callers normally ignore it.
+    """
+    app_obj = current_app._get_current_object()
+
+    def _send():
+        with app_obj.app_context():
+            return send_email(to_email, subject, html_content, **kwargs)
+
+    return _email_executor.submit(_send)
+
+
 def _get_payout_percentage(item):
     return 0.50
 
@@ -929,28 +1089,119 @@ def get_warehouse_spots_remaining():
     return max(0, WAREHOUSE_CAPACITY - committed)
 
 
+_ITEM_SOLD_EMAIL_TMPL = """
+    <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
+        <h2 style="color: #166534;">Cha-Ching!</h2>
+        <p>Good news! Your item <strong>{desc}</strong> has just been purchased.</p>
+        <div style="background: #f0fdf4; border: 1px solid #bbf7d0; border-radius: 8px; padding: 16px; margin: 20px 0;">
+            <p style="margin: 0 0 8px;"><strong>Sale price:</strong> ${price:.2f}</p>
+            <p style="margin: 0 0 8px;"><strong>Your payout ({pct}%):</strong> ${payout:.2f}</p>
+            <p style="margin: 0;"><strong>Payout to:</strong> {method} (@{handle})</p>
+        </div>
+        <p>We'll process your payout shortly. Our team handles the handover to the buyer. You don't need to do anything!</p>
+        <p>Thanks for selling with Campus Swap!</p>
+    </div>
+    """
+
+
 def _item_sold_email_html(item, seller):
-    """Build HTML for item sold notification with payout details."""
+    """Build HTML for item sold notification with payout details.
+
+    Seller-entered text (description, payout method/handle) is HTML-escaped.
+    """
     sale_price = item.price or 0
     payout_pct = _get_payout_percentage(item)
-    payout_amount = round(sale_price * payout_pct, 2)
-    payout_method = seller.payout_method or "Venmo"
-    payout_handle = seller.payout_handle or "-"
-    return f"""
+    return _ITEM_SOLD_EMAIL_TMPL.format(
+        desc=html_module.escape(item.description or ''),
+        price=sale_price,
+        pct=int(payout_pct * 100),
+        payout=round(sale_price * payout_pct, 2),
+        method=html_module.escape(seller.payout_method or "Venmo"),
+        handle=html_module.escape(seller.payout_handle or "-"),
+    )
+
+
+def _dashboard_url():
+    """Absolute dashboard link for emails, built once per request.
+
+    Bulk approvals and notify-all loops drop this into every message; it still depends on
+    the request host, so it is memoized on g rather than per process.
+    """
+    url = getattr(g, 'dashboard_url', None)
+    if url is None:
+        url = g.dashboard_url = url_for('dashboard', _external=True)
+    return url
+
+
+_ITEM_APPROVED_EMAIL_TMPL = """
     <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
-        <h2 style="color: #166534;">Cha-Ching!</h2>
-        <p>Good news! Your item <strong>{item.description}</strong> has just been purchased.</p>
+        <h2 style="color: #166534;">Your Item Has Been Approved!</h2>
+        <p>Great news! Your item <strong>{desc}</strong> has been approved.</p>
         <div style="background: #f0fdf4; border: 1px solid #bbf7d0; border-radius: 8px; padding: 16px; margin: 20px 0;">
-            <p style="margin: 0 0 8px;"><strong>Sale price:</strong> ${sale_price:.2f}</p>
-            <p style="margin: 0 0 8px;"><strong>Your payout ({int(payout_pct * 100)}%):</strong> ${payout_amount:.2f}</p>
-            <p style="margin: 0;"><strong>Payout to:</strong> {payout_method} (@{payout_handle})</p>
+            <p style="margin: 0 0 8px;"><strong>Price:</strong> ${price:.2f}</p>
+            <p style="margin: 0;">Next step:{next_step}</p>
         </div>
-        <p>We'll process your payout shortly. Our team handles the handover to the buyer. You don't need to do anything!</p>
+        <p><a href="{dashboard_url}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
         <p>Thanks for selling with Campus Swap!</p>
     </div>
     """
 
 
+def _item_approved_email_html(item, price):
+    """Build HTML for the item approved notification sent from admin bulk pricing.
+
+    The seller-entered description is HTML-escaped.
+    """
+    next_step = ""
+    if item.collection_method == 'online':
+        next_step = f" Confirm your pickup week and pay ${SERVICE_FEE_CENTS // 100} to secure your spot."
+    elif item.collection_method == 'free':
+        next_step = " Add your address and select a pickup window in your dashboard—no payment required."
+    return _ITEM_APPROVED_EMAIL_TMPL.format(
+        desc=html_module.escape(item.description or ''),
+        price=price,
+        next_step=next_step,
+        dashboard_url=_dashboard_url(),
+    )
+
+
+_WELCOME_EMAIL_TMPL = """
+    <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
+        <h2 style="color: #166534;">Welcome to Campus Swap!</h2>
+        <p>Hi {name},</p>
+        <p>Thanks for joining Campus Swap! Your account has been created successfully.</p>
+        <p>You can now:</p>
+        <ul>
+            <li>Browse our inventory</li>
+            <li>List items to sell</li>
+            <li>Track your sales and payouts</li>
+        </ul>
+        <p><a href="{dashboard_url}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
+        <p>Happy swapping!</p>
+        <p>The Campus Swap Team</p>
+    </div>
+    """
+
+_WELCOME_GUEST_EMAIL_TMPL = """
+    <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
+        <h2 style="color: #166534;">Welcome to Campus Swap!</h2>
+        <p>Hi {name},</p>
+        <p>Thanks for creating your account! You're all set to start selling.</p>
+        <p><a href="{dashboard_url}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
+        <p>Happy swapping!</p>
+    </div>
+    """
+
+
+def _welcome_email_html(full_name, converted_guest=False):
+    """Build HTML for the signup welcome email; the user-entered name is HTML-escaped."""
+    tmpl = _WELCOME_GUEST_EMAIL_TMPL if converted_guest else _WELCOME_EMAIL_TMPL
+    return tmpl.format(
+        name=html_module.escape(full_name) if full_name else 'there',
+        dashboard_url=_dashboard_url(),
+    )
+
+
 def _email_photo_url(filename):
     """Return an absolute, email-safe image URL for a stored photo.
 
@@ -1068,12 +1319,20 @@ def backfill_orders_from_buyer_orders():
 
 # --- VALIDATION HELPERS ---
 
+_EMAIL_RE = re.compile(r'\A[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z')
+_NONDIGIT_RE = re.compile(r'\D')
+_PHONE_STRIP = str.maketrans('', '', '()- ')  # formatting chars dropped from raw phone input
+
 def validate_email(email):
     """Validate email format"""
     if not email or len(email) > MAX_EMAIL_LENGTH:
         return False
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
+
+
+def _user_exists(**filters):
+    """True if any User matches filter_by(**filters); selects only the id, no ORM hydration."""
+    return db.session.execute(db.select(User.id).filter_by(**filters).limit(1)).first() is not None
 
 
 def verify_turnstile(token):
@@ -1105,7 +1364,7 @@ def validate_phone(phone):
     """
     if not phone or not phone.strip():
         return False, "Please provide a phone number."
-    digits = re.sub(r'\D', '', phone.strip())
+    digits = _NONDIGIT_RE.sub('', phone.strip())
     if len(digits) == 11 and digits.startswith('1'):
         digits = digits[1:]  # Strip US country code
     if len(digits) != 10:
@@ -1113,15 +1372,29 @@ def validate_phone(phone):
     return True, digits
 
 
+def _upload_size(file, limit):
+    """Size in bytes of an uploaded file.
+
+    If the part's Content-Length header already exceeds `limit`, return it without
+    touching the stream. Otherwise measure the spooled stream and rewind it — a
+    client-declared length is never trusted to let a file through.
+    """
+    declared = getattr(file, 'content_length', 0) or 0
+    if declared > limit:
+        return declared
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    file.seek(0)  # Reset file pointer
+    return file_size
+
+
 def validate_file_upload(file):
     """Validate uploaded file: size, extension, and MIME type"""
     if not file or not file.filename:
         return False, "No file provided"
     
     # Check file size
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # Reset file pointer
+    file_size = _upload_size(file, MAX_UPLOAD_SIZE)
     
     if file_size > MAX_UPLOAD_SIZE:
         return False, f"File size exceeds {MAX_UPLOAD_SIZE / (1024*1024):.1f}MB limit"
@@ -1162,9 +1435,7 @@ def validate_video_upload(file):
     if not file or not file.filename:
         return False, "No file provided"
 
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
+    file_size = _upload_size(file, MAX_VIDEO_SIZE)
 
     if file_size > MAX_VIDEO_SIZE:
         return False, f"Video size exceeds {MAX_VIDEO_SIZE / (1024*1024):.0f}MB limit"
@@ -1347,8 +1618,8 @@ def internal_error(error):
 
 @app.errorhandler(413)
 def request_entity_too_large(error):
-    logger.warning(f"413 error: File too large")
-    flash("File is too large. Maximum size is 10MB.", "error")
+    logger.warning(f"413 error: Request too large")
+    flash(f"Upload is too large. Please send at most {MAX_REQUEST_SIZE // (1024 * 1024)}MB at a time.", "error")
     return redirect(request.url), 413
 
 
@@ -1423,7 +1694,7 @@ def _homepage_state():
         shop_live, pickups_on = _HOMEPAGE_MODE_FLAGS[forced]
         return {'mode': forced, 'pickups_on': pickups_on, 'shop_live': shop_live}
     # 'auto' (or unknown) → derive from the live flags.
-    pickups_on = AppSetting.get('pickup_period_active', 'false').lower() == 'true'
+    pickups_on = AppSetting.get_cached('pickup_period_active', 'false').lower() == 'true'
     shop_live = AppSetting.get('shop_teaser_mode', 'false').lower() != 'true'
     if pickups_on and shop_live:
         mode = 'dual'
@@ -1644,25 +1915,55 @@ def index():
         active_cat=None,
     )
 
+
+_static_page_cache = {}  # (template, store, store_open) -> (rendered HTML, built_at); per-process
+STATIC_PAGE_CACHE_TTL = 300  # seconds; bounds staleness for layout data the key doesn't cover
+
+
+def _render_static_page(template_name):
+    """Render a content-only page, reusing the HTML for anonymous visitors.
+
+    Logged-in users and anyone carrying session state (flashes, cart token, CSRF
+    token) always get a fresh render, since the layout shows per-user nav and forms.
+    A render that writes to the session is never cached for the same reason.
+    """
+    if app.debug or current_user.is_authenticated or session:
+        return render_template(template_name)
+    now = time.time()
+    key = (template_name, get_current_store(), store_is_open())
+    hit = _static_page_cache.get(key)
+    if hit is not None and now - hit[1] < STATIC_PAGE_CACHE_TTL:
+        return hit[0]
+    html = render_template(template_name)
+    if session.modified or session:
+        return html
+    _static_page_cache[key] = (html, now)
+    return html
+
 @app.route('/about')
+@(limiter.exempt if limiter else (lambda f: f))
 def about():
-    return render_template('about.html')
+    return _render_static_page('about.html')
 
 @app.route('/parents')
+@(limiter.exempt if limiter else (lambda f: f))
 def parents():
-    return render_template('parents.html')
+    return _render_static_page('parents.html')
 
 @app.route('/privacy-policy')
+@(limiter.exempt if limiter else (lambda f: f))
 def privacy_policy():
-    return render_template('privacy_policy.html')
+    return _render_static_page('privacy_policy.html')
 
 @app.route('/terms-and-conditions')
+@(limiter.exempt if limiter else (lambda f: f))
 def terms_conditions():
-    return render_template('terms_conditions.html')
+    return _render_static_page('terms_conditions.html')
 
 @app.route('/refund-policy')
+@(limiter.exempt if limiter else (lambda f: f))
 def refund_policy():
-    return render_template('refund_policy.html')
+    return _render_static_page('refund_policy.html')
 
 @app.route('/contact', methods=['GET', 'POST'])
 @limiter.limit("5 per hour", methods=['POST']) if limiter else lambda f: f
@@ -1736,75 +2037,125 @@ def become_a_seller():
     if request.args.get('source'):
         session['source'] = request.args.get('source')
 
+    pickup_period_active = get_pickup_period_active()
+
+    def render_page():
+        return render_template('become_a_seller.html', pickup_period_active=pickup_period_active,
+                               store_info=get_store_info(get_current_store()),
+                               warehouse_spots=get_warehouse_spots_remaining())
+
     if request.method == 'POST':
         if not verify_turnstile(request.form.get('cf-turnstile-response', '')):
             flash("Verification failed. Please try again.", "error")
-            return render_template('become_a_seller.html', pickup_period_active=get_pickup_period_active(), store_info=get_store_info(get_current_store()),
-                               warehouse_spots=get_warehouse_spots_remaining())
+            return render_page()
         email = request.form.get('email', '').strip()
 
         if not email:
             flash("Please provide your email address.", "error")
-            return render_template('become_a_seller.html', pickup_period_active=get_pickup_period_active(), store_info=get_store_info(get_current_store()), warehouse_spots=get_warehouse_spots_remaining())
+            return render_page()
 
         if not validate_email(email):
             flash("Please provide a valid email address.", "error")
-            return render_template('become_a_seller.html', pickup_period_active=get_pickup_period_active(), store_info=get_store_info(get_current_store()), warehouse_spots=get_warehouse_spots_remaining())
+            return render_page()
 
         if len(email) > MAX_EMAIL_LENGTH:
             flash(f"Email address is too long (max {MAX_EMAIL_LENGTH} characters).", "error")
-            return render_template('become_a_seller.html', pickup_period_active=get_pickup_period_active(), store_info=get_store_info(get_current_store()), warehouse_spots=get_warehouse_spots_remaining())
+            return render_page()
 
-        pickup_period_active = get_pickup_period_active()
+        source = session.get('source', 'direct')
         if not pickup_period_active:
-            existing_user = User.query.filter_by(email=email).first()
-            if not existing_user:
-                guest_user = User(email=email, referral_source=session.get('source', 'direct'))
-                db.session.add(guest_user)
-                db.session.commit()
+            if _insert_user_if_absent(email=email, referral_source=source):
                 logger.info(f"Guest account created (become-a-seller, pickup closed): {email}")
 
             flash("Pickup period has ended for this year. We've saved your email and will notify you when signups open next year! Check your spam folder when we send the notification.", "info")
             return redirect(url_for('become_a_seller'))
 
-        user = User.query.filter_by(email=email).first()
-        if user:
-            if user.password_hash:
-                flash("You already have an account. Please log in.", "info")
-                return redirect(url_for('login', email=email))
-            else:
-                user.is_seller = True
-                db.session.commit()
-                login_user(user)
-                return redirect(get_user_dashboard())
-        else:
-            source = session.get('source', 'direct')
-            new_user = User(email=email, referral_source=source, is_seller=True)
-            db.session.add(new_user)
-            db.session.commit()
+        new_user = _insert_user_if_absent(email=email, referral_source=source, is_seller=True)
+        if new_user:
             login_user(new_user)
             flash("Account created! Complete your profile and activate as a seller to start listing items.", "success")
             return redirect(get_user_dashboard())
 
-    pickup_period_active = get_pickup_period_active()
-    store_info = get_store_info(get_current_store())
-    return render_template('become_a_seller.html', pickup_period_active=pickup_period_active, store_info=store_info,
-                           warehouse_spots=get_warehouse_spots_remaining())
+        user = User.query.filter_by(email=email).first()
+        if user.password_hash:
+            flash("You already have an account. Please log in.", "info")
+            return redirect(url_for('login', email=email))
+        user.is_seller = True
+        db.session.commit()
+        login_user(user)
+        return redirect(get_user_dashboard())
+
+    return render_page()
+
+def _insert_user_if_absent(**values):
+    """Create a User unless one with this email already exists; returns it, or None if taken.
+
+    On Postgres/SQLite this is a single INSERT ... ON CONFLICT (email) DO NOTHING RETURNING,
+    so the common new-signup path costs one round-trip and two concurrent signups for the
+    same email can't race into an IntegrityError.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        if _user_exists(email=values['email']):
+            return None
+        user = User(**values)
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    stmt = insert(User).values(**values).on_conflict_do_nothing(index_elements=['email']).returning(User)
+    user = db.session.scalars(stmt).first()
+    db.session.commit()
+    return user
+
 
 @app.route('/sitemap.xml')
+@(limiter.exempt if limiter else (lambda f: f))
 def sitemap():
     """Generate dynamic sitemap.xml for Google Search Console"""
-    from flask import Response
-    
     # Base URL
     base_url = request.url_root.rstrip('/')
-    
+
+    now = time.time()
+    if (_sitemap_cache["xml"] is not None and _sitemap_cache["base_url"] == base_url
+            and now - _sitemap_cache["built_at"] < SITEMAP_CACHE_TTL):
+        return _sitemap_response(_sitemap_cache["xml"])
+
+    # Stream the XML as it's built (constant memory, earlier first byte); keep a copy
+    # of the chunks so a fully-sent sitemap also refreshes the cache.
+    def generate():
+        parts = []
+        for part in _sitemap_parts(base_url):
+            parts.append(part)
+            yield part
+        _sitemap_cache["xml"] = ''.join(parts)
+        _sitemap_cache["base_url"] = base_url
+        _sitemap_cache["built_at"] = now
+
+    return _sitemap_response(stream_with_context(generate()))
+
+
+_SITEMAP_URL_FMT = (
+    '  <url>\n'
+    '    <loc>{loc}</loc>\n'
+    '    <lastmod>{lastmod}</lastmod>\n'
+    '    <changefreq>{changefreq}</changefreq>\n'
+    '    <priority>{priority}</priority>\n'
+    '  </url>\n'
+)
+
+
+def _sitemap_parts(base_url):
+    """Yield sitemap.xml in chunks: header, one <url> block per page/item, footer."""
     # Get current date for lastmod
-    current_date = datetime.utcnow().strftime('%Y-%m-%d')
+    current_date = datetime.utcnow().date().isoformat()
     
-    # Start building XML
-    xml = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
     
     # Static pages with priorities
     static_pages = [
@@ -1819,16 +2170,18 @@ def sitemap():
         {'url': '/login', 'priority': '0.6', 'changefreq': 'monthly'},
     ]
     
-    for page in static_pages:
-        xml.append('  <url>')
-        xml.append(f'    <loc>{base_url}{page["url"]}</loc>')
-        xml.append(f'    <lastmod>{current_date}</lastmod>')
-        xml.append(f'    <changefreq>{page["changefreq"]}</changefreq>')
-        xml.append(f'    <priority>{page["priority"]}</priority>')
-        xml.append('  </url>')
+    yield ''.join(
+        _SITEMAP_URL_FMT.format(loc=base_url + page['url'], lastmod=current_date,
+                                changefreq=page['changefreq'], priority=page['priority'])
+        for page in static_pages
+    )
     
-    # Add all available (live) product pages - same visibility as inventory
-    available_items = InventoryItem.query.join(InventoryItem.seller, isouter=True).filter(
+    # Add all available (live) product pages - same visibility as inventory.
+    # Only id + date_added are emitted, so select just those columns rather than
+    # hydrating full InventoryItem rows.
+    available_items = db.session.query(
+        InventoryItem.id, InventoryItem.date_added
+    ).join(InventoryItem.seller, isouter=True).filter(
         InventoryItem.status == 'available',
         _rephotographed_clause(),  # don't advertise purged legacy listings to search engines
         _matched_or_kept_clause(),
@@ -1844,35 +2197,54 @@ def sitemap():
                 InventoryItem.arrived_at_store_at.isnot(None)
             )
         )
-    ).all()
-    for item in available_items:
-        xml.append('  <url>')
-        xml.append(f'    <loc>{base_url}/item/{item.id}</loc>')
-        xml.append(f'    <lastmod>{item.date_added.strftime("%Y-%m-%d") if item.date_added else current_date}</lastmod>')
-        xml.append('    <changefreq>weekly</changefreq>')
-        xml.append('    <priority>0.7</priority>')
-        xml.append('  </url>')
-    
-    xml.append('</urlset>')
+    ).execution_options(yield_per=2000)
+    item_url_fmt = _SITEMAP_URL_FMT.format(
+        loc=base_url.replace('{', '{{').replace('}', '}}') + '/item/{id}',
+        lastmod='{lastmod}', changefreq='weekly', priority='0.7',
+    )
+    for item_id, date_added in available_items:
+        yield item_url_fmt.format(
+            id=item_id,
+            lastmod=date_added.date().isoformat() if date_added else current_date,
+        )
     
-    # Return XML response
-    return Response('\n'.join(xml), mimetype='application/xml')
+    yield '</urlset>'
+
+
+def _sitemap_response(body):
+    """Wrap sitemap XML (a string or chunk iterator) in a Response that lets crawlers/CDNs
+    reuse it for the cache TTL."""
+    resp = Response(body, mimetype='application/xml')
+    resp.headers['Cache-Control'] = f'public, max-age={SITEMAP_CACHE_TTL}'
+    return resp
+
+_ROBOTS_TXT_TMPL = '\n'.join([
+    'User-agent: *',
+    'Allow: /',
+    'Disallow: /admin',
+    'Disallow: /dashboard',
+    'Disallow: /account_settings',
+    'Disallow: /webhook',
+    'Sitemap: {base_url}/sitemap.xml',
+])
+_robots_cache = {}  # base_url -> encoded body; the Host header is client-supplied, so capped
+ROBOTS_CACHE_MAX_HOSTS = 16
+
 
 @app.route('/robots.txt')
+@(limiter.exempt if limiter else (lambda f: f))
 def robots_txt():
     """Generate robots.txt file"""
     base_url = request.url_root.rstrip('/')
-    robots = [
-        'User-agent: *',
-        'Allow: /',
-        'Disallow: /admin',
-        'Disallow: /dashboard',
-        'Disallow: /account_settings',
-        'Disallow: /webhook',
-        f'Sitemap: {base_url}/sitemap.xml'
-    ]
-    
-    return Response('\n'.join(robots), mimetype='text/plain')
+    body = _robots_cache.get(base_url)
+    if body is None:
+        body = _ROBOTS_TXT_TMPL.format(base_url=base_url).encode()
+        if len(_robots_cache) < ROBOTS_CACHE_MAX_HOSTS:
+            _robots_cache[base_url] = body
+
+    response = Response(body, mimetype='text/plain')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
 
 @app.route('/catalog.xml')
 def meta_catalog_feed():
@@ -1882,7 +2254,10 @@ def meta_catalog_feed():
             and (now - _catalog_cache["built_at"]).seconds < CATALOG_CACHE_TTL):
         return Response(_catalog_cache["xml"], mimetype='application/xml')
 
-    items = InventoryItem.query.filter(
+    items = InventoryItem.query.options(
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.gallery_photos),
+    ).filter(
         InventoryItem.status == 'available',
         InventoryItem.ai_approved == True,
         InventoryItem.needs_new_photo == False,
@@ -1960,7 +2335,10 @@ def admin_catalog_preview():
     if guard:
         return guard
 
-    items = InventoryItem.query.filter(
+    items = InventoryItem.query.options(
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.gallery_photos),
+    ).filter(
         InventoryItem.status == 'available',
         InventoryItem.ai_approved == True,
         InventoryItem.needs_new_photo == False,
@@ -2007,20 +2385,30 @@ th,td{{border:1px solid #ccc;padding:8px;text-align:left}}th{{background:#f0f0f0
 </html>"""
 
 
+def _load_favicon():
+    """Read the favicon once at import; it never changes while the process is running."""
+    try:
+        with open(os.path.join(app.static_folder, 'faviconNew.png'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    return data, hashlib.md5(data).hexdigest()
+
+
+_FAVICON_BYTES, _FAVICON_ETAG = _load_favicon()
+
+
 @app.route('/favicon.ico')
 @app.route('/favicon.png')
+@(limiter.exempt if limiter else (lambda f: f))
 def favicon():
     """Serve favicon.png for Google search results and browser tabs."""
-    try:
-        favicon_path = os.path.join('static', 'faviconNew.png')
-        if not os.path.exists(favicon_path):
-            return Response('', mimetype='image/png'), 404
-        response = send_from_directory('static', 'faviconNew.png', mimetype='image/png')
-        response.headers['Cache-Control'] = 'public, max-age=31536000'
-        return response
-    except Exception as e:
-        logger.error(f"Error serving favicon: {e}", exc_info=True)
+    if not _FAVICON_BYTES:
         return Response('', mimetype='image/png'), 404
+    response = Response(_FAVICON_BYTES, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.set_etag(_FAVICON_ETAG)
+    return response.make_conditional(request)
 
 
 # =========================================================
@@ -2030,7 +2418,7 @@ def favicon():
 @app.route('/unsubscribe/<token>', methods=['GET', 'POST'])
 def unsubscribe(token):
     """Handle email unsubscribe requests"""
-    user = User.query.filter_by(unsubscribe_token=token).first()
+    user = _user_for_unsubscribe_token(token)
     
     if not user:
         flash("Invalid unsubscribe link. If you continue to receive emails, please contact support.", "error")
@@ -2061,8 +2449,110 @@ def _shop_filter_qs(args):
     pairs = [(key, val) for key in SHOP_FILTER_PARAMS for val in args.getlist(key) if val != '']
     return urlencode(pairs)
 
+# Text columns a shop card never renders (descriptions for the item page, internal notes,
+# raw AI/seller drafts). Loaded on access if something does touch them.
+_SHOP_CARD_DEFERRED = tuple(defer(col) for col in (
+    InventoryItem.long_description,
+    InventoryItem.storage_note,
+    InventoryItem.needs_photo_note,
+    InventoryItem.ai_description,
+    InventoryItem.ai_long_description,
+    InventoryItem.seller_description,
+    InventoryItem.seller_long_description,
+))
+
+
+def _encode_shop_cursor(item):
+    """Opaque keyset cursor for the shop's newest-first order: '<date_added iso>_<id>'."""
+    if item.date_added is None:
+        return None
+    return f"{item.date_added.isoformat()}_{item.id}"
+
+
+def _decode_shop_cursor(cursor):
+    """(date_added, id) from _encode_shop_cursor(), or None if missing/malformed."""
+    if not cursor:
+        return None
+    date_part, _, id_part = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(date_part), int(id_part)
+    except ValueError:
+        return None
+
+
+_shop_page_cache = {}  # (shop params, store, store_open) -> (body, mimetype, built_at); per-process
+SHOP_CACHE_TTL = 60  # seconds; bounds staleness for bulk updates and other workers' writes
+SHOP_CACHE_MAX_ENTRIES = 256  # params are client-supplied (search text, page), so capped
+# The only query params _shop_view() reads; anything else (utm_*, cache busters) shares a key
+_SHOP_CACHE_PARAMS = ('category_id', 'subcategory', 'store', 'search', 'page', 'ajax',
+                      'condition', 'price', 'size', 'sort', 'after')
+
+
+def _mark_shop_pages_stale():
+    """Drop cached shop pages once the current transaction commits.
+
+    Clearing at flush time would leave a window before COMMIT where another request
+    re-renders from the old rows and caches that for SHOP_CACHE_TTL.
+    """
+    db.session.info['shop_pages_stale'] = True
+
+
+@event.listens_for(InventoryItem, 'after_insert')
+@event.listens_for(InventoryItem, 'after_update')
+@event.listens_for(InventoryItem, 'after_delete')
+@event.listens_for(ItemPhoto, 'after_insert')
+@event.listens_for(ItemPhoto, 'after_update')
+@event.listens_for(ItemPhoto, 'after_delete')
+def _invalidate_shop_page_cache(mapper, connection, target):
+    _mark_shop_pages_stale()
+
+
+@event.listens_for(AppSetting, 'after_insert')
+@event.listens_for(AppSetting, 'after_update')
+@event.listens_for(AppSetting, 'after_delete')
+def _invalidate_shop_page_cache_on_teaser_toggle(mapper, connection, target):
+    # shop_teaser_mode decides whether _shop_view() renders the grid or the teaser page
+    if target.key == 'shop_teaser_mode':
+        _mark_shop_pages_stale()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _clear_shop_page_cache_after_commit(session):
+    if session.info.pop('shop_pages_stale', False):
+        _shop_page_cache.clear()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_stale_shop_pages_on_rollback(session):
+    session.info.pop('shop_pages_stale', None)
+
+
 @app.route('/shop')
 def inventory():
+    """Shop grid. Anonymous visitors with no session state share a short-lived cached
+    render per set of shop params (same rules as _render_static_page)."""
+    if app.debug or current_user.is_authenticated or session:
+        return _shop_view()
+    now = time.time()
+    params = tuple(tuple(request.args.getlist(name)) for name in _SHOP_CACHE_PARAMS)
+    key = (params, get_current_store(), store_is_open())
+    hit = _shop_page_cache.get(key)
+    if hit is not None and now - hit[2] < SHOP_CACHE_TTL:
+        response = Response(hit[0], mimetype=hit[1])
+    else:
+        response = make_response(_shop_view())
+        if response.status_code != 200 or session.modified or session:
+            return response
+        if len(_shop_page_cache) >= SHOP_CACHE_MAX_ENTRIES:
+            for stale in [k for k, v in _shop_page_cache.items() if now - v[2] >= SHOP_CACHE_TTL]:
+                _shop_page_cache.pop(stale, None)
+        if len(_shop_page_cache) < SHOP_CACHE_MAX_ENTRIES:
+            _shop_page_cache[key] = (response.get_data(), response.mimetype, now)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _shop_view():
     """Display inventory with pagination, search, and optimized queries"""
     from sqlalchemy import case as sa_case
     # Shop Drop teaser — renders blurred mosaic + email capture before launch
@@ -2094,6 +2584,7 @@ def inventory():
     store_name = request.args.get('store', get_current_store())
     search_query = request.args.get('search', '').strip()
     page = request.args.get('page', 1, type=int)
+    is_ajax = request.args.get('ajax') == '1'
 
     # New filter params
     condition_filters = request.args.getlist('condition')   # like_new | good | fair
@@ -2120,9 +2611,15 @@ def inventory():
 
     # Buyer visibility + multi-unit collapse both come from the shared helpers, so any
     # other surface that lists "what's for sale" stays in lockstep with this page.
+    # selectinload: one IN query per relationship for the page of cards, instead of
+    # widening the paginated SELECT with extra joins (and a lazy load per card for photos).
+    # The long free-text columns never appear on a card, so they're deferred rather than
+    # shipped for every row (search still filters on long_description in SQL).
     query = InventoryItem.query.join(InventoryItem.seller, isouter=True).options(
-        joinedload(InventoryItem.category),
-        joinedload(InventoryItem.seller)
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.seller),
+        selectinload(InventoryItem.gallery_photos),
+        *_SHOP_CARD_DEFERRED,
     ).filter(
         *_shop_eligible_clauses(),
         _stock_group_collapse_clause(),
@@ -2141,7 +2638,8 @@ def inventory():
             InventoryItem.mattress_size.in_(size_filters),
         ))
 
-    # Apply search filter
+    # Apply search filter (substring ILIKE; on Postgres the pg_trgm GIN indexes on both
+    # columns serve the leading-wildcard pattern, so this isn't a sequential scan)
     if search_query:
         search_pattern = f"%{search_query}%"
         query = query.filter(
@@ -2175,15 +2673,17 @@ def inventory():
         if price_clauses:
             query = query.filter(or_(*price_clauses))
 
-    # Count matching items before pagination (for display in template)
-    total_count = query.count()
+    # Count matching items before pagination (for display in template; the ajax scroll
+    # response doesn't show it, so skip the extra COUNT there)
+    total_count = None if is_ajax else query.count()
 
-    # Primary sort: available first; secondary: user's chosen sort
-    _avail_first = sa_case((InventoryItem.status == 'available', 0), else_=1)
+    # User's chosen sort. No "available first" key is needed: _shop_eligible_clauses()
+    # already restricts to status == 'available', and leaving a CASE out of the ORDER BY
+    # lets "newest" read straight off ix_inventory_item_status_date_added.
     if sort_val == 'price_asc':
-        query = query.order_by(_avail_first, InventoryItem.price.asc())
+        query = query.order_by(InventoryItem.price.asc())
     elif sort_val == 'price_desc':
-        query = query.order_by(_avail_first, InventoryItem.price.desc())
+        query = query.order_by(InventoryItem.price.desc())
     elif sort_val == 'best_deal':
         # Discount % = (retail_price - price) / retail_price; NULL retail_price → 0 (sort last)
         _discount = sa_case(
@@ -2196,19 +2696,34 @@ def inventory():
             ),
             else_=0
         )
-        query = query.order_by(_avail_first, _discount.desc())
+        query = query.order_by(_discount.desc())
     else:
-        # default: newest
-        query = query.order_by(_avail_first, InventoryItem.date_added.desc())
-
-    # Paginate results
-    pagination = query.paginate(
-        page=page,
-        per_page=ITEMS_PER_PAGE,
-        error_out=False
-    )
+        # default: newest (id breaks ties so the keyset cursor below is unambiguous)
+        query = query.order_by(InventoryItem.date_added.desc(), InventoryItem.id.desc())
+
+    # Ajax infinite scroll on the default sort can pass ?after=<next_after> from the previous
+    # batch: a keyset seek on (date_added, id) costs the same on batch 50 as on batch 1, where
+    # OFFSET has to walk past every earlier row. ?page=N keeps working for everything else.
+    after = _decode_shop_cursor(request.args.get('after')) if is_ajax and sort_val == 'newest' else None
+    if after:
+        after_date, after_id = after
+        batch = query.filter(or_(
+            InventoryItem.date_added < after_date,
+            and_(InventoryItem.date_added == after_date, InventoryItem.id < after_id),
+        )).limit(ITEMS_PER_PAGE + 1).all()
+        items = batch[:ITEMS_PER_PAGE]
+        has_next = len(batch) > ITEMS_PER_PAGE
+        pagination = None
+    else:
+        pagination = query.paginate(
+            page=page,
+            per_page=ITEMS_PER_PAGE,
+            error_out=False
+        )
+        items = pagination.items
+        has_next = pagination.has_next
+    next_after = _encode_shop_cursor(items[-1]) if sort_val == 'newest' and has_next and items else None
 
-    items = pagination.items
     store_info = get_store_info(store_name)
 
     # Full filter state for item links — resolved values, not raw args, so `store` is always
@@ -2227,14 +2742,14 @@ def inventory():
     shop_qs = urlencode(_qs_pairs)
 
     # Ajax scroll: return rendered card HTML + has_next flag
-    if request.args.get('ajax') == '1':
+    if is_ajax:
         cards_html = render_template('_item_card.html',
                                      items=items,
                                      current_store=store_name,
                                      search_query=search_query,
                                      active_cat=cat_id,
                                      shop_qs=shop_qs)
-        return jsonify({'html': cards_html, 'has_next': pagination.has_next, 'page': page})
+        return jsonify({'html': cards_html, 'has_next': has_next, 'page': page, 'next_after': next_after})
 
     response = make_response(render_template('inventory.html',
                          commodities=commodities,
@@ -2384,7 +2899,7 @@ def _share_card_font(size, bold=False):
 
 def _generate_share_card_png(item):
     """Generate 1200x1200 PNG share card. Returns bytes or None."""
-    from PIL import ImageDraw, ImageFont
+    from PIL import Image, ImageDraw, ImageFont
     CARD_W, CARD_H = 1200, 1200
     # Full-bleed photo with gradient overlay (no solid banner)
     WHITE = (255, 255, 255)
@@ -2482,16 +2997,55 @@ def _generate_share_card_png(item):
 def share_card_image(item_id):
     """Serve share card PNG for any item (used for link preview og:image)."""
     item = InventoryItem.query.get_or_404(item_id)
-    png_bytes = _generate_share_card_png(item)
-    if not png_bytes:
-        return "Failed to generate share card.", 500
-    return Response(png_bytes, mimetype="image/png", headers={
-        "Cache-Control": "public, max-age=300",
-        "Content-Disposition": "inline; filename=campus-swap-share.png"
-    })
+    # The card is a pure function of these fields, so the ETag can be checked before
+    # spending a photo fetch + Pillow render on a crawler/CDN revalidation.
+    etag = hashlib.md5(
+        repr((item.id, item.photo_url, item.description, item.price, item.status == 'sold')).encode()
+    ).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        png_bytes = _generate_share_card_png(item)
+        if not png_bytes:
+            return "Failed to generate share card.", 500
+        response = Response(png_bytes, mimetype="image/png", headers={
+            "Content-Disposition": "inline; filename=campus-swap-share.png"
+        })
+    response.headers["Cache-Control"] = "public, max-age=300"
+    response.set_etag(etag)
+    return response
 
 
 # --- IMAGE SERVING ROUTE ---
+# Names with a random token are never reused, so browsers and CDNs may keep them for a year
+# without revalidating. Older item_<id>_<ts>_<n> names could be rewritten within a second, so
+# anything else keeps send_from_directory's ETag revalidation.
+UPLOAD_CACHE_MAX_AGE = 31536000
+_IMMUTABLE_UPLOAD_RE = re.compile(
+    r'(?:item_\d+_\d+_[0-9a-f]{8}(?:_\d+|_refresh)?|temp_[0-9a-f]{32}|(?:qc|whl)_\d+_[0-9a-f]{8})\.jpg'
+)
+# Behind nginx, set to an `internal` location aliased to UPLOAD_FOLDER (e.g. "/_uploads/")
+# and the proxy streams the file with sendfile() instead of tying up a gunicorn worker.
+UPLOADS_ACCEL_PREFIX = os.environ.get('UPLOADS_ACCEL_PREFIX', '')
+
+
+def _send_upload(folder, filename):
+    """Serve an upload from local disk — via X-Accel-Redirect when a proxy is configured."""
+    immutable = _IMMUTABLE_UPLOAD_RE.fullmatch(filename) is not None
+    if UPLOADS_ACCEL_PREFIX:
+        if safe_join(folder, filename) is None:
+            abort(404)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = UPLOADS_ACCEL_PREFIX.rstrip('/') + '/' + quote(filename)
+    else:
+        response = send_from_directory(folder, filename, max_age=UPLOAD_CACHE_MAX_AGE if immutable else None)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
 # Exempt from rate limiting: a single page (e.g. the photo report or shop grid)
 # loads many images at once, which would otherwise blow the default per-IP limit
 # ("50 per hour") and return 429 → broken images. Serving images must never be
@@ -2501,36 +3055,98 @@ def share_card_image(item_id):
 def uploaded_file(filename):
     # Temp files: guest/draft are always on disk; QR mobile (temp_) may be in S3
     if filename.startswith('guest_temp_') or filename.startswith('draft_temp_'):
-        return send_from_directory(app.config['TEMP_UPLOAD_FOLDER'], filename)
+        return _send_upload(app.config['TEMP_UPLOAD_FOLDER'], filename)
     if filename.startswith('temp_'):
         if photo_storage.is_s3():
             disk_path = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], filename)
             if os.path.exists(disk_path):
-                return send_from_directory(app.config['TEMP_UPLOAD_FOLDER'], filename)
+                return _send_upload(app.config['TEMP_UPLOAD_FOLDER'], filename)
             return redirect(photo_storage.get_photo_url(filename), code=302)
-        return send_from_directory(app.config['TEMP_UPLOAD_FOLDER'], filename)
+        return _send_upload(app.config['TEMP_UPLOAD_FOLDER'], filename)
     if photo_storage.is_s3():
         return redirect(photo_storage.get_photo_url(filename), code=302)
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return _send_upload(app.config['UPLOAD_FOLDER'], filename)
 
 
 # --- QR CODE MOBILE PHOTO UPLOAD ---
 UPLOAD_SESSION_EXPIRY_MINUTES = 30
 
+
+def _uuid7_hex():
+    """A UUIDv7 (RFC 9562) as 32 hex chars, for temp upload filenames.
+
+    48-bit Unix-millisecond timestamp followed by random bits, so names sort by upload time
+    and come from one urandom read. Unlike the old temp_<session token>_<ts>_<hex> names,
+    the public /uploads/ URL no longer carries the upload session token. (uuid.uuid7 only
+    lands in Python 3.14.)
+    """
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = ((time.time_ns() // 1_000_000) << 80) | (0x7 << 76) | ((rand >> 62) & 0xFFF) << 64
+    value |= (0b10 << 62) | (rand & ((1 << 62) - 1))
+    return f'{value:032x}'
+
+
+def _remove_file(fp):
+    """Unlink one file; already-gone is fine (no exists() pre-check, one syscall)."""
+    try:
+        os.unlink(fp)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete temp file {fp}: {e}")
+
+
+def _remove_files(paths):
+    """Unlink many files concurrently; each unlink is a blocking round-trip on network disks."""
+    if len(paths) <= 1:
+        for fp in paths:
+            _remove_file(fp)
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as ex:
+        list(ex.map(_remove_file, paths))
+
+
+_photo_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='photo')
+
+
+def _save_photos(uploads):
+    """Store (file, key) pairs via photo_storage.save_photo, several at once for multi-photo posts.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so threads spread the
+    work over cores without pickling uploads to a process pool. If any save fails, the keys
+    the others already wrote are deleted (no row will point at them) and the first failure
+    is re-raised.
+    """
+    if len(uploads) <= 1:
+        for file, key in uploads:
+            photo_storage.save_photo(file, key)
+        return
+    futures = [(key, _photo_executor.submit(photo_storage.save_photo, file, key)) for file, key in uploads]
+    saved, error = [], None
+    for key, future in futures:
+        try:
+            future.result()
+            saved.append(key)
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        _delete_photo_files(saved)
+        raise error
+
+
 def _cleanup_expired_upload_sessions():
     """Delete upload sessions and temp uploads older than expiry"""
     cutoff = datetime.utcnow() - timedelta(minutes=UPLOAD_SESSION_EXPIRY_MINUTES)
     temp_folder = app.config['TEMP_UPLOAD_FOLDER']
-    expired = UploadSession.query.filter(UploadSession.created_at < cutoff).all()
-    for s in expired:
-        for t in TempUpload.query.filter_by(session_token=s.session_token).all():
-            fp = os.path.join(temp_folder, t.filename)
-            if os.path.exists(fp):
-                try:
-                    os.remove(fp)
-                except OSError:
-                    pass
-        db.session.delete(s)
+    # One outer join for every expired session's uploads instead of a query per session
+    rows = db.session.query(UploadSession.session_token, TempUpload.filename).outerjoin(
+        TempUpload, TempUpload.session_token == UploadSession.session_token
+    ).filter(UploadSession.created_at < cutoff).all()
+    tokens = {r.session_token for r in rows}
+    _remove_files([os.path.join(temp_folder, r.filename) for r in rows if r.filename])
+    if tokens:
+        TempUpload.query.filter(TempUpload.session_token.in_(tokens)).delete(synchronize_session=False)
+        UploadSession.query.filter(UploadSession.session_token.in_(tokens)).delete(synchronize_session=False)
     TempUpload.query.filter(TempUpload.created_at < cutoff).delete(synchronize_session=False)
     db.session.commit()
     # Clean up draft_temp_ files older than 7 days (not tracked in DB)
@@ -2546,10 +3162,22 @@ def _cleanup_expired_upload_sessions():
                     pass
 
 
+def _flatten_to_rgb(img):
+    """RGB copy of an upload for JPEG output; only images with alpha are composited onto white."""
+    from PIL import Image
+    if img.mode in ("LA", "RGBA", "PA") or "transparency" in img.info:
+        rgba = img.convert("RGBA")
+        bg = Image.new("RGB", rgba.size, (255, 255, 255))
+        bg.paste(rgba, (0, 0), rgba)
+        return bg
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
 @app.route('/api/photos/stage', methods=['POST'])
 @login_required
 def stage_draft_photos():
     """Stage photos for a draft — converts File objects to server-side temp files so they can survive localStorage serialization."""
+    from PIL import Image, ImageOps
     files = request.files.getlist('photos')
     if not files:
         return jsonify({'success': False, 'error': 'No files provided'}), 400
@@ -2566,13 +3194,11 @@ def stage_draft_photos():
         try:
             img = Image.open(file)
             img = ImageOps.exif_transpose(img)
-            img = img.convert("RGBA")
-            bg = Image.new("RGB", img.size, (255, 255, 255))
-            bg.paste(img, (0, 0), img)
+            bg = _flatten_to_rgb(img)
             if bg.width > 2000 or bg.height > 2000:
                 ratio = 2000 / max(bg.width, bg.height)
                 bg = bg.resize((int(bg.width * ratio), int(bg.height * ratio)), Image.Resampling.LANCZOS)
-            bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+            bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
         except Exception as e:
             logger.error(f"Draft photo stage error: {e}", exc_info=True)
             return jsonify({'success': False, 'error': 'Error processing image'}), 500
@@ -2583,12 +3209,53 @@ def stage_draft_photos():
     return jsonify({'success': True, 'photos': result})
 
 
+_QR_PNG_PALETTE = bytes([0xFF, 0xFF, 0xFF, 0x1A, 0x3D, 0x1A])  # white, Campus Swap dark green
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def _qr_png_bytes(data, box_size=8, border=2):
+    """Render `data` as a dark-green-on-white QR code PNG.
+
+    The URL embeds a fresh token every time, so the PNG can't be cached; instead the slow
+    parts of qrcode's default path are skipped. A fixed mask pattern avoids scoring all
+    eight masks, and the module matrix is written straight out as a 1-bit palette PNG —
+    each scaled row is packed once and repeated box_size times — so neither the PIL image
+    factory nor Pillow itself is involved.
+
+    PNG is kept over SVG on purpose: as a 2-colour palette image the upload QR encodes to
+    ~400 bytes, while an equivalent path-per-run SVG is ~4KB.
+    """
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, border=border, mask_pattern=0)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    size = len(matrix) * box_size
+    row_bytes = (size + 7) // 8
+    pad = row_bytes * 8 - size
+    scanlines = []
+    for row in matrix:
+        bits = ''.join(('1' if cell else '0') * box_size for cell in row)
+        scanlines.append((b'\x00' + (int(bits, 2) << pad).to_bytes(row_bytes, 'big')) * box_size)
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 1, 3, 0, 0, 0)),
+        _png_chunk(b'PLTE', _QR_PNG_PALETTE),
+        _png_chunk(b'IDAT', zlib.compress(b''.join(scanlines))),
+        _png_chunk(b'IEND', b''),
+    ))
+
+
+# QR rendering is handed to a worker so it overlaps the UploadSession INSERT/commit
+# (the DB round-trip releases the GIL) instead of running after it.
+_qr_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='qr')
+
+
 @app.route('/api/upload_session/create', methods=['POST'])
 def create_upload_session():
     """Create a session for QR code mobile photo upload. Returns token and QR code image. Guests get user_id=None."""
-    import base64
-    import qrcode
-
     _cleanup_expired_upload_sessions()
 
     token = secrets.token_urlsafe(16)
@@ -2605,6 +3272,8 @@ def create_upload_session():
         except Exception:
             pass
 
+    qr_png = _qr_executor.submit(_qr_png_bytes, upload_url)
+
     user_id = current_user.id if current_user.is_authenticated else None
     session_obj = UploadSession(session_token=token, user_id=user_id)
     db.session.add(session_obj)
@@ -2613,13 +3282,7 @@ def create_upload_session():
     if not current_user.is_authenticated:
         session['guest_upload_token'] = token
 
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=8, border=2)
-    qr.add_data(upload_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="#1A3D1A", back_color="#fff")
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    qr_base64 = base64.b64encode(buf.getvalue()).decode()
+    qr_base64 = base64.b64encode(qr_png.result()).decode()
 
     return jsonify({
         'token': token,
@@ -2634,6 +3297,7 @@ def create_upload_session():
 def api_photo_upload_temp():
     """AJAX photo upload for onboarding file input — no QR token needed, auth via session.
     Uploads immediately when the user selects a file so the final form submit carries no raw photo data."""
+    from PIL import Image, ImageOps
     file = request.files.get('photo')
     if not file or not file.filename:
         return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -2650,15 +3314,12 @@ def api_photo_upload_temp():
         db.session.add(session_obj)
         db.session.commit()
     token = session_obj.session_token
-    safe_token = token.replace('/', '_').replace('+', '-')[:32]
-    filename = f"temp_{safe_token}_{int(time.time())}_{secrets.token_hex(4)}.jpg"
+    filename = f"temp_{_uuid7_hex()}.jpg"
     try:
         from io import BytesIO as _BytesIO
         img = Image.open(file)
         img = ImageOps.exif_transpose(img)
-        img = img.convert("RGBA")
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        bg.paste(img, (0, 0), img)
+        bg = _flatten_to_rgb(img)
         if bg.width > 2000 or bg.height > 2000:
             if bg.width > bg.height:
                 bg = bg.resize((2000, int(bg.height * 2000 / bg.width)), Image.Resampling.LANCZOS)
@@ -2666,12 +3327,12 @@ def api_photo_upload_temp():
                 bg = bg.resize((int(bg.width * 2000 / bg.height), 2000), Image.Resampling.LANCZOS)
         if photo_storage.is_s3():
             buf = _BytesIO()
-            bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+            bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
             photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
             photo_url = photo_storage.get_photo_url(filename)
         else:
             save_path = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], filename)
-            bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+            bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
             photo_url = url_for('uploaded_file', filename=filename, _external=True)
     except Exception as e:
         logger.error(f"Error processing direct photo upload: {e}", exc_info=True)
@@ -2694,10 +3355,52 @@ def upload_from_phone():
     return render_template('upload_from_phone.html', token=token)
 
 
+def _save_phone_photo(file, filename):
+    """Normalise one phone photo to a <=2000px RGB JPEG, store it and return its URL."""
+    from PIL import Image, ImageOps
+    max_dimension = 2000
+    img = Image.open(file)
+    if img.format == "JPEG" and max(img.size) > max_dimension:
+        # Let libjpeg scale by 1/2, 1/4 or 1/8 in the DCT domain instead of decoding every pixel
+        scale = max_dimension / max(img.size)
+        img.draft("RGB", (int(img.width * scale), int(img.height * scale)))
+    img = ImageOps.exif_transpose(img)
+    # Only transparent uploads (PNG/WebP/GIF) need compositing onto white; photos go straight to RGB
+    has_alpha = img.mode in ("LA", "RGBA", "PA") or "transparency" in img.info
+    if has_alpha:
+        img = img.convert("RGBA")
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    # Downscale before flattening so the alpha composite runs on <=2000px, not the full 12MP frame
+    if img.width > max_dimension or img.height > max_dimension:
+        if img.width > img.height:
+            new_width = max_dimension
+            new_height = int(img.height * (max_dimension / img.width))
+        else:
+            new_height = max_dimension
+            new_width = int(img.width * (max_dimension / img.height))
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    if has_alpha:
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        bg.paste(img, (0, 0), img)
+    else:
+        bg = img
+    if photo_storage.is_s3():
+        # Upload directly to S3 — avoids a second upload at final form submit
+        buf = BytesIO()
+        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+        photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
+        return photo_storage.get_photo_url(filename)
+    save_path = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], filename)
+    bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    return url_for('uploaded_file', filename=filename, _external=True)
+
+
 @app.route('/upload_from_phone', methods=['POST'])
 @csrf.exempt  # Phone has no session; token in URL authenticates
 def upload_from_phone_post():
-    """Accept photo upload from phone."""
+    """Accept photo upload from phone. Several `photo` parts may come in one POST; they are
+    recorded with a single multi-row INSERT and one commit instead of a transaction each."""
     token = request.form.get('token') or request.args.get('token', '')
     session_obj = UploadSession.query.filter_by(session_token=token).first()
     if not session_obj:
@@ -2705,54 +3408,35 @@ def upload_from_phone_post():
     if datetime.utcnow() - session_obj.created_at > timedelta(minutes=UPLOAD_SESSION_EXPIRY_MINUTES):
         return jsonify({'success': False, 'error': 'Session expired'}), 400
 
-    file = request.files.get('photo')
-    if not file or not file.filename:
-        return jsonify({'success': False, 'error': 'No file provided'}), 400
-
-    is_valid, error_msg = validate_file_upload(file)
-    if not is_valid:
-        return jsonify({'success': False, 'error': error_msg}), 400
-
-    safe_token = token.replace('/', '_').replace('+', '-')[:32]
-    filename = f"temp_{safe_token}_{int(time.time())}_{secrets.token_hex(4)}.jpg"
-    try:
-        from io import BytesIO as _BytesIO
-        img = Image.open(file)
-        img = ImageOps.exif_transpose(img)
-        img = img.convert("RGBA")
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        bg.paste(img, (0, 0), img)
-        max_dimension = 2000
-        if bg.width > max_dimension or bg.height > max_dimension:
-            if bg.width > bg.height:
-                new_width = max_dimension
-                new_height = int(bg.height * (max_dimension / bg.width))
-            else:
-                new_height = max_dimension
-                new_width = int(bg.width * (max_dimension / bg.height))
-            bg = bg.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        if photo_storage.is_s3():
-            # Upload directly to S3 — avoids a second upload at final form submit
-            buf = _BytesIO()
-            bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True)
-            photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
-            photo_url = photo_storage.get_photo_url(filename)
-        else:
-            save_path = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], filename)
-            bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True)
-            photo_url = url_for('uploaded_file', filename=filename, _external=True)
+    files = [f for f in request.files.getlist('photo') if f and f.filename]
+    if not files:
+        return jsonify({'success': False, 'error': 'No file provided'}), 400
+
+    for file in files:
+        is_valid, error_msg = validate_file_upload(file)
+        if not is_valid:
+            return jsonify({'success': False, 'error': error_msg}), 400
+
+    saved = []
+    try:
+        for file in files:
+            filename = f"temp_{_uuid7_hex()}.jpg"
+            saved.append({'filename': filename, 'url': _save_phone_photo(file, filename)})
     except Exception as e:
         logger.error(f"Error processing mobile upload: {e}", exc_info=True)
         return jsonify({'success': False, 'error': 'Error processing image'}), 500
 
-    temp = TempUpload(session_token=token, filename=filename)
-    db.session.add(temp)
+    db.session.execute(db.insert(TempUpload), [
+        {'session_token': token, 'filename': entry['filename']} for entry in saved
+    ])
     db.session.commit()
 
+    # filename/url describe the first photo, as single-photo clients expect
     return jsonify({
         'success': True,
-        'filename': filename,
-        'url': photo_url,
+        'filename': saved[0]['filename'],
+        'url': saved[0]['url'],
+        'files': saved,
     })
 
 
@@ -2777,8 +3461,7 @@ def upload_video_from_phone_post():
 
     safe_name = secure_filename(file.filename)
     ext = safe_name.rsplit('.', 1)[1].lower() if '.' in safe_name else 'mp4'
-    safe_token = token.replace('/', '_').replace('+', '-')[:32]
-    filename = f"temp_video_{safe_token}_{int(time.time())}_{secrets.token_hex(4)}.{ext}"
+    filename = f"temp_video_{_uuid7_hex()}.{ext}"
     save_path = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], filename)
     try:
         file.seek(0)
@@ -2818,11 +3501,12 @@ def upload_session_status():
         return jsonify({'images': [], 'error': 'Session expired'}), 400
 
     uploads = TempUpload.query.filter_by(session_token=token).order_by(TempUpload.created_at).all()
-    base_url = request.url_root.rstrip('/')
+    # Build the external /uploads/ prefix once; temp filenames are URL-safe, so no per-name url_for
+    url_prefix = url_for('uploaded_file', filename='_', _external=True)[:-1]
     images = []
     videos = []
     for u in uploads:
-        entry = {'filename': u.filename, 'url': url_for('uploaded_file', filename=u.filename, _external=True)}
+        entry = {'filename': u.filename, 'url': url_prefix + u.filename}
         if u.filename.startswith('temp_video_'):
             videos.append(entry)
         else:
@@ -3019,7 +3703,7 @@ def checkout_delivery():
         flash("Some items are no longer available. Please review your cart.", "error")
         return redirect(url_for('cart_view'))
 
-    gmaps_key = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+    gmaps_key = GOOGLE_MAPS_API_KEY
 
     # Warehouse origin + delivery radius — passed to the template so the client can verify
     # an address is in range BEFORE confirming it, and reused below for the server-side calc.
@@ -3331,16 +4015,14 @@ def buy_item(item_id):
         flash("The store isn't live yet. Check back on " + store_open_date() + ".", "info")
         return redirect(url_for('product_detail', item_id=item_id))
     try:
-        # Use pessimistic locking to prevent race conditions
-        item = InventoryItem.query.with_for_update().filter_by(id=item_id).first()
+        # Read-only check: nothing is written here, and the webhook's conditional UPDATE
+        # decides the race if two buyers pay for the same item
+        item = db.session.get(InventoryItem, item_id)
 
         if not item:
             logger.warning(f"Item {item_id} not found")
-            from flask import abort
-            # Let 404 propagate - don't catch it in the exception handler
-            raise abort(404)
+            abort(404)
 
-        # Double-check status with lock
         if item.status != 'available':
             logger.info(f"Item {item_id} not available (status: {item.status})")
             flash("Sorry! This item is no longer available.", "error")
@@ -3379,15 +4061,19 @@ def buy_item(item_id):
         logger.info(f"Checkout session created for item {item_id}")
         return redirect(checkout_session.url, code=303)
         
+    except NotFound:
+        raise
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error in buy_item: {e}")
         flash("Payment processing error. Please try again.", "error")
         return redirect(url_for('product_detail', item_id=item_id))
+    except SQLAlchemyError as e:
+        # Leave the scoped session usable for the redirect target and later requests
+        db.session.rollback()
+        logger.error(f"Database error in buy_item: {e}", exc_info=True)
+        flash("An error occurred. Please try again.", "error")
+        return redirect(url_for('inventory'))
     except Exception as e:
-        # Don't catch 404 errors - let them propagate
-        from werkzeug.exceptions import NotFound
-        if isinstance(e, NotFound):
-            raise
         logger.error(f"Unexpected error in buy_item: {e}", exc_info=True)
         flash("An error occurred. Please try again.", "error")
         return redirect(url_for('inventory'))
@@ -3435,6 +4121,87 @@ def item_sold_success():
 # SECTION 3: STRIPE WEBHOOK (CORE LOGIC)
 # =========================================================
 
+def _release_paid_pickup_items(item_ids, seller_id, pickup_week, online_only=False):
+    """Put a seller's paid-for pending_logistics items live and add them to category stock.
+
+    One UPDATE ... RETURNING flips every matching item, then one UPDATE per distinct category
+    bumps count_in_stock, instead of a get() and an attribute write per item. Items that are
+    missing, belong to someone else or were already released are skipped by the WHERE clause,
+    so the webhook and the success page can both run without double-counting. Returns the ids
+    that were released. The caller commits.
+    """
+    if not item_ids:
+        return []
+    conditions = [
+        InventoryItem.id.in_(item_ids),
+        InventoryItem.seller_id == seller_id,
+        InventoryItem.status == 'pending_logistics',
+    ]
+    if online_only:
+        conditions.append(InventoryItem.collection_method == 'online')
+    rows = db.session.execute(
+        db.update(InventoryItem)
+        .where(*conditions)
+        .values(status='available', pickup_week=pickup_week)
+        .returning(InventoryItem.id, InventoryItem.category_id)
+    ).all()
+    bumps = Counter(r.category_id for r in rows if r.category_id is not None)
+    for category_id, n in bumps.items():
+        db.session.execute(
+            db.update(InventoryCategory)
+            .where(InventoryCategory.id == category_id)
+            .values(count_in_stock=func.coalesce(InventoryCategory.count_in_stock, 0) + n)
+        )
+    if rows:
+        _mark_shop_pages_stale()
+        _admin_stats_cache["stats"] = None
+    return [r.id for r in rows]
+
+
+def _bump_category_count(category_id, delta):
+    """Add delta to a category's count_in_stock with one UPDATE instead of a read-modify-write.
+
+    The database does the arithmetic, so concurrent admin actions can't overwrite each
+    other's change. Decrements stop at 0 and a NULL count is treated as 0. The caller commits.
+    """
+    if category_id is None or not delta:
+        return
+    new_count = func.coalesce(InventoryCategory.count_in_stock, 0) + delta
+    if delta < 0:
+        new_count = case((new_count < 0, 0), else_=new_count)
+    db.session.execute(
+        db.update(InventoryCategory)
+        .where(InventoryCategory.id == category_id)
+        .values(count_in_stock=new_count)
+    )
+
+
+def _claim_item_for_sale(item_id):
+    """Mark an available item sold and take it out of its category's stock count.
+
+    The status check lives in the UPDATE's WHERE clause, so two webhooks racing for the
+    same item resolve in the database: exactly one gets the row back, the other gets
+    nothing and handles it as a double sale. Returns True if this caller won. The caller
+    commits.
+
+    item_id is coerced to int so the ORM can apply the change to an already-loaded
+    InventoryItem in the session (sessions here don't expire on commit).
+    """
+    row = db.session.execute(
+        db.update(InventoryItem)
+        .where(InventoryItem.id == int(item_id), InventoryItem.status == 'available')
+        .values(status='sold', sold_at=datetime.utcnow())
+        .returning(InventoryItem.category_id)
+    ).first()
+    if row is None:
+        return False
+    _bump_category_count(row.category_id, -1)
+    # Bulk UPDATEs skip the mapper events that normally drop cached shop pages
+    _mark_shop_pages_stale()
+    _admin_stats_cache["stats"] = None
+    return True
+
+
 @app.route('/webhook', methods=['POST'])
 @csrf.exempt  # Stripe sends raw POST; no CSRF token in webhook payload
 def webhook():
@@ -3484,11 +4251,12 @@ def webhook():
                 item_ids = [int(x.strip()) for x in item_ids_str.split(',') if x.strip()]
                 sold_items = []
                 for item_id in item_ids:
-                    item = InventoryItem.query.with_for_update().filter_by(id=item_id).first()
+                    claimed = _claim_item_for_sale(item_id)
+                    item = db.session.get(InventoryItem, item_id)
                     if not item:
                         logger.error(f"WEBHOOK cart_order: item {item_id} not found")
                         continue
-                    if item.status != 'available':
+                    if not claimed:
                         # Double-sale guard
                         logger.error(
                             f"WEBHOOK DOUBLE-SALE (cart_order): item {item_id} status='{item.status}', "
@@ -3509,12 +4277,6 @@ def webhook():
                             logger.error(f"WEBHOOK: Failed to create double-sale alert: {ae}")
                         continue
 
-                    # Mark sold
-                    item.status = 'sold'
-                    item.sold_at = datetime.utcnow()
-                    if item.category and item.category.count_in_stock > 0:
-                        item.category.count_in_stock -= 1
-
                     # Create BuyerOrder line
                     per_item_tax = compute_sales_tax(item.price)
                     addr_str = f"{order.delivery_street}, {order.delivery_city}, {order.delivery_state} {order.delivery_zip}".strip(', ')
@@ -3588,17 +4350,15 @@ def webhook():
             if existing_order:
                 logger.info(f"WEBHOOK: session {stripe_session_id} already processed (idempotent no-op)")
             else:
-                # Use pessimistic locking to prevent race conditions
-                item = InventoryItem.query.with_for_update().filter_by(id=item_id).first()
+                # Conditional UPDATE claims the item atomically — no row lock held across Python code
+                claimed = _claim_item_for_sale(item_id)
+                if claimed:
+                    db.session.commit()
+                item = db.session.get(InventoryItem, item_id)
 
                 if item:
-                    if item.status == 'available':
-                        # 1. Mark item sold
-                        item.status = 'sold'
-                        item.sold_at = datetime.utcnow()
-                        if item.category and item.category.count_in_stock > 0:
-                            item.category.count_in_stock -= 1
-                        db.session.commit()
+                    if claimed:
+                        # 1. Item marked sold by the claim above
                         posthog.capture('item_sold', distinct_id=str(item.seller_id), properties={
                             'item_id': item.id,
                             'category': item.category.name if item.category else None,
@@ -3673,13 +4433,7 @@ def webhook():
             user_id = session.get('metadata', {}).get('user_id')
             if item_ids_str and pickup_week and user_id:
                 item_ids = [int(x.strip()) for x in item_ids_str.split(',') if x.strip()]
-                for item_id in item_ids:
-                    item = InventoryItem.query.get(item_id)
-                    if item and item.seller_id == int(user_id) and item.status == 'pending_logistics' and item.collection_method == 'online':
-                        item.pickup_week = pickup_week
-                        item.status = 'available'
-                        if item.category:
-                            item.category.count_in_stock = (item.category.count_in_stock or 0) + 1
+                _release_paid_pickup_items(item_ids, int(user_id), pickup_week, online_only=True)
                 user = User.query.get(user_id)
                 if user:
                     user.has_paid = True
@@ -3713,7 +4467,7 @@ def webhook():
                             <p style="margin: 0 0 8px;"><strong>What happens next:</strong></p>
                             <p style="margin: 0;">We will come to your listed address during move-out week to pick your item up. More information about exact pickup logistics will follow.</p>
                         </div>
-                        <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
+                        <p><a href="{_dashboard_url()}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
                         <p>Thanks for joining Campus Swap!</p>
                     </div>
                     """
@@ -3759,6 +4513,120 @@ def shop_notify_signup():
     return redirect(url_for('inventory'))
 
 
+_admin_stats_cache = {"stats": None, "built_at": None}  # per-process; see _admin_stats()
+ADMIN_STATS_CACHE_TTL = 60  # seconds; bounds staleness for bulk updates and other workers' writes
+
+
+@event.listens_for(InventoryItem, 'after_insert')
+@event.listens_for(InventoryItem, 'after_update')
+@event.listens_for(InventoryItem, 'after_delete')
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_delete')
+def _invalidate_admin_stats_cache(mapper, connection, target):
+    _admin_stats_cache["stats"] = None
+
+
+def _admin_stats():
+    """User and item counts for the admin dashboard header, cached for ADMIN_STATS_CACHE_TTL."""
+    now = time.monotonic()
+    if (_admin_stats_cache["stats"] is not None
+            and now - _admin_stats_cache["built_at"] < ADMIN_STATS_CACHE_TTL):
+        return _admin_stats_cache["stats"]
+    # One grouped scan for every item stat; quick-capture split kept for the pending count
+    status_counts = db.session.query(
+        InventoryItem.status, InventoryItem.is_quick_capture, func.count()
+    ).group_by(InventoryItem.status, InventoryItem.is_quick_capture).all()
+    stats = {
+        'total_users': User.query.count(),
+        'total_items': sum(n for status, _, n in status_counts if status not in (None, 'rejected')),
+        'sold_items': sum(n for status, _, n in status_counts if status == 'sold'),
+        'pending_items_count': sum(
+            n for status, quick, n in status_counts if status == 'pending_valuation' and not quick
+        ),
+        'available_items': sum(n for status, _, n in status_counts if status == 'available'),
+    }
+    _admin_stats_cache["stats"] = stats
+    _admin_stats_cache["built_at"] = now
+    return stats
+
+
+# Description and draft text the admin gallery cards don't render; same idea as
+# _SHOP_CARD_DEFERRED. The pending queue shows them, so only the gallery defers.
+_ADMIN_GALLERY_DEFERRED = tuple(defer(col) for col in (
+    InventoryItem.long_description,
+    InventoryItem.ai_description,
+    InventoryItem.ai_long_description,
+    InventoryItem.seller_description,
+    InventoryItem.seller_long_description,
+))
+
+
+def _admin_pending_query():
+    """Pending-valuation items for the admin queue, oldest first, with category and seller.
+
+    selectinload for list queries: a handful of sellers/categories repeat across hundreds of
+    rows, so one IN query each beats LEFT JOINing the wide User row onto every item.
+    """
+    return InventoryItem.query.options(
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.seller)
+    ).filter(InventoryItem.status == 'pending_valuation').order_by(InventoryItem.date_added.asc())
+
+
+def _admin_gallery_query():
+    """Live and sold items for the admin gallery, newest first, with category and seller."""
+    return InventoryItem.query.options(
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.seller),
+        *_ADMIN_GALLERY_DEFERRED
+    ).filter(
+        InventoryItem.status != 'pending_valuation',
+        InventoryItem.status != 'rejected'
+    ).order_by(InventoryItem.date_added.desc(), InventoryItem.id.desc())
+
+
+def _delete_item_and_photo_rows(item):
+    """Delete an item and its ItemPhoto rows; return the photo keys to remove once committed.
+
+    The photo keys come from one column SELECT and the rows go in one DELETE, rather than
+    lazy-loading gallery_photos and letting the cascade issue a DELETE per photo.
+    """
+    keys = db.session.scalars(db.select(ItemPhoto.photo_url).where(ItemPhoto.item_id == item.id)).all()
+    db.session.execute(
+        db.delete(ItemPhoto).where(ItemPhoto.item_id == item.id),
+        execution_options={'synchronize_session': False},
+    )
+    # The rows are gone; tell the ORM the collection is empty so the delete-orphan cascade
+    # doesn't SELECT it again just to find nothing
+    set_committed_value(item, 'gallery_photos', [])
+    if item.photo_url:
+        keys.append(item.photo_url)
+    keys = list(dict.fromkeys(k for k in keys if k))
+    if keys:
+        # Stock-group clones share the original's files; keep any key another row still uses
+        still_used = set(db.session.scalars(
+            db.select(InventoryItem.photo_url).where(
+                InventoryItem.id != item.id, InventoryItem.photo_url.in_(keys)
+            ).union(
+                db.select(ItemPhoto.photo_url).where(
+                    ItemPhoto.item_id != item.id, ItemPhoto.photo_url.in_(keys)
+                )
+            )
+        ))
+        keys = [k for k in keys if k not in still_used]
+    db.session.delete(item)
+    return keys
+
+
+def _delete_photo_files(keys):
+    """Remove stored photo files; a missing or undeletable file is logged, never fatal."""
+    for key in keys:
+        try:
+            photo_storage.delete_photo(key)
+        except Exception as e:
+            logger.error(f"Error deleting photo file {key}: {e}", exc_info=True)
+
+
 # =========================================================
 # SECTION 4: ADMIN ROUTES
 # =========================================================
@@ -3812,16 +4680,21 @@ def admin_panel():
             flash("Category counts require super admin access.", "error")
             return redirect(url_for('admin_panel') + '#categories')
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-        updated = 0
+        counts = {}
         for key, value in request.form.items():
             if key.startswith('counts_'):
                 try:
-                    cat_id = int(key.split('_')[1])
-                    cat = InventoryCategory.query.get(cat_id)
-                    if cat: 
-                        cat.count_in_stock = int(value)
-                        updated += 1
+                    counts[int(key.split('_')[1])] = int(value)
                 except ValueError: pass
+        # One executemany UPDATE keyed by primary key; unknown ids are dropped first
+        # since a by-pk bulk update expects every row to match.
+        existing_ids = set(db.session.scalars(
+            db.select(InventoryCategory.id).where(InventoryCategory.id.in_(counts))
+        )) if counts else set()
+        rows = [{'id': cid, 'count_in_stock': n} for cid, n in counts.items() if cid in existing_ids]
+        if rows:
+            db.session.execute(db.update(InventoryCategory), rows)
+        updated = len(rows)
         db.session.commit()
         if is_ajax:
             return jsonify({'success': True, 'message': f"Updated {updated} categor{'y' if updated == 1 else 'ies'}."})
@@ -3878,7 +4751,8 @@ def admin_panel():
             db.session.add(new_item)
             db.session.flush()
             
-            cover_set = False
+            uploads = []
+            photo_prefix = f"item_{new_item.id}_{int(time.time())}_{secrets.token_hex(4)}"
             for i, file in enumerate(files):
                 if file.filename:
                     # Validate file upload
@@ -3887,20 +4761,22 @@ def admin_panel():
                         db.session.rollback()
                         flash(f"File upload error: {error_msg}", "error")
                         return redirect(url_for('admin_panel') + '#add-item')
-                    
-                    filename = f"item_{new_item.id}_{int(time.time())}_{i}.jpg"
-                    try:
-                        photo_storage.save_photo(file, filename)
-                        if not cover_set:
-                            new_item.photo_url = filename
-                            cover_set = True
-                        db.session.add(ItemPhoto(item_id=new_item.id, photo_url=filename))
-                    except Exception as img_error:
-                        db.session.rollback()
-                        logger.error(f"Error processing image: {img_error}", exc_info=True)
-                        flash("Error processing image. Please try again.", "error")
-                        return redirect(url_for('admin_panel') + '#add-item')
+                    uploads.append((file, f"{photo_prefix}_{i}.jpg"))
+            try:
+                _save_photos(uploads)
+            except Exception as img_error:
+                db.session.rollback()
+                logger.error(f"Error processing image: {img_error}", exc_info=True)
+                flash("Error processing image. Please try again.", "error")
+                return redirect(url_for('admin_panel') + '#add-item')
+            photo_filenames = [filename for _, filename in uploads]
             
+            # First photo is the cover; all gallery rows go in one executemany INSERT
+            if photo_filenames:
+                new_item.photo_url = photo_filenames[0]
+                db.session.execute(db.insert(ItemPhoto), [
+                    {'item_id': new_item.id, 'photo_url': filename} for filename in photo_filenames
+                ])
             # Don't increment count_in_stock yet - item is pending, not available
             db.session.commit()
             flash(f"Item '{desc}' added to pending items. Set price to approve.", "success")
@@ -3909,11 +4785,36 @@ def admin_panel():
     if request.method == 'POST' and 'bulk_update_items' in request.form:
         logger.info("ADMIN: Entering bulk_update_items handler")
         updated_count = 0
+        approval_emails = []  # sent only once the commit below succeeds
+
+        # One pass over the form: {item_id: {'price': ..., 'quality': ..., 'category': ...}}
+        from collections import defaultdict
+        per_item = defaultdict(dict)
         for key, value in request.form.items():
-            if key.startswith('price_'):
+            prefix, _, suffix = key.rpartition('_')
+            if prefix and suffix.isdigit():
+                per_item[int(suffix)][prefix] = value
+
+        # Load every submitted item (with seller for the approval email) up front,
+        # so the loop below does dict lookups only.
+        bulk_item_ids = {item_id for item_id, row in per_item.items() if 'price' in row}
+        if not bulk_item_ids:
+            # Nothing to update: skip the queries and the empty commit
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({'success': True, 'message': "No changes."})
+            flash("No changes.", "info")
+            return redirect(url_for('admin_panel'))
+        items_by_id = {i.id: i for i in InventoryItem.query.options(
+            joinedload(InventoryItem.seller)
+        ).filter(InventoryItem.id.in_(bulk_item_ids)).all()}
+        # Net stock change per category from moved available items, applied once after the loop
+        count_moves = Counter()
+
+        for item_id, row in per_item.items():
+            if 'price' in row:
+                key, value = f"price_{item_id}", row['price']
                 try:
-                    item_id = int(key.split('_')[1])
-                    item = InventoryItem.query.get(item_id)
+                    item = items_by_id.get(item_id)
                     if item:
                         # Validate price if provided
                         if value and value.strip():
@@ -3931,29 +4832,11 @@ def admin_panel():
                             # Send email: item approved, confirm pickup
                             if item.seller and item.seller.email:
                                 try:
-                                    fee_text = ""
-                                    if item.collection_method == 'online':
-                                        fee = SERVICE_FEE_CENTS // 100
-                                        fee_text = f" Confirm your pickup week and pay ${fee} to secure your spot."
-                                    elif item.collection_method == 'free':
-                                        fee_text = " Add your address and select a pickup window in your dashboard—no payment required."
-                                    email_content = f"""
-                                    <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
-                                        <h2 style="color: #166534;">Your Item Has Been Approved!</h2>
-                                        <p>Great news! Your item <strong>{item.description}</strong> has been approved.</p>
-                                        <div style="background: #f0fdf4; border: 1px solid #bbf7d0; border-radius: 8px; padding: 16px; margin: 20px 0;">
-                                            <p style="margin: 0 0 8px;"><strong>Price:</strong> ${new_price:.2f}</p>
-                                            <p style="margin: 0;">Next step:{fee_text}</p>
-                                        </div>
-                                        <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
-                                        <p>Thanks for selling with Campus Swap!</p>
-                                    </div>
-                                    """
-                                    send_email(
+                                    approval_emails.append((
                                         item.seller.email,
                                         "Your Item Has Been Approved - Campus Swap",
-                                        email_content
-                                    )
+                                        _item_approved_email_html(item, new_price)
+                                    ))
                                 except Exception as email_error:
                                     logger.error(f"Failed to send item approved email: {email_error}")
                         
@@ -3964,20 +4847,18 @@ def admin_panel():
                         updated_count += 1
                         
                         # Quality & Category Updates
-                        if f"quality_{item_id}" in request.form:
-                            quality_valid, quality_value = validate_quality(request.form[f"quality_{item_id}"])
+                        if 'quality' in row:
+                            quality_valid, quality_value = validate_quality(row['quality'])
                             if quality_valid:
                                 item.quality = quality_value
                             else:
                                 flash(f"Invalid quality for item {item_id}: {quality_value}", "error")
-                        if f"category_{item_id}" in request.form:
+                        if 'category' in row:
                             try:
-                                new_cat_id = int(request.form[f"category_{item_id}"])
+                                new_cat_id = int(row['category'])
                                 if item.category_id != new_cat_id and item.status == 'available':
-                                    old_cat = InventoryCategory.query.get(item.category_id)
-                                    new_cat = InventoryCategory.query.get(new_cat_id)
-                                    if old_cat: old_cat.count_in_stock -= 1
-                                    if new_cat: new_cat.count_in_stock += 1
+                                    count_moves[item.category_id] -= 1
+                                    count_moves[new_cat_id] += 1
                                 item.category_id = new_cat_id
                             except ValueError:
                                 pass
@@ -3986,13 +4867,15 @@ def admin_panel():
                     continue
                 except Exception as e:
                     logger.error(f"Unexpected error updating item {key}: {e}", exc_info=True)
-                    import traceback
-                    traceback.print_exc()
                     continue
         
         try:
             is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+            for cat_id, delta in count_moves.items():
+                _bump_category_count(cat_id, delta)
             db.session.commit()
+            for email_args in approval_emails:
+                queue_email(*email_args)
             result_msg = f"Updated {updated_count} item(s)." if updated_count > 0 else "Changes saved."
             logger.info(f"ADMIN: bulk_update committed, updated_count={updated_count}")
             if is_ajax:
@@ -4004,8 +4887,6 @@ def admin_panel():
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error committing bulk_update: {e}", exc_info=True)
-            import traceback
-            traceback.print_exc()
             if is_ajax:
                 return jsonify({'success': False, 'message': "Error updating items. Please try again."}), 500
             flash("Error updating items. Please try again.", "error")
@@ -4018,18 +4899,15 @@ def admin_panel():
             delete_val = request.form.get('delete_item')
             logger.info(f"ADMIN: delete_item in form, value={delete_val}")
             try:
-                item = InventoryItem.query.get(delete_val)
+                item = db.session.get(InventoryItem, delete_val)
                 if item:
                     item_desc = item.description
                     item_id = item.id
                     if item.status == 'available':
-                        cat = InventoryCategory.query.get(item.category_id)
-                        if cat and cat.count_in_stock > 0: cat.count_in_stock -= 1
-                    # Delete related ItemPhotos first (cascade handles it, but explicit delete is safer)
-                    for photo in item.gallery_photos[:]:
-                        db.session.delete(photo)
-                    db.session.delete(item)
+                        _bump_category_count(item.category_id, -1)
+                    photo_keys = _delete_item_and_photo_rows(item)
                     db.session.commit()
+                    _delete_photo_files(photo_keys)
                     logger.info(f"ADMIN: Deleted item {item_id}")
                     if is_ajax:
                         return jsonify({'success': True, 'message': f"Item '{item_desc}' deleted.", 'remove_row': True, 'item_id': item_id})
@@ -4044,17 +4922,16 @@ def admin_panel():
                 flash(f"Could not delete item: {str(e)}", "error")
         
         elif 'mark_sold' in request.form:
-            item = InventoryItem.query.get(request.form.get('mark_sold'))
+            item = db.session.get(InventoryItem, request.form.get('mark_sold'))
             if item and item.status == 'available':
                 item.status = "sold"
                 item.sold_at = datetime.utcnow()  # Track when it sold
-                cat = InventoryCategory.query.get(item.category_id)
-                if cat and cat.count_in_stock > 0: cat.count_in_stock -= 1
+                _bump_category_count(item.category_id, -1)
                 db.session.commit()
                 # Email seller (same as webhook - payout details)
                 if item.seller:
                     try:
-                        send_email(
+                        queue_email(
                             item.seller.email,
                             "Your Item Has Sold! - Campus Swap",
                             _item_sold_email_html(item, item.seller)
@@ -4066,7 +4943,7 @@ def admin_panel():
                 flash(f"Item '{item.description}' marked as sold.", "success")
         
         elif 'mark_payout_sent' in request.form:
-            item = InventoryItem.query.get(request.form.get('mark_payout_sent'))
+            item = db.session.get(InventoryItem, request.form.get('mark_payout_sent'))
             if item and item.status == 'sold':
                 item.payout_sent = True
                 db.session.commit()
@@ -4081,20 +4958,19 @@ def admin_panel():
                 return redirect(url_for('admin_panel') + '#gallery-items')
 
         elif 'mark_available' in request.form:
-            item = InventoryItem.query.get(request.form.get('mark_available'))
+            item = db.session.get(InventoryItem, request.form.get('mark_available'))
             if item and item.status == 'sold':
                 item.status = "available"
                 item.sold_at = None  # Reset sold timestamp
                 item.payout_sent = False  # Reset payout status
-                cat = InventoryCategory.query.get(item.category_id)
-                if cat: cat.count_in_stock += 1
+                _bump_category_count(item.category_id, 1)
                 db.session.commit()
                 if is_ajax:
                     return jsonify({'success': True, 'message': f"Item '{item.description}' marked as available.", 'reload': True})
                 flash(f"Item '{item.description}' marked as available.", "success")
 
         elif 'mark_picked_up' in request.form:
-            item = InventoryItem.query.get(request.form.get('mark_picked_up'))
+            item = db.session.get(InventoryItem, request.form.get('mark_picked_up'))
             if item:
                 item.picked_up_at = datetime.utcnow()
                 db.session.commit()
@@ -4103,7 +4979,7 @@ def admin_panel():
                 flash(f"'{item.description}' marked as picked up.", "success")
 
         elif 'mark_at_store' in request.form:
-            item = InventoryItem.query.get(request.form.get('mark_at_store'))
+            item = db.session.get(InventoryItem, request.form.get('mark_at_store'))
             if item:
                 item.arrived_at_store_at = datetime.utcnow()
                 db.session.commit()
@@ -4112,7 +4988,7 @@ def admin_panel():
                 flash(f"'{item.description}' marked as arrived at store.", "success")
 
         elif 'unmark_at_store' in request.form:
-            item = InventoryItem.query.get(request.form.get('unmark_at_store'))
+            item = db.session.get(InventoryItem, request.form.get('unmark_at_store'))
             if item:
                 item.arrived_at_store_at = None
                 db.session.commit()
@@ -4121,7 +4997,7 @@ def admin_panel():
                 flash(f"'{item.description}' unmarked from at store.", "success")
 
         elif 'unmark_picked_up' in request.form:
-            item = InventoryItem.query.get(request.form.get('unmark_picked_up'))
+            item = db.session.get(InventoryItem, request.form.get('unmark_picked_up'))
             if item:
                 item.picked_up_at = None
                 item.arrived_at_store_at = None  # Can't be at store if not picked up
@@ -4135,30 +5011,21 @@ def admin_panel():
     all_cats = InventoryCategory.query.filter_by(parent_id=None).order_by(InventoryCategory.id).all()
     
     # Filter: Show all pending items (no payment gate; charge at pickup)
-    pending_items = InventoryItem.query.options(
-        joinedload(InventoryItem.category),
-        joinedload(InventoryItem.seller)
-    ).filter(InventoryItem.status == 'pending_valuation').order_by(InventoryItem.date_added.asc()).all()
+    pending_items = _admin_pending_query().all()
     
-    gallery_items = InventoryItem.query.options(
-        joinedload(InventoryItem.category),
-        joinedload(InventoryItem.seller)
-    ).filter(
-        InventoryItem.status != 'pending_valuation',
-        InventoryItem.status != 'rejected'
-    ).order_by(InventoryItem.date_added.desc()).all()
+    # Unpaginated until admin.html renders page controls. Stays ORM instances rather than
+    # column tuples: cards go through item.category / item.seller.
+    gallery_items = _admin_gallery_query().all()
     
     pickup_period_active = get_pickup_period_active()
     
     # Calculate database stats
-    total_users = User.query.count()
-    total_items = InventoryItem.query.filter(InventoryItem.status != 'rejected').count()
-    sold_items = InventoryItem.query.filter_by(status='sold').count()
-    pending_items_count = InventoryItem.query.filter(
-        InventoryItem.status == 'pending_valuation',
-        InventoryItem.is_quick_capture == False,
-    ).count()
-    available_items = InventoryItem.query.filter_by(status='available').count()
+    stats = _admin_stats()
+    total_users = stats['total_users']
+    total_items = stats['total_items']
+    sold_items = stats['sold_items']
+    pending_items_count = stats['pending_items_count']
+    available_items = stats['available_items']
     
     # Free tier data for admin panel
     free_confirmed_ids_str = AppSetting.get('free_confirmed_user_ids') or ''
@@ -4180,7 +5047,7 @@ def admin_panel():
 
     free_tier_users = []
     for row in free_user_rows:
-        user = User.query.get(row.seller_id)
+        user = db.session.get(User, row.seller_id)
         if user:
             user_items = InventoryItem.query.filter_by(
                 seller_id=user.id, collection_method='free', status='pending_logistics'
@@ -4393,7 +5260,7 @@ def admin_approve():
                         <p style="margin: 0 0 8px;"><strong>Price:</strong> ${item.price:.2f}</p>
                         <p style="margin: 0;">Next step:{fee_text}</p>
                     </div>
-                    <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
+                    <p><a href="{_dashboard_url()}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
                     <p>Thanks for selling with Campus Swap!</p>
                 </div>
                 """
@@ -4423,8 +5290,8 @@ def admin_approve():
         sort_param = 'date'
 
     base_query = InventoryItem.query.options(
-        joinedload(InventoryItem.category),
-        joinedload(InventoryItem.seller)
+        selectinload(InventoryItem.category),
+        selectinload(InventoryItem.seller)
     ).filter(
         InventoryItem.status == 'pending_valuation',
         InventoryItem.is_quick_capture == False,
@@ -4599,7 +5466,7 @@ def admin_item_approval_detail(item_id):
     item = InventoryItem.query.options(
         joinedload(InventoryItem.category),
         joinedload(InventoryItem.seller),
-        joinedload(InventoryItem.gallery_photos),
+        selectinload(InventoryItem.gallery_photos),
     ).get_or_404(item_id)
     if item.status not in ('pending_valuation', 'needs_info'):
         abort(404)
@@ -4654,7 +5521,7 @@ def admin_approve_unified(item_id):
                     <p style="margin: 0 0 8px;"><strong>Price:</strong> ${item.price:.2f}</p>
                     <p style="margin: 0;">Next step:{fee_text}</p>
                 </div>
-                <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
+                <p><a href="{_dashboard_url()}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">Confirm in Dashboard</a></p>
                 <p>Thanks for selling with Campus Swap!</p>
             </div>
             """
@@ -4729,7 +5596,7 @@ def _gen_referral_code():
     import secrets as _secrets
     for _ in range(20):
         code = ''.join(_secrets.choice(_PROXY_CODE_CHARSET) for _ in range(8))
-        if not User.query.filter_by(referral_code=code).first():
+        if not _user_exists(referral_code=code):
             return code
     raise RuntimeError("Could not generate unique referral code")
 
@@ -4775,14 +5642,14 @@ def admin_create_proxy_seller():
     if email_raw:
         if not validate_email(email_raw):
             return jsonify({'success': False, 'message': 'Invalid email address.'}), 400
-        if User.query.filter_by(email=email_raw).first():
+        if _user_exists(email=email_raw):
             return jsonify({'success': False, 'message': 'An account with that email already exists.'}), 409
         email = email_raw
     else:
         digits = ''.join(c for c in phone_result if c.isdigit())
         email = f'proxy+{digits}@usecampusswap.com'
         # Ensure uniqueness on placeholder emails too
-        if User.query.filter_by(email=email).first():
+        if _user_exists(email=email):
             import secrets as _sec
             email = f'proxy+{digits}{_sec.token_hex(4)}@usecampusswap.com'
 
@@ -5171,7 +6038,7 @@ def admin_free_reject(user_id):
     if user.email:
         try:
             name = user.first_name or user.full_name
-            dashboard_url = url_for('dashboard', _external=True)
+            dashboard_url = _dashboard_url()
             email_content = f"""
             <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
                 <h2 style="color: #92400e;">Update on Your Free Plan Items</h2>
@@ -5224,7 +6091,7 @@ def admin_free_notify_all():
             continue
         try:
             name = user.first_name or user.full_name
-            dashboard_url = url_for('dashboard', _external=True)
+            dashboard_url = _dashboard_url()
             email_content = f"""
             <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
                 <h2 style="color: #92400e;">Our Warehouse Is at Capacity</h2>
@@ -5365,6 +6232,8 @@ def edit_item(item_id):
         # Handle new photo uploads
         new_photos = request.files.getlist('new_photos')
         if new_photos and new_photos[0].filename != '':
+            uploads = []
+            photo_prefix = f"item_{item.id}_{int(time.time())}_{secrets.token_hex(4)}"
             for i, file in enumerate(new_photos):
                 if file.filename:
                     # Validate file upload
@@ -5372,19 +6241,18 @@ def edit_item(item_id):
                     if not is_valid:
                         flash(f"File upload error: {error_msg}", "error")
                         return redirect(url_for('edit_item', item_id=item_id))
-                    
-                    filename = f"item_{item.id}_{int(time.time())}_{i}.jpg"
-                    try:
-                        photo_storage.save_photo(file, filename)
-                        # If no cover photo exists, set first new photo as cover
-                        if not item.photo_url:
-                            item.photo_url = filename
-                        
-                        db.session.add(ItemPhoto(item_id=item.id, photo_url=filename))
-                    except Exception as img_error:
-                        logger.error(f"Error processing image: {img_error}", exc_info=True)
-                        flash("Error processing image. Please try again.", "error")
-                        return redirect(url_for('edit_item', item_id=item_id))
+                    uploads.append((file, f"{photo_prefix}_{i}.jpg"))
+            try:
+                _save_photos(uploads)
+            except Exception as img_error:
+                logger.error(f"Error processing image: {img_error}", exc_info=True)
+                flash("Error processing image. Please try again.", "error")
+                return redirect(url_for('edit_item', item_id=item_id))
+            for _, filename in uploads:
+                # If no cover photo exists, set first new photo as cover
+                if not item.photo_url:
+                    item.photo_url = filename
+                db.session.add(ItemPhoto(item_id=item.id, photo_url=filename))
         
         # Handle video upload/replace
         new_video = request.files.get('new_video')
@@ -5491,8 +6359,6 @@ def set_password():
         except Exception as db_error:
             db.session.rollback()
             logger.error(f"Database error in set_password: {db_error}", exc_info=True)
-            import traceback
-            traceback.print_exc()
             flash("Error saving password. Please try again.", "error")
             return redirect(get_user_dashboard())
         
@@ -5500,7 +6366,7 @@ def set_password():
         try:
             # Build dashboard URL safely
             try:
-                dashboard_url = url_for('dashboard', _external=True)
+                dashboard_url = _dashboard_url()
             except Exception as url_error:
                 logger.warning(f"Error building dashboard URL: {url_error}")
                 # Fallback to relative URL
@@ -5509,9 +6375,7 @@ def set_password():
             # No email sent - user already sees confirmation on site
         except Exception as email_error:
             # Email failure is non-critical - log but don't crash
-            logger.warning(f"Email sending failed in set_password (non-critical): {email_error}")
-            import traceback
-            traceback.print_exc()
+            logger.warning(f"Email sending failed in set_password (non-critical): {email_error}", exc_info=True)
         
         flash("Account secured! You can now log in anytime.", "success")
         
@@ -5531,8 +6395,6 @@ def set_password():
     except Exception as e:
         # Catch-all for any unexpected errors
         logger.error(f"Unexpected error in set_password route: {e}", exc_info=True)
-        import traceback
-        traceback.print_exc()
         flash("An error occurred. Your password may have been saved. Please try logging in.", "error")
         # Try to redirect anyway
         try:
@@ -5547,10 +6409,10 @@ def set_password():
 @app.route('/account_settings')
 @login_required
 def account_settings():
-    dorms = RESIDENCE_HALLS_BY_STORE.get(get_current_store(), {})
+    dorms = get_current_store_dorms()
     return render_template('account_settings.html',
                           dorms=dorms,
-                          google_maps_key=os.environ.get('GOOGLE_MAPS_API_KEY', ''))
+                          google_maps_key=GOOGLE_MAPS_API_KEY)
 
 @app.route('/change_password', methods=['POST'])
 @login_required
@@ -5590,7 +6452,8 @@ def change_password():
 def update_account_info():
     full_name = request.form.get('full_name', '').strip()
     phone = request.form.get('phone', '').strip()
-    
+    info_valid = False
+
     if not full_name:
         flash("Full name cannot be empty.", "error")
     elif len(full_name) > MAX_NAME_LENGTH:
@@ -5602,15 +6465,11 @@ def update_account_info():
         else:
             current_user.full_name = full_name
             current_user.phone = phone_result
-            db.session.commit()
-            logger.info(f"User {current_user.id} updated account info")
-            flash("Account information updated successfully!", "success")
+            info_valid = True
     else:
         current_user.full_name = full_name
         current_user.phone = phone  # Allow clearing phone
-        db.session.commit()
-        logger.info(f"User {current_user.id} updated account info")
-        flash("Account information updated successfully!", "success")
+        info_valid = True
 
     # Update pickup preferences if provided (only if seller has a pickup week set on their profile)
     time_pref = request.form.get('pickup_time_preference')
@@ -5628,8 +6487,16 @@ def update_account_info():
                 pass
         else:
             current_user.moveout_date = None
-        db.session.commit()
 
+    # One commit so the name/phone and pickup-preference changes go out as a single UPDATE,
+    # and none at all when the form re-posted what is already saved
+    if db.session.is_modified(current_user):
+        db.session.commit()
+        if info_valid:
+            logger.info(f"User {current_user.id} updated account info")
+            flash("Account information updated successfully!", "success")
+    elif info_valid:
+        flash("No changes.", "info")
     return redirect(url_for('account_settings'))
 
 
@@ -5834,28 +6701,29 @@ def process_pending_onboard(user):
 
     cover_set = False
     photo_index = 0
+    photo_urls = []
+    photo_prefix = f"item_{new_item.id}_{int(time.time())}_{secrets.token_hex(4)}"
     temp_folder = app.config['TEMP_UPLOAD_FOLDER']
 
     for filename in photo_filenames:
-        old_path = os.path.join(temp_folder, filename)
-        if os.path.exists(old_path):
-            new_filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
-            try:
-                photo_storage.save_photo_from_path(old_path, new_filename)
-                os.remove(old_path)
-            except OSError:
-                pass
-            if not cover_set:
-                new_item.photo_url = new_filename
-                cover_set = True
-            db.session.add(ItemPhoto(item_id=new_item.id, photo_url=new_filename))
-            photo_index += 1
+        new_filename = f"{photo_prefix}_{photo_index}.jpg"
+        try:
+            photo_storage.move_photo_from_path(os.path.join(temp_folder, filename), new_filename)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            pass
+        if not cover_set:
+            new_item.photo_url = new_filename
+            cover_set = True
+        photo_urls.append(new_filename)
+        photo_index += 1
 
     if guest_upload_token and temp_photo_ids:
         for temp_fn in temp_photo_ids:
             temp_rec = TempUpload.query.filter_by(session_token=guest_upload_token, filename=temp_fn).first()
             if temp_rec:
-                new_filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
+                new_filename = f"{photo_prefix}_{photo_index}.jpg"
                 if photo_storage.is_s3():
                     disk_path = os.path.join(temp_folder, temp_fn)
                     if os.path.exists(disk_path):
@@ -5872,21 +6740,25 @@ def process_pending_onboard(user):
                             logger.error(f"S3 copy error for {temp_fn}: {e}", exc_info=True)
                             continue
                 else:
-                    old_path = os.path.join(temp_folder, temp_fn)
-                    if not os.path.exists(old_path):
-                        continue
                     try:
-                        photo_storage.save_photo_from_path(old_path, new_filename)
-                        os.remove(old_path)
+                        photo_storage.move_photo_from_path(os.path.join(temp_folder, temp_fn), new_filename)
+                    except FileNotFoundError:
+                        continue
                     except OSError:
                         pass
                 if not cover_set:
                     new_item.photo_url = new_filename
                     cover_set = True
-                db.session.add(ItemPhoto(item_id=new_item.id, photo_url=new_filename))
+                photo_urls.append(new_filename)
                 db.session.delete(temp_rec)
                 photo_index += 1
 
+    # All gallery rows go in one executemany INSERT
+    if photo_urls:
+        db.session.execute(db.insert(ItemPhoto), [
+            {'item_id': new_item.id, 'photo_url': url} for url in photo_urls
+        ])
+
     # --- VIDEO HANDLING (guest -> authenticated) ---
     video_filename = pending.get('video_filename')
     temp_video_id = pending.get('temp_video_id')
@@ -5925,7 +6797,7 @@ def process_pending_onboard(user):
             <p>Hi {user.full_name or 'there'},</p>
             <p>We've received your item submission: <strong>{desc}</strong></p>
             <p>We'll review and price it soon. You'll get an email when it's approved—then you'll confirm your pickup week.</p>
-            <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">View Dashboard</a></p>
+            <p><a href="{_dashboard_url()}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">View Dashboard</a></p>
             <p>Thanks for selling with Campus Swap!</p>
         </div>
         """
@@ -5994,27 +6866,18 @@ def register():
                     user.full_name = full_name
                 if phone_result:
                     user.phone = phone_result
-                db.session.commit()
                 apply_admin_email_if_pending(user)
-                db.session.refresh(user)
+                db.session.commit()
+                queue_stripe_customer(user.id)
                 login_user(user)
                 logger.info(f"Guest account converted to full account: {email}")
                 
                 # Send welcome email
                 try:
-                    welcome_content = f"""
-                    <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
-                        <h2 style="color: #166534;">Welcome to Campus Swap!</h2>
-                        <p>Hi {full_name or 'there'},</p>
-                        <p>Thanks for creating your account! You're all set to start selling.</p>
-                        <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
-                        <p>Happy swapping!</p>
-                    </div>
-                    """
-                    send_email(
+                    queue_email(
                         email,
                         "Welcome to Campus Swap!",
-                        welcome_content
+                        _welcome_email_html(full_name, converted_guest=True)
                     )
                 except Exception as email_error:
                     logger.warning(f"Failed to send welcome email: {email_error}")
@@ -6031,38 +6894,22 @@ def register():
         
         new_user = User(email=email, full_name=full_name, password_hash=generate_password_hash(password), phone=phone_result, is_seller=True)
         db.session.add(new_user)
-        db.session.flush()  # get new_user.id
+        # Admin promotion (if any) rides in the same commit as the insert
+        apply_admin_email_if_pending(new_user)
         db.session.commit()
+        queue_stripe_customer(new_user.id)
         # PostHog: new user registration
         posthog.capture('seller_signed_up', distinct_id=str(new_user.id))
-        apply_admin_email_if_pending(new_user)
-        db.session.refresh(new_user)
         login_user(new_user)
         _merge_guest_cart_into_user(new_user)
         logger.info(f"New user registered: {email}")
         
         # Send welcome email
         try:
-            welcome_content = f"""
-            <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
-                <h2 style="color: #166534;">Welcome to Campus Swap!</h2>
-                <p>Hi {full_name or 'there'},</p>
-                <p>Thanks for joining Campus Swap! Your account has been created successfully.</p>
-                <p>You can now:</p>
-                <ul>
-                    <li>Browse our inventory</li>
-                    <li>List items to sell</li>
-                    <li>Track your sales and payouts</li>
-                </ul>
-                <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
-                <p>Happy swapping!</p>
-                <p>The Campus Swap Team</p>
-            </div>
-            """
-            send_email(
+            queue_email(
                 email,
                 "Welcome to Campus Swap!",
-                welcome_content
+                _welcome_email_html(full_name)
             )
         except Exception as email_error:
             logger.warning(f"Failed to send welcome email: {email_error}")
@@ -6112,18 +6959,18 @@ def health_check():
 
 def _send_welcome_email(user):
     """Send the standard welcome email to a newly claimed seller."""
-    name = (user.full_name or '').split()[0] if user.full_name else 'there'
+    name = html_module.escape(user.full_name.split()[0]) if (user.full_name or '').split() else 'there'
     try:
         html = f"""
         <div style="font-family: sans-serif; padding: 20px; max-width: 500px;">
             <h2 style="color: #1A3D1A;">Welcome to Campus Swap!</h2>
             <p>Hi {name},</p>
             <p>Your account is all set. You can log in any time to track your items and get paid when they sell.</p>
-            <p><a href="{url_for('dashboard', _external=True)}" style="background: #1A3D1A; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
+            <p><a href="{_dashboard_url()}" style="background: #1A3D1A; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px; display: inline-block;">Go to Dashboard</a></p>
             <p>— Campus Swap Team</p>
         </div>
         """
-        send_email(user.email, "Welcome to Campus Swap!", html)
+        queue_email(user.email, "Welcome to Campus Swap!", html)
     except Exception as e:
         logger.warning(f"Failed to send welcome email to {user.email}: {e}")
 
@@ -6289,7 +7136,6 @@ def auth_google_callback():
                 user.full_name = name
             db.session.commit()
         apply_admin_email_if_pending(user)
-        db.session.refresh(user)
         login_user(user, remember=True)
         if not pickup_period_active:
             flash("Pickup period has ended for this year. We've saved your email and will notify you when signups open next year! Check your spam folder when we send the notification.", "info")
@@ -6303,20 +7149,17 @@ def auth_google_callback():
         new_user = User(email=email, full_name=name or None, referral_source=source,
                         oauth_provider='google', oauth_id=oauth_id)
         db.session.add(new_user)
-        db.session.flush()
-        db.session.commit()
         apply_admin_email_if_pending(new_user)
-        db.session.refresh(new_user)
+        db.session.commit()
         login_user(new_user, remember=True)
         flash("Pickup period has ended for this year. We've saved your email and will notify you when signups open next year! Check your spam folder when we send the notification.", "info")
         return redirect(url_for('index'))
     new_user = User(email=email, full_name=name or None, referral_source=source,
                     oauth_provider='google', oauth_id=oauth_id)
     db.session.add(new_user)
-    db.session.flush()
-    db.session.commit()
     apply_admin_email_if_pending(new_user)
-    db.session.refresh(new_user)
+    db.session.commit()
+    queue_stripe_customer(new_user.id)
     login_user(new_user, remember=True)
     if process_pending_onboard(new_user):
         flash("Item submitted! We'll review and price it soon. You'll confirm your pickup after approval. Check your spam folder if you don't receive our emails.", "success")
@@ -6353,7 +7196,10 @@ def login():
                 return render_template('login.html', prefill_email=email, prefill_full_name='', show_signup=False)
             
             user = User.query.filter_by(email=email).first()
-            
+            has_password = bool(user and user.password_hash)
+            # Always run a hash check so missing accounts take as long as wrong passwords
+            password_ok = check_password_hash(user.password_hash if has_password else DUMMY_PASSWORD_HASH, password) and has_password
+
             if not user:
                 # User doesn't exist - suggest creating account
                 flash("No account found with this email. Create an account below.", "error")
@@ -6367,12 +7213,15 @@ def login():
                     # True guest - redirect to signup
                     flash("Please create an account with this email.", "error")
                     return render_template('login.html', prefill_email=email, prefill_full_name='', show_signup=True)
-            elif not check_password_hash(user.password_hash, password):
+            elif not password_ok:
                 # Wrong password
                 flash("Invalid password. Please try again.", "error")
                 return render_template('login.html', prefill_email=email, prefill_full_name='', show_signup=False)
             else:
                 # Successful login
+                if password_needs_rehash(user.password_hash):
+                    user.password_hash = generate_password_hash(password)
+                    db.session.commit()
                 login_user(user)
                 _merge_guest_cart_into_user(user)
                 if process_pending_onboard(user):
@@ -6428,63 +7277,68 @@ def dashboard():
 
         # First-time sellers (0 items) go straight to onboarding - never see setup cards
         # Returning sellers who removed all items see empty dashboard instead of onboard
-        my_items_pre = InventoryItem.query.filter_by(seller_id=current_user.id).all()
-        if len(my_items_pre) == 0:
-            if not current_user.is_seller:
-                return redirect(url_for('onboard'))
+        has_no_items = db.session.query(InventoryItem.id).filter_by(seller_id=current_user.id).first() is None
+        if has_no_items and not current_user.is_seller:
+            return redirect(url_for('onboard'))
+
+    # No expire/refresh of current_user: load_user fetched it in this request's fresh session,
+    # so has_paid etc. already reflect the latest commit (including Stripe webhooks).
 
-    # Refresh user object to ensure we have latest data (especially has_paid status)
-    db.session.expire(current_user)
-    db.session.refresh(current_user)
-    
     # Optimize query with eager loading
     my_items = InventoryItem.query.options(
         joinedload(InventoryItem.category)
     ).filter_by(seller_id=current_user.id).all()
     
-    # Check if user has any online items (which require payment)
-    has_online_items = any(item.collection_method == 'online' for item in my_items)
-    has_approved_free_items = any(
-        item.collection_method == 'free' and item.status != 'pending_valuation'
-        for item in my_items
-    )
-    
-    # Calculate payout statistics (per-item percentage: online 50%, in-person 33%)
-    available_items = [item for item in my_items if item.status == 'available']
-    sold_items = [item for item in my_items if item.status == 'sold']
+    # Bucket everything the dashboard needs in a single pass over the seller's items
+    available_items, sold_items, pending_pickup, pending_free = [], [], [], []
+    has_online_items = has_approved_free_items = has_free_items = False
+    for item in my_items:
+        method = item.collection_method
+        if method == 'online':
+            has_online_items = True  # online items require payment
+        elif method == 'free':
+            has_approved_free_items = has_approved_free_items or item.status != 'pending_valuation'
+            has_free_items = has_free_items or item.status != 'rejected'
+        if item.status == 'available':
+            available_items.append(item)
+        elif item.status == 'sold':
+            sold_items.append(item)
+        elif item.status == 'pending_logistics':
+            # Pending pickup: items awaiting confirmation
+            if method == 'online':
+                pending_pickup.append(item)
+            elif method == 'free':
+                pending_free.append(item)
 
     # Items visible in inventory (matches inventory route: approved items show on shop)
     live_items = available_items
 
-    # Earnings subtext: shows highest applicable payout rate
-    has_any_free = any(i.collection_method == 'free' for i in available_items)
+    # Earnings subtext / payout statistics (flat 50% payout rate)
     earnings_subtext = "Based on your 50% payout rate"
     
-    def _payout_for_item(it):
-        pct = _get_payout_percentage(it)
-        return (it.price or 0) * pct
-    
-    estimated_payout = sum(_payout_for_item(i) for i in live_items)
-    paid_out = sum(_payout_for_item(i) for i in sold_items if i.payout_sent)
-    pending_payouts = sum(_payout_for_item(i) for i in sold_items if not i.payout_sent)
+    # The payout rate only varies by collection method, so resolve it once per method
+    pct_by_method = {}
+    for it in live_items + sold_items:
+        if it.collection_method not in pct_by_method:
+            pct_by_method[it.collection_method] = _get_payout_percentage(it)
+
+    estimated_payout = sum((i.price or 0) * pct_by_method[i.collection_method] for i in live_items)
+    paid_out = sum((i.price or 0) * pct_by_method[i.collection_method] for i in sold_items if i.payout_sent)
+    pending_payouts = sum((i.price or 0) * pct_by_method[i.collection_method] for i in sold_items if not i.payout_sent)
     total_potential = estimated_payout + pending_payouts + paid_out
     
     approved_online = [i for i in live_items if i.collection_method == 'online']
     projected_fee_cents = SERVICE_FEE_CENTS if approved_online else 0
 
-    # Pending pickup: items awaiting confirmation
-    pending_pickup = [i for i in my_items if i.status == 'pending_logistics' and i.collection_method == 'online']
-    pending_free = [i for i in my_items if i.status == 'pending_logistics' and i.collection_method == 'free']
     pending_pickup_fee_cents = SERVICE_FEE_CENTS if pending_pickup else 0
 
     # Free tier flags
-    has_free_items = any(i.collection_method == 'free' for i in my_items if i.status != 'rejected')
     free_confirmed_ids_str = AppSetting.get('free_confirmed_user_ids') or ''
     free_rejected_ids_str = AppSetting.get('free_rejected_user_ids') or ''
     is_free_confirmed = str(current_user.id) in [x.strip() for x in free_confirmed_ids_str.split(',') if x.strip()]
     is_free_rejected = str(current_user.id) in [x.strip() for x in free_rejected_ids_str.split(',') if x.strip()]
 
-    stripe_pk = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
+    stripe_pk = STRIPE_PUBLISHABLE_KEY
     stripe_configured = bool(stripe.api_key and stripe_pk)
 
     # Pickup method for header card — uses User.pickup_week (seller's stated preference)
@@ -6516,10 +7370,9 @@ def dashboard():
     ).order_by(SellerAlert.created_at.desc()).all()
 
     # Determine user's overall collection_method for upgrade card
-    user_any_item = my_items[0] if my_items else None
-    user_collection_method = current_user.items[0].collection_method if current_user.items else 'free'
+    user_collection_method = my_items[0].collection_method if my_items else 'free'
     # If any item is 'online', consider user on Pro plan
-    if any(i.collection_method == 'online' for i in my_items):
+    if has_online_items:
         user_collection_method = 'online'
 
     # Setup strip vs. tracker — proxy accounts skip all setup prompts
@@ -6581,8 +7434,8 @@ def dashboard():
                           service_fee_cents=SERVICE_FEE_CENTS,
                           has_payment_method=bool(current_user.stripe_payment_method_id),
                           stripe_configured=stripe_configured,
-                          dorms=RESIDENCE_HALLS_BY_STORE.get(get_current_store(), {}),
-                          google_maps_key=os.environ.get('GOOGLE_MAPS_API_KEY', ''),
+                          dorms=get_current_store_dorms(),
+                          google_maps_key=GOOGLE_MAPS_API_KEY,
                           has_pickup_location=current_user.has_pickup_location,
                           has_payout_info=bool(current_user.payout_handle),
                           pickup_method_type=pickup_method_type,
@@ -6651,7 +7504,7 @@ def update_profile():
             current_user.pickup_access_type = access_type
             current_user.pickup_floor = floor
             current_user.pickup_note = (request.form.get('pickup_note') or '').strip()[:500] or None
-            phone = (request.form.get('phone') or '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            phone = (request.form.get('phone') or '').translate(_PHONE_STRIP)
             if len(phone) >= 10:
                 current_user.phone = phone[:20]
             db.session.commit()
@@ -6679,7 +7532,7 @@ def update_profile():
             current_user.pickup_access_type = access_type
             current_user.pickup_floor = floor
             current_user.pickup_note = (request.form.get('pickup_note') or '').strip()[:500] or None
-            phone = (request.form.get('phone') or '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            phone = (request.form.get('phone') or '').translate(_PHONE_STRIP)
             if len(phone) >= 10:
                 current_user.phone = phone[:20]
             db.session.commit()
@@ -6706,7 +7559,7 @@ def update_profile():
             current_user.pickup_access_type = access_type
             current_user.pickup_floor = floor
             current_user.pickup_note = (request.form.get('pickup_note') or '').strip()[:500] or None
-            phone = (request.form.get('phone') or '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            phone = (request.form.get('phone') or '').translate(_PHONE_STRIP)
             if len(phone) >= 10:
                 current_user.phone = phone[:20]
             db.session.commit()
@@ -6774,7 +7627,6 @@ def update_payout():
             f"handle={'SET' if current_user.payout_handle else 'NONE'}"
         )
         db.session.commit()
-        db.session.refresh(current_user)
         app.logger.warning(f"[update_payout] COMMITTED OK")
         flash("Payout info secured.", "success")
     else:
@@ -6788,12 +7640,57 @@ def update_payout():
 @login_required
 def add_payment_method():
     """Page to add payment method (Setup Intent - no charge until pickup)."""
-    stripe_pk = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
+    stripe_pk = STRIPE_PUBLISHABLE_KEY
     stripe_configured = bool(stripe.api_key and stripe_pk)
     return render_template('add_payment_method.html',
         stripe_publishable_key=stripe_pk,
         stripe_configured=stripe_configured)
 
+def _create_stripe_customer(user):
+    """Create the user's Stripe customer and store its id (caller commits).
+
+    The idempotency key is per user row, so the signup background task and a racing
+    create_setup_intent get the same customer back instead of creating two. Stripe keeps
+    keys account-wide for 24h, so it also hashes in the email and name: a reused id after
+    a DB reset (or another environment on the same key) doesn't get someone else's
+    customer, and a renamed user doesn't hit a same-key/different-params error.
+    """
+    name = user.full_name or user.email
+    params_digest = hashlib.sha256(f'{user.email}\n{name}'.encode()).hexdigest()[:16]
+    customer = stripe.Customer.create(
+        email=user.email,
+        name=name,
+        metadata={'user_id': user.id},
+        idempotency_key=f'customer-user-{user.id}-{params_digest}',
+    )
+    user.stripe_customer_id = customer.id
+    return customer.id
+
+
+def queue_stripe_customer(user_id):
+    """Create a new user's Stripe customer in the background after signup.
+
+    Keeps the Stripe round trip off both the signup response and the first
+    create_setup_intent call. Returns the Future, or None when Stripe isn't configured.
+    """
+    if not stripe.api_key:
+        return None
+    app_obj = current_app._get_current_object()
+
+    def _create():
+        with app_obj.app_context():
+            try:
+                user = db.session.get(User, user_id)
+                if user and not user.stripe_customer_id:
+                    _create_stripe_customer(user)
+                    db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Background Stripe customer create failed for user {user_id}: {e}")
+
+    return _stripe_executor.submit(_create)
+
+
 @app.route('/create_setup_intent', methods=['POST'])
 @login_required
 def create_setup_intent():
@@ -6803,13 +7700,8 @@ def create_setup_intent():
     try:
         customer_id = current_user.stripe_customer_id
         if not customer_id:
-            customer = stripe.Customer.create(
-                email=current_user.email,
-                name=current_user.full_name or current_user.email,
-                metadata={'user_id': current_user.id}
-            )
-            customer_id = customer.id
-            current_user.stripe_customer_id = customer_id
+            # Normally created at signup by queue_stripe_customer; fall back if that hasn't landed
+            customer_id = _create_stripe_customer(current_user)
             db.session.commit()
         
         setup_intent = stripe.SetupIntent.create(
@@ -6911,7 +7803,7 @@ def create_checkout_session():
                 client_reference_id=str(current_user.id),
                 metadata={'type': 'seller_activation', 'user_id': current_user.id},
                 success_url=url_for('payment_success', _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
-                cancel_url=url_for('dashboard', _external=True),
+                cancel_url=_dashboard_url(),
             )
             return redirect(stripe_session.url, code=303)
         except Exception as e:
@@ -6936,13 +7828,12 @@ def payment_success():
                         InventoryItem.seller_id == current_user.id,
                         InventoryItem.collection_method == 'free'
                     ).update({'collection_method': 'online'}, synchronize_session=False)
+                    _mark_shop_pages_stale()
                     current_user.payment_declined = False
                     current_user.has_paid = True  # Required for online items to go live
                     db.session.commit()
                     # PostHog: seller upgraded from free to paid tier
                     posthog.capture('seller_upgraded_to_paid', distinct_id=str(current_user.id))
-                    db.session.expire(current_user)
-                    db.session.refresh(current_user)
                     flash("Upgraded to Campus Swap Pickup! Paid $15. All your items are now on our pickup route.", "success")
                 elif stripe_session.metadata.get('type') == 'seller_activation':
                     # Seller activation
@@ -6951,9 +7842,6 @@ def payment_success():
                         current_user.is_seller = True
                         db.session.commit()
                     
-                    db.session.expire(current_user)
-                    db.session.refresh(current_user)
-                    
                     flash("Your item is submitted and you've secured your spot for the summer. We'll pick up from your listed address during move-out week. More details on exact pickup logistics will follow.", "success")
         except Exception as e:
             logger.error(f"Error verifying payment: {e}", exc_info=True)
@@ -6973,6 +7861,37 @@ def _user_has_payout(user):
     )
 
 
+_seller_category_cache = {"categories": None, "price_ranges": None, "built_at": None}  # per-process
+SELLER_CATEGORY_CACHE_TTL = 300  # seconds; bounds staleness for other workers' category edits
+
+
+@event.listens_for(InventoryCategory, 'after_insert')
+@event.listens_for(InventoryCategory, 'after_update')
+@event.listens_for(InventoryCategory, 'after_delete')
+def _invalidate_seller_category_cache(mapper, connection, target):
+    _seller_category_cache["categories"] = None
+
+
+def _seller_categories():
+    """(top-level categories, price hint per category id incl. subcategories) for the
+    onboard and add_item forms, cached for SELLER_CATEGORY_CACHE_TTL.
+
+    Cached rows are merged into the current session without a SELECT so lazy
+    relationships still load. The price map is shared — don't mutate it.
+    """
+    now = time.monotonic()
+    if (_seller_category_cache["categories"] is None
+            or now - _seller_category_cache["built_at"] >= SELLER_CATEGORY_CACHE_TTL):
+        all_cats = InventoryCategory.query.order_by(InventoryCategory.id).all()
+        _seller_category_cache.update(
+            categories=[cat for cat in all_cats if cat.parent_id is None],
+            price_ranges={cat.id: get_price_range_for_category(cat.name) for cat in all_cats},
+            built_at=now,
+        )
+    categories = [db.session.merge(cat, load=False) for cat in _seller_category_cache["categories"]]
+    return categories, _seller_category_cache["price_ranges"]
+
+
 @app.route('/onboard', methods=['GET', 'POST'])
 def onboard():
     """6-step wizard for first-time sellers (0 items). Guests can complete wizard then create account at end."""
@@ -6988,14 +7907,9 @@ def onboard():
         # Render onboard page with "closed" message instead of redirecting (avoids redirect loop with dashboard)
         return render_template('onboard.html', pickup_ended=True, categories=[], category_price_ranges={}, dorms={}, google_maps_key='', is_guest=not current_user.is_authenticated, warehouse_spots=0, skip_payout=True)
 
-    categories = InventoryCategory.query.filter_by(parent_id=None).order_by(InventoryCategory.id).all()
-    category_price_ranges = {cat.id: get_price_range_for_category(cat.name) for cat in categories}
-    # Also include subcategory price ranges for the JS price hint
-    all_subcats = InventoryCategory.query.filter(InventoryCategory.parent_id.isnot(None)).all()
-    for sc in all_subcats:
-        category_price_ranges[sc.id] = get_price_range_for_category(sc.name)
-    dorms = RESIDENCE_HALLS_BY_STORE.get(get_current_store(), {})
-    google_maps_key = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+    categories, category_price_ranges = _seller_categories()
+    dorms = get_current_store_dorms()
+    google_maps_key = GOOGLE_MAPS_API_KEY
 
     if not categories:
         # Don't redirect authenticated non-admin users to get_user_dashboard() — that sends them
@@ -7140,15 +8054,14 @@ def onboard():
 
         # ---- Step create_account: guest creates account + item ----
         if _step_param == 'create_account' and not current_user.is_authenticated:
-            from werkzeug.security import generate_password_hash as _gph
             _full_name = request.form.get('full_name', '').strip()
             _email = request.form.get('email', '').strip().lower()
-            _phone_raw = request.form.get('phone', '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            _phone_raw = request.form.get('phone', '').translate(_PHONE_STRIP)
             _password = request.form.get('password', '')
             if not _email or not _password:
                 flash("Email and password are required.", "error")
                 return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=True, skip_payout=True, warehouse_spots=get_warehouse_spots_remaining())
-            if User.query.filter_by(email=_email).first():
+            if _user_exists(email=_email):
                 flash("An account with this email already exists. Please log in.", "error")
                 return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=True, skip_payout=True, warehouse_spots=get_warehouse_spots_remaining())
             _cat_id = session.get('onboard_category_id')
@@ -7170,7 +8083,7 @@ def onboard():
             _new_user = User(
                 email=_email,
                 full_name=_full_name,
-                password_hash=_gph(_password),
+                password_hash=generate_password_hash(_password),
                 phone=_phone_raw[:20] if len(_phone_raw) >= 10 else None,
                 is_seller=True,
                 payout_method=_payout_method if _payout_method in ('Venmo', 'PayPal', 'Zelle') else 'Venmo',
@@ -7228,15 +8141,15 @@ def onboard():
 
         if not is_mattress and not has_files and not has_temp_photos:
             flash("Please add at least one photo.", "error")
-            return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+            return redirect(url_for('onboard'))
         if not cat_id:
             flash("Please select a category.", "error")
-            return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+            return redirect(url_for('onboard'))
 
         quality_valid, quality_value = validate_quality(quality)
         if not quality_valid:
             flash(f"Invalid condition.", "error")
-            return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+            return redirect(url_for('onboard'))
 
         suggested_price = None
         if suggested_price_raw:
@@ -7255,7 +8168,7 @@ def onboard():
         if payout_handle:
             if payout_handle.lower() != payout_confirm.lower():
                 flash("Handles do not match. Please re-enter to confirm.", "error")
-                return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+                return redirect(url_for('onboard'))
             current_user.payout_method = payout_method if payout_method in ('Venmo', 'PayPal', 'Zelle') else 'Venmo'
             current_user.payout_handle = payout_handle
             current_user.is_seller = True
@@ -7294,42 +8207,46 @@ def onboard():
 
         cover_set = False
         photo_index = 0
+        photo_urls = []
+        photo_prefix = f"item_{new_item.id}_{int(time.time())}_{secrets.token_hex(4)}"
         if has_files:
+            uploads = []
             for file in files:
                 if file.filename:
                     is_valid, error_msg = validate_file_upload(file)
                     if not is_valid:
                         db.session.rollback()
                         flash(f"File upload error: {error_msg}", "error")
-                        return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
-                    filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
-                    try:
-                        photo_storage.save_photo(file, filename)
-                        if not cover_set:
-                            new_item.photo_url = filename
-                            cover_set = True
-                        db.session.add(ItemPhoto(item_id=new_item.id, photo_url=filename))
-                        photo_index += 1
-                    except Exception as img_error:
-                        db.session.rollback()
-                        logger.error(f"Image error: {img_error}", exc_info=True)
-                        flash("Error processing image. Please try again.", "error")
-                        return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+                        return redirect(url_for('onboard'))
+                    uploads.append((file, f"{photo_prefix}_{photo_index}.jpg"))
+                    photo_index += 1
+            try:
+                _save_photos(uploads)
+            except Exception as img_error:
+                db.session.rollback()
+                logger.error(f"Image error: {img_error}", exc_info=True)
+                flash("Error processing image. Please try again.", "error")
+                return redirect(url_for('onboard'))
+            photo_urls.extend(filename for _, filename in uploads)
+            if photo_urls:
+                new_item.photo_url = photo_urls[0]
+                cover_set = True
 
         if has_temp_photos:
             temp_folder = app.config['TEMP_UPLOAD_FOLDER']
+            # One JOIN fetches every referenced upload owned by this user
+            temp_recs = {r.filename: r for r in TempUpload.query.join(
+                UploadSession, TempUpload.session_token == UploadSession.session_token
+            ).filter(
+                UploadSession.user_id == current_user.id,
+                TempUpload.filename.in_(temp_photo_ids)
+            )}
+            if any(temp_fn not in temp_recs for temp_fn in temp_photo_ids):
+                db.session.rollback()
+                flash("Invalid or expired photo from phone. Please try again.", "error")
+                return redirect(url_for('onboard'))
             for temp_fn in temp_photo_ids:
-                temp_rec = TempUpload.query.filter(
-                    TempUpload.filename == temp_fn,
-                    TempUpload.session_token.in_(
-                        db.session.query(UploadSession.session_token).filter(UploadSession.user_id == current_user.id)
-                    )
-                ).first()
-                if not temp_rec:
-                    db.session.rollback()
-                    flash("Invalid or expired photo from phone. Please try again.", "error")
-                    return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
-                new_filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
+                new_filename = f"{photo_prefix}_{photo_index}.jpg"
                 if photo_storage.is_s3():
                     disk_path = os.path.join(temp_folder, temp_fn)
                     if os.path.exists(disk_path):
@@ -7348,24 +8265,30 @@ def onboard():
                             db.session.rollback()
                             logger.error(f"S3 copy error for {temp_fn}: {e}", exc_info=True)
                             flash("Error saving photo. Please try again.", "error")
-                            return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+                            return redirect(url_for('onboard'))
                 else:
-                    old_path = os.path.join(temp_folder, temp_fn)
-                    if not os.path.exists(old_path):
+                    try:
+                        photo_storage.move_photo_from_path(os.path.join(temp_folder, temp_fn), new_filename)
+                    except FileNotFoundError:
                         db.session.rollback()
                         flash("Photo from phone no longer available. Please re-upload.", "error")
-                        return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
-                    try:
-                        photo_storage.save_photo_from_path(old_path, new_filename)
-                        os.remove(old_path)
+                        return redirect(url_for('onboard'))
                     except OSError:
                         pass
                 if not cover_set:
                     new_item.photo_url = new_filename
                     cover_set = True
-                db.session.add(ItemPhoto(item_id=new_item.id, photo_url=new_filename))
-                db.session.delete(temp_rec)
+                photo_urls.append(new_filename)
                 photo_index += 1
+            TempUpload.query.filter(
+                TempUpload.id.in_([r.id for r in temp_recs.values()])
+            ).delete(synchronize_session=False)
+
+        # All gallery rows go in one executemany INSERT
+        if photo_urls:
+            db.session.execute(db.insert(ItemPhoto), [
+                {'item_id': new_item.id, 'photo_url': url} for url in photo_urls
+            ])
 
         # --- VIDEO HANDLING ---
         video_file = request.files.get('video')
@@ -7380,7 +8303,7 @@ def onboard():
             if not is_valid:
                 db.session.rollback()
                 flash(f"Video upload error: {error_msg}", "error")
-                return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+                return redirect(url_for('onboard'))
             safe_name = secure_filename(video_file.filename)
             ext = safe_name.rsplit('.', 1)[1].lower() if '.' in safe_name else 'mp4'
             video_key = f"video_{new_item.id}_{int(time.time())}.{ext}"
@@ -7391,7 +8314,7 @@ def onboard():
                 db.session.rollback()
                 logger.error(f"Video save error: {vid_error}", exc_info=True)
                 flash("Error saving video. Please try again.", "error")
-                return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+                return redirect(url_for('onboard'))
         elif temp_video_id:
             temp_rec = TempUpload.query.filter(
                 TempUpload.filename == temp_video_id,
@@ -7414,7 +8337,7 @@ def onboard():
         elif category_requires_video(cat_name, sub_cat_name):
             db.session.rollback()
             flash("A video is required for this item category.", "error")
-            return render_template('onboard.html', categories=categories, category_price_ranges=category_price_ranges, dorms=dorms, google_maps_key=google_maps_key, is_guest=False, skip_payout=True)
+            return redirect(url_for('onboard'))
 
         db.session.commit()
         _ai_queue.put((current_app._get_current_object(), new_item.id))
@@ -7435,7 +8358,7 @@ def onboard():
                 <p>Hi {current_user.full_name or 'there'},</p>
                 <p>We've received your item submission: <strong>{desc}</strong></p>
                 <p>We'll review and price it soon. You'll get an email when it's approved—then you'll confirm your pickup week.</p>
-                <p><a href="{url_for('dashboard', _external=True)}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">View Dashboard</a></p>
+                <p><a href="{_dashboard_url()}" style="background: #166534; color: white; padding: 12px 24px; text-decoration: none; border-radius: 8px;">View Dashboard</a></p>
                 <p>Thanks for selling with Campus Swap!</p>
             </div>
             """
@@ -7453,6 +8376,7 @@ def onboard():
 @app.route('/onboard/guest/save', methods=['POST'])
 def onboard_guest_save():
     """Save guest onboarding data to session; redirect or return JSON for embedded step 11."""
+    from PIL import Image, ImageOps
     ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     def _err(msg):
@@ -7517,7 +8441,7 @@ def onboard_guest_save():
             pass
 
     # Address and phone are collected at confirm_pickup when user selects their week
-    phone_raw = (request.form.get('phone') or '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+    phone_raw = (request.form.get('phone') or '').translate(_PHONE_STRIP)
 
     # Payout is no longer collected during onboarding — set up in account settings
     payout_method = None
@@ -7535,15 +8459,13 @@ def onboard_guest_save():
                 try:
                     img = Image.open(file)
                     img = ImageOps.exif_transpose(img)
-                    img = img.convert("RGBA")
-                    bg = Image.new("RGB", img.size, (255, 255, 255))
-                    bg.paste(img, (0, 0), img)
+                    bg = _flatten_to_rgb(img)
                     max_dimension = 2000
                     if bg.width > max_dimension or bg.height > max_dimension:
                         ratio = max_dimension / max(bg.width, bg.height)
                         new_w, new_h = int(bg.width * ratio), int(bg.height * ratio)
                         bg = bg.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+                    bg.save(save_path, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
                     photo_filenames.append(filename)
                 except Exception as img_error:
                     logger.error(f"Guest onboard image error: {img_error}", exc_info=True)
@@ -7762,7 +8684,7 @@ def confirm_pickup():
                     return redirect(url_for('confirm_pickup'))
 
             # Collect phone number (required for pickup)
-            phone_raw = (request.form.get('phone') or '').replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            phone_raw = (request.form.get('phone') or '').translate(_PHONE_STRIP)
             if len(phone_raw) >= 10:
                 current_user.phone = phone_raw[:20]
             elif not current_user.phone:
@@ -7788,9 +8710,9 @@ def confirm_pickup():
                               pending_items=pending_free,
                               pickup_weeks=PICKUP_WEEKS,
                                                             is_free_confirmed=True,
-                              dorms=RESIDENCE_HALLS_BY_STORE.get(get_current_store(), {}),
+                              dorms=get_current_store_dorms(),
                               has_pickup_location=current_user.has_pickup_location,
-                              google_maps_key=os.environ.get('GOOGLE_MAPS_API_KEY', ''))
+                              google_maps_key=GOOGLE_MAPS_API_KEY)
 
     if pending_free and is_free_rejected:
         flash("Pickup slots are full for the free plan. Upgrade to Campus Swap Pickup to secure your spot.", "info")
@@ -7901,9 +8823,9 @@ def confirm_pickup():
                           pending_items=pending,
                           pickup_weeks=PICKUP_WEEKS,
                                                     is_free_confirmed=False,
-                          dorms=RESIDENCE_HALLS_BY_STORE.get(get_current_store(), {}),
+                          dorms=get_current_store_dorms(),
                           has_pickup_location=current_user.has_pickup_location,
-                          google_maps_key=os.environ.get('GOOGLE_MAPS_API_KEY', ''))
+                          google_maps_key=GOOGLE_MAPS_API_KEY)
 
 
 @app.route('/confirm_pickup_success')
@@ -7920,13 +8842,7 @@ def confirm_pickup_success():
             pickup_week = stripe_session.metadata.get('pickup_week', '')
             if item_ids_str and pickup_week:
                 item_ids = [int(x.strip()) for x in item_ids_str.split(',') if x.strip()]
-                items = [InventoryItem.query.get(iid) for iid in item_ids]
-                items = [i for i in items if i and i.seller_id == current_user.id and i.status == 'pending_logistics']
-                for item in items:
-                    item.pickup_week = pickup_week
-                    item.status = 'available'
-                    if item.category:
-                        item.category.count_in_stock = (item.category.count_in_stock or 0) + 1
+                _release_paid_pickup_items(item_ids, current_user.id, pickup_week)
                 current_user.has_paid = True
                 # Auto-resolve pickup reminder alerts
                 for pa in SellerAlert.query.filter_by(user_id=current_user.id, alert_type='pickup_reminder', resolved=False).all():
@@ -7972,10 +8888,7 @@ def add_item():
         flash("Your payment was declined. Please add a valid payment method to continue.", "error")
         return redirect(url_for('add_payment_method'))
     
-    categories = InventoryCategory.query.filter_by(parent_id=None).order_by(InventoryCategory.id).all()
-    category_price_ranges = {cat.id: get_price_range_for_category(cat.name) for cat in categories}
-    for sc in InventoryCategory.query.filter(InventoryCategory.parent_id.isnot(None)).all():
-        category_price_ranges[sc.id] = get_price_range_for_category(sc.name)
+    categories, category_price_ranges = _seller_categories()
 
     # Check if categories exist - if not, show error
     if not categories:
@@ -8010,39 +8923,39 @@ def add_item():
 
         if not is_mattress and not has_files and not has_temp_photos:
             flash("Please add at least one photo.", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
 
         # Validate category_id
         if not cat_id:
             flash("Please select a category.", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         try:
             cat_id = int(cat_id)
         except (ValueError, TypeError):
             flash("Invalid category selected.", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         # Verify category exists
         category = InventoryCategory.query.get(cat_id)
         if not category:
             flash("Selected category does not exist. Please select a valid category.", "error")
             logger.error(f"Invalid category_id {cat_id} submitted - category not found")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         # Validate inputs
         quality_valid, quality_value = validate_quality(quality)
         if not quality_valid:
             flash(f"Invalid quality: {quality_value}", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         if len(desc) > MAX_DESCRIPTION_LENGTH:
             flash(f"Description too long (max {MAX_DESCRIPTION_LENGTH} characters)", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         if long_desc and len(long_desc) > MAX_LONG_DESCRIPTION_LENGTH:
             flash(f"Long description too long (max {MAX_LONG_DESCRIPTION_LENGTH} characters)", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
         
         suggested_price = None
         if suggested_price_raw:
@@ -8088,9 +9001,12 @@ def add_item():
         
         cover_set = False
         photo_index = 0
+        photo_urls = []
+        photo_prefix = f"item_{new_item.id}_{int(time.time())}_{secrets.token_hex(4)}"
         
         # Process files from desktop
         if has_files:
+            uploads = []
             for file in files:
                 if file.filename:
                     # Validate file upload
@@ -8098,37 +9014,37 @@ def add_item():
                     if not is_valid:
                         db.session.rollback()
                         flash(f"File upload error: {error_msg}", "error")
-                        return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
-                    
-                    filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
-                    try:
-                        photo_storage.save_photo(file, filename)
-                        if not cover_set:
-                            new_item.photo_url = filename
-                            cover_set = True
-                        db.session.add(ItemPhoto(item_id=new_item.id, photo_url=filename))
-                        photo_index += 1
-                    except Exception as img_error:
-                        db.session.rollback()
-                        logger.error(f"Error processing image: {img_error}", exc_info=True)
-                        flash("Error processing image. Please try again.", "error")
-                        return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+                        return redirect(url_for('add_item'))
+                    uploads.append((file, f"{photo_prefix}_{photo_index}.jpg"))
+                    photo_index += 1
+            try:
+                _save_photos(uploads)
+            except Exception as img_error:
+                db.session.rollback()
+                logger.error(f"Error processing image: {img_error}", exc_info=True)
+                flash("Error processing image. Please try again.", "error")
+                return redirect(url_for('add_item'))
+            photo_urls.extend(filename for _, filename in uploads)
+            if photo_urls:
+                new_item.photo_url = photo_urls[0]
+                cover_set = True
         
         # Process temp photos from phone (QR upload)
         if has_temp_photos:
             temp_folder = app.config['TEMP_UPLOAD_FOLDER']
+            # One JOIN fetches every referenced upload owned by this user
+            temp_recs = {r.filename: r for r in TempUpload.query.join(
+                UploadSession, TempUpload.session_token == UploadSession.session_token
+            ).filter(
+                UploadSession.user_id == current_user.id,
+                TempUpload.filename.in_(temp_photo_ids)
+            )}
+            if any(temp_fn not in temp_recs for temp_fn in temp_photo_ids):
+                db.session.rollback()
+                flash("Invalid or expired photo from phone. Please try again.", "error")
+                return redirect(url_for('add_item'))
             for temp_fn in temp_photo_ids:
-                temp_rec = TempUpload.query.filter(
-                    TempUpload.filename == temp_fn,
-                    TempUpload.session_token.in_(
-                        db.session.query(UploadSession.session_token).filter(UploadSession.user_id == current_user.id)
-                    )
-                ).first()
-                if not temp_rec:
-                    db.session.rollback()
-                    flash("Invalid or expired photo from phone. Please try again.", "error")
-                    return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
-                new_filename = f"item_{new_item.id}_{int(time.time())}_{photo_index}.jpg"
+                new_filename = f"{photo_prefix}_{photo_index}.jpg"
                 if photo_storage.is_s3():
                     disk_path = os.path.join(temp_folder, temp_fn)
                     if os.path.exists(disk_path):
@@ -8145,24 +9061,30 @@ def add_item():
                             db.session.rollback()
                             logger.error(f"S3 copy error for {temp_fn}: {e}", exc_info=True)
                             flash("Error saving photo. Please try again.", "error")
-                            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+                            return redirect(url_for('add_item'))
                 else:
-                    old_path = os.path.join(temp_folder, temp_fn)
-                    if not os.path.exists(old_path):
+                    try:
+                        photo_storage.move_photo_from_path(os.path.join(temp_folder, temp_fn), new_filename)
+                    except FileNotFoundError:
                         db.session.rollback()
                         flash("Photo from phone no longer available. Please re-upload.", "error")
-                        return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
-                    try:
-                        photo_storage.save_photo_from_path(old_path, new_filename)
-                        os.remove(old_path)
+                        return redirect(url_for('add_item'))
                     except OSError:
                         pass
                 if not cover_set:
                     new_item.photo_url = new_filename
                     cover_set = True
-                db.session.add(ItemPhoto(item_id=new_item.id, photo_url=new_filename))
-                db.session.delete(temp_rec)
+                photo_urls.append(new_filename)
                 photo_index += 1
+            TempUpload.query.filter(
+                TempUpload.id.in_([r.id for r in temp_recs.values()])
+            ).delete(synchronize_session=False)
+
+        # All gallery rows go in one executemany INSERT
+        if photo_urls:
+            db.session.execute(db.insert(ItemPhoto), [
+                {'item_id': new_item.id, 'photo_url': url} for url in photo_urls
+            ])
 
         # --- VIDEO HANDLING (add_item) ---
         video_file = request.files.get('video')
@@ -8176,7 +9098,7 @@ def add_item():
             if not is_valid:
                 db.session.rollback()
                 flash(f"Video upload error: {error_msg}", "error")
-                return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+                return redirect(url_for('add_item'))
             safe_name = secure_filename(video_file.filename)
             ext = safe_name.rsplit('.', 1)[1].lower() if '.' in safe_name else 'mp4'
             video_key = f"video_{new_item.id}_{int(time.time())}.{ext}"
@@ -8187,7 +9109,7 @@ def add_item():
                 db.session.rollback()
                 logger.error(f"Video save error: {vid_error}", exc_info=True)
                 flash("Error saving video. Please try again.", "error")
-                return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+                return redirect(url_for('add_item'))
         elif temp_video_id:
             temp_rec = TempUpload.query.filter(
                 TempUpload.filename == temp_video_id,
@@ -8210,7 +9132,7 @@ def add_item():
         elif category_requires_video(cat_name, add_sub_cat_name):
             db.session.rollback()
             flash("A video is required for this item category.", "error")
-            return render_template('add_item.html', categories=categories, category_price_ranges=category_price_ranges)
+            return redirect(url_for('add_item'))
 
         db.session.commit()
         _ai_queue.put((current_app._get_current_object(), new_item.id))
@@ -8233,7 +9155,7 @@ def add_item():
                     <li>You'll receive an email when your item goes live</li>
                     <li>Once live, buyers can purchase your item</li>
                 </ul>
-                <p>You can track your item's status in your <a href="{url_for('dashboard', _external=True)}">dashboard</a>.</p>
+                <p>You can track your item's status in your <a href="{_dashboard_url()}">dashboard</a>.</p>
                 <p>Thanks for selling with Campus Swap!</p>
             </div>
             """
@@ -8640,6 +9562,8 @@ def admin_delete_user(user_id):
         # 10. Items themselves (seller_id nullable, but children are gone so FK is clean)
         if item_ids:
             InventoryItem.query.filter(InventoryItem.id.in_(item_ids)).delete(synchronize_session=False)
+            # Bulk DELETE skips the mapper events that normally drop cached shop pages
+            _mark_shop_pages_stale()
 
         # 11. Upload sessions + temp uploads
         sessions = UploadSession.query.filter_by(user_id=user_id).all()
@@ -8667,10 +9591,10 @@ def admin_delete_item_direct(item_id):
     if not current_user.is_authenticated or not current_user.is_admin:
         flash("Access denied.", "error")
         return redirect(url_for('index'))
-    item = InventoryItem.query.options(
+    item = db.session.get(InventoryItem, item_id, options=[
         joinedload(InventoryItem.category),
         joinedload(InventoryItem.seller)
-    ).get(item_id)
+    ])
     if not item:
         flash("Item not found.", "error")
         return redirect(url_for('admin_panel'))
@@ -8679,13 +9603,10 @@ def admin_delete_item_direct(item_id):
         try:
             item_desc = item.description
             if item.status == 'available':
-                cat = InventoryCategory.query.get(item.category_id)
-                if cat and cat.count_in_stock > 0:
-                    cat.count_in_stock -= 1
-            for photo in item.gallery_photos[:]:
-                db.session.delete(photo)
-            db.session.delete(item)
+                _bump_category_count(item.category_id, -1)
+            photo_keys = _delete_item_and_photo_rows(item)
             db.session.commit()
+            _delete_photo_files(photo_keys)
             # Note: deleting an item never notifies the seller — no email/SMS here by design.
             if is_modal:
                 # fetch() callers (items-tab detail drawer) expect JSON, not a redirect
@@ -9168,12 +10089,9 @@ def admin_mass_email():
         flash(error_msg, "error")
         return redirect(url_for('admin_panel') + '#mass-email')
     
-    # Get all users with email addresses, excluding unsubscribed users
-    users = User.query.filter(
-        User.email.isnot(None),
-        User.unsubscribed != True  # Filter out unsubscribed users
-    ).all()
-    total_users = len(users)
+    # Get (id, email) for all users with email addresses, excluding unsubscribed users
+    recipients = marketing_recipients()
+    total_users = len(recipients)
     
     if total_users == 0:
         error_msg = "No users found in database (or all users have unsubscribed)."
@@ -9201,38 +10119,37 @@ def admin_mass_email():
     
     # Send emails one by one (send_email handles rate limiting internally via Resend)
     # Note: Resend has rate limits, so we add a small delay between sends
-    for idx, user in enumerate(users):
+    for idx, (user_id, email) in enumerate(recipients):
         try:
             # send_email automatically:
-            # - Checks if user is unsubscribed (double-check)
-            # - Generates unsubscribe token if needed
+            # - Generates unsubscribe token from the user id
             # - Wraps content in email template
             # - Adds unsubscribe link and headers
             # - Includes plain text version
             success = send_email(
-                to_email=user.email,
+                to_email=email,
                 subject=subject,
                 html_content=html_content,
                 is_marketing=True,
-                user=user
+                user_id=user_id
             )
             
             if success:
                 sent_count += 1
             else:
                 failed_count += 1
-                failed_emails.append(user.email)
+                failed_emails.append(email)
             
             # Rate limiting: Resend allows 2 req/s, so wait 0.5s between emails
             # Add small buffer to be safe
-            if idx < len(users) - 1:  # Don't wait after last email
+            if idx < total_users - 1:  # Don't wait after last email
                 time.sleep(0.55)
                 
         except Exception as e:
             error_type = type(e).__name__
-            logger.error(f"Error sending email to {user.email} ({error_type}): {str(e)}", exc_info=True)
+            logger.error(f"Error sending email to {email} ({error_type}): {str(e)}", exc_info=True)
             failed_count += 1
-            failed_emails.append(user.email)
+            failed_emails.append(email)
     
     logger.info(f"Mass email complete. Sent: {sent_count}, Failed: {failed_count}, Total: {total_users}")
     
@@ -10499,6 +11416,7 @@ def crew_intake_log_unknown(shift_id):
 @login_required
 def crew_quick_capture():
     """Create a quick-capture inventory item from a driver photo. Returns JSON."""
+    from PIL import Image, ImageOps
     if not current_user.is_worker or current_user.worker_status != 'approved':
         return jsonify({'success': False, 'error': 'Access denied.'}), 403
 
@@ -10541,9 +11459,7 @@ def crew_quick_capture():
         from io import BytesIO as _BytesIO
         img = Image.open(photo)
         img = ImageOps.exif_transpose(img)
-        img = img.convert("RGBA")
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        bg.paste(img, (0, 0), img)
+        bg = _flatten_to_rgb(img)
         max_dimension = 2000
         if bg.width > max_dimension or bg.height > max_dimension:
             if bg.width > bg.height:
@@ -10554,7 +11470,7 @@ def crew_quick_capture():
                 new_width = int(bg.width * (max_dimension / bg.height))
             bg = bg.resize((new_width, new_height), Image.Resampling.LANCZOS)
         buf = _BytesIO()
-        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
         photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
     except Exception as e:
         logger.error(f"Quick capture image processing error: {e}", exc_info=True)
@@ -14014,7 +14930,7 @@ def _normalize_phone(raw):
     """
     if not raw:
         return None
-    digits = re.sub(r'\D', '', raw)
+    digits = _NONDIGIT_RE.sub('', raw)
     if len(digits) == 10:
         return f'+1{digits}'
     if len(digits) == 11 and digits.startswith('1'):
@@ -15868,13 +16784,13 @@ def _create_proxy_seller_from_form(form, proxy_note):
     if email_raw:
         if not validate_email(email_raw):
             return None, 'Invalid email address.', 400
-        if User.query.filter_by(email=email_raw).first():
+        if _user_exists(email=email_raw):
             return None, 'An account with that email already exists.', 409
         email = email_raw
     else:
         digits = ''.join(c for c in phone_result if c.isdigit())
         email = f'proxy+{digits}@usecampusswap.com'
-        if User.query.filter_by(email=email).first():
+        if _user_exists(email=email):
             import secrets as _sec
             email = f'proxy+{digits}{_sec.token_hex(4)}@usecampusswap.com'
 
@@ -15899,6 +16815,7 @@ def _create_proxy_seller_from_form(form, proxy_note):
 @app.route('/admin/warehouse/log-item', methods=['POST'])
 @login_required
 def admin_warehouse_log_item():
+    from PIL import Image, ImageOps
     if not _has_warehouse_access():
         return jsonify({'error': 'Access denied.'}), 403
 
@@ -15949,9 +16866,7 @@ def admin_warehouse_log_item():
         from io import BytesIO as _BytesIO
         img = Image.open(photo)
         img = ImageOps.exif_transpose(img)
-        img = img.convert("RGBA")
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        bg.paste(img, (0, 0), img)
+        bg = _flatten_to_rgb(img)
         max_dimension = 2000
         if bg.width > max_dimension or bg.height > max_dimension:
             if bg.width > bg.height:
@@ -15962,7 +16877,7 @@ def admin_warehouse_log_item():
                 new_width = int(bg.width * (max_dimension / bg.height))
             bg = bg.resize((new_width, new_height), Image.Resampling.LANCZOS)
         buf = _BytesIO()
-        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
         photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
     except Exception as e:
         db.session.rollback()
@@ -16033,11 +16948,10 @@ def _downscale_image(file_obj, max_edge=1600, quality=85):
     compresses; this covers the fallback file-input path sending a full-res original.
     Returns JPEG bytes. Raises on unreadable image data.
     """
+    from PIL import Image, ImageOps
     img = Image.open(file_obj)
     img = ImageOps.exif_transpose(img)
-    img = img.convert("RGBA")
-    bg = Image.new("RGB", img.size, (255, 255, 255))
-    bg.paste(img, (0, 0), img)
+    bg = _flatten_to_rgb(img)
     if bg.width > max_edge or bg.height > max_edge:
         if bg.width > bg.height:
             new_size = (max_edge, int(bg.height * (max_edge / bg.width)))
@@ -16045,7 +16959,7 @@ def _downscale_image(file_obj, max_edge=1600, quality=85):
             new_size = (int(bg.width * (max_edge / bg.height)), max_edge)
         bg = bg.resize(new_size, Image.Resampling.LANCZOS)
     buf = BytesIO()
-    bg.save(buf, "JPEG", quality=quality, optimize=True)
+    bg.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
     return buf.getvalue()
 
 
@@ -16751,7 +17665,7 @@ def admin_item_replace_photo(item_id):
         return jsonify({'error': error_msg}), 400
 
     old_photo = item.photo_url
-    filename = f"item_{item.id}_{int(time.time())}_refresh.jpg"
+    filename = f"item_{item.id}_{int(time.time())}_{secrets.token_hex(4)}_refresh.jpg"
     try:
         photo_storage.save_photo(photo_file, filename)
     except Exception as e:
@@ -16855,7 +17769,7 @@ def admin_item_detail(item_id):
         .options(
             joinedload(InventoryItem.category),
             joinedload(InventoryItem.seller),
-            joinedload(InventoryItem.gallery_photos),
+            selectinload(InventoryItem.gallery_photos),
         )
         .get_or_404(item_id)
     )
@@ -19089,6 +20003,7 @@ def admin_item_hide_photo(item_id):
 def admin_item_add_gallery_photo(item_id):
     """Attach a new gallery photo to the item — from a direct device upload or a
     QR-uploaded TempUpload filename. Saves immediately; not staged behind the panel Save button."""
+    from PIL import Image, ImageOps
     guard = require_super_admin()
     if guard:
         return jsonify({'success': False, 'error': 'Forbidden'}), 403
@@ -19113,16 +20028,14 @@ def admin_item_add_gallery_photo(item_id):
             return jsonify({'success': False, 'error': 'No photo provided'}), 400
 
         img = ImageOps.exif_transpose(img)
-        img = img.convert("RGBA")
-        bg = Image.new("RGB", img.size, (255, 255, 255))
-        bg.paste(img, (0, 0), img)
+        bg = _flatten_to_rgb(img)
         if bg.width > 2000 or bg.height > 2000:
             if bg.width > bg.height:
                 bg = bg.resize((2000, int(bg.height * 2000 / bg.width)), Image.Resampling.LANCZOS)
             else:
                 bg = bg.resize((int(bg.width * 2000 / bg.height), 2000), Image.Resampling.LANCZOS)
         buf = BytesIO()
-        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+        bg.save(buf, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
         photo_storage.save_photo_from_bytes(buf.getvalue(), filename)
     except Exception as e:
         logger.error(f"Error saving new gallery photo for item {item_id}: {e}", exc_info=True)
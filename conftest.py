@@ -70,7 +70,7 @@ import tempfile
 @pytest.fixture(scope='function')
 def app():
     """App fixture for unified item submission tests."""
-    from app import app as flask_app, db as _db
+    from app import app as flask_app, db as _db, _shop_page_cache
 
     db_fd, db_path = tempfile.mkstemp()
     flask_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
@@ -85,8 +85,10 @@ def app():
 
     with flask_app.app_context():
         _db.create_all()
-        # Seed at least one category so /onboard renders (not no_categories path)
         from models import InventoryCategory, AppSetting
+        AppSetting.clear_cache()
+        _shop_page_cache.clear()
+        # Seed at least one category so /onboard renders (not no_categories path)
         cat = InventoryCategory(name='Furniture', image_url='fa-couch', count_in_stock=0)
         _db.session.add(cat)
         # Make sure pickup period is active
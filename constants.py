@@ -31,6 +31,14 @@ MAX_VIDEO_DURATION_SECONDS = 30
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'webm'}
 ALLOWED_VIDEO_MIME_TYPES = {'video/mp4', 'video/quicktime', 'video/webm'}
 
+# Whole-request ceiling, enforced by Werkzeug before the body is parsed (Flask MAX_CONTENT_LENGTH).
+# Roomy enough for one max-size video plus a full set of max-size photos in a single form post.
+MAX_REQUEST_SIZE = MAX_VIDEO_SIZE + 10 * MAX_UPLOAD_SIZE  # 150MB
+
+# Request bodies up to this size keep their file parts in memory instead of Werkzeug's
+# 500KB-then-disk spool: one max-size photo plus form fields (the phone/QR upload case).
+IN_MEMORY_REQUEST_SIZE = MAX_UPLOAD_SIZE + 64 * 1024
+
 # Categories that require video upload (matched case-insensitive, partial match)
 VIDEO_REQUIRED_CATEGORIES = [
     'tv', 'television', 'gaming console', 'printer', 'electronic',
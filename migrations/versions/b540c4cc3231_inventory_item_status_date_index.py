@@ -0,0 +1,25 @@
+"""inventory_item (status, date_added) index
+
+Revision ID: b540c4cc3231
+Revises: 480cd6c9c8ba
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b540c4cc3231'
+down_revision = '480cd6c9c8ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Shop grid: WHERE status = 'available' ORDER BY date_added DESC.
+    # upload_session.session_token / temp_upload.session_token are already indexed.
+    op.create_index('ix_inventory_item_status_date_added', 'inventory_item', ['status', 'date_added'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_item_status_date_added', table_name='inventory_item')
@@ -0,0 +1,31 @@
+"""inventory_item trigram indexes for shop search
+
+Revision ID: c7d41e9a2b60
+Revises: b540c4cc3231
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d41e9a2b60'
+down_revision = 'b540c4cc3231'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Shop search is `description ILIKE '%q%' OR long_description ILIKE '%q%'`. A leading
+    # wildcard can't use a btree, but pg_trgm GIN indexes serve ILIKE '%q%' directly, so the
+    # query (and its substring semantics) stays exactly as it is.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_inventory_item_description_trgm '
+               'ON inventory_item USING gin (description gin_trgm_ops)')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_inventory_item_long_description_trgm '
+               'ON inventory_item USING gin (long_description gin_trgm_ops)')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_inventory_item_long_description_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_inventory_item_description_trgm')
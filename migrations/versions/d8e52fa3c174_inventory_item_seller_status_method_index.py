@@ -0,0 +1,26 @@
+"""inventory_item (seller_id, status, collection_method) index
+
+Revision ID: d8e52fa3c174
+Revises: c7d41e9a2b60
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e52fa3c174'
+down_revision = 'c7d41e9a2b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seller dashboard: WHERE seller_id = ? (then bucketed by status / collection_method).
+    # The leading seller_id column also covers the plain per-seller lookups.
+    op.create_index('ix_inventory_seller_status_method', 'inventory_item',
+                    ['seller_id', 'status', 'collection_method'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_seller_status_method', table_name='inventory_item')
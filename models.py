@@ -1,9 +1,48 @@
+import time
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
 from datetime import datetime
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from werkzeug.security import check_password_hash as _werkzeug_check_password_hash
 
 db = SQLAlchemy(session_options={'expire_on_commit': False})
 
+# Argon2id for all new password hashes. Rows written before the switch still hold
+# Werkzeug PBKDF2 hashes; those verify through the Werkzeug fallback and get
+# upgraded on the next successful login.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+# Verified against when the account is missing or passwordless, so a login costs
+# the same hash either way and response time doesn't reveal which emails exist.
+# Only holds for Argon2 accounts: until a legacy PBKDF2 row is upgraded, a wrong
+# password for it takes the PBKDF2 time, which differs from this dummy check.
+DUMMY_PASSWORD_HASH = password_hasher.hash('not-a-real-password')
+
+
+def generate_password_hash(password):
+    return password_hasher.hash(password)
+
+
+def check_password_hash(pwhash, password):
+    if not pwhash:
+        return False
+    if pwhash.startswith('$argon2'):
+        try:
+            return password_hasher.verify(pwhash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return _werkzeug_check_password_hash(pwhash, password)
+
+
+def password_needs_rehash(pwhash):
+    """True for legacy (non-Argon2) hashes or Argon2 hashes with stale parameters."""
+    if not pwhash or not pwhash.startswith('$argon2'):
+        return True
+    return password_hasher.check_needs_rehash(pwhash)
+
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -45,7 +84,7 @@ class User(UserMixin, db.Model):
     # MARKETING
     referral_source = db.Column(db.String(50), default='direct')
     unsubscribed = db.Column(db.Boolean, default=False)
-    unsubscribe_token = db.Column(db.String(64), unique=True, nullable=True)
+    unsubscribe_token = db.Column(db.String(64), unique=True, nullable=True)  # legacy only — new links are signed, see make_unsubscribe_token()
     
     # OAUTH (Google, etc.)
     oauth_provider = db.Column(db.String(20), nullable=True)
@@ -153,7 +192,6 @@ class User(UserMixin, db.Model):
         return ' · '.join(parts)
 
     def set_password(self, password):
-        from werkzeug.security import generate_password_hash
         self.password_hash = generate_password_hash(password)
 
     @property
@@ -319,6 +357,15 @@ class InventoryItem(db.Model):
     fb_posted_at = db.Column(db.DateTime, nullable=True)      # UTC
     fb_listing_url = db.Column(db.String(300), nullable=True)  # optional, pasted by the poster
 
+    # The shop grid filters status == 'available' and, by default, orders newest first;
+    # this lets Postgres walk the index for a page instead of sorting every available row.
+    # The seller dashboard (and every per-seller item lookup) filters on seller_id and then
+    # status/collection_method; seller_id had no index at all, so each load scanned the table.
+    __table_args__ = (
+        db.Index('ix_inventory_item_status_date_added', 'status', 'date_added'),
+        db.Index('ix_inventory_seller_status_method', 'seller_id', 'status', 'collection_method'),
+    )
+
     @property
     def mattress_size_label(self):
         """Human label for the nominal mattress size (e.g. 'Queen'), or None if not set."""
@@ -449,16 +496,42 @@ class AdminEmail(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+_app_setting_cache = {}  # key -> (value or None, fetched_at); per-process
+
+
 class AppSetting(db.Model):
     """Simple key-value store for app-wide settings"""
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(100), unique=True, nullable=False)
     value = db.Column(db.Text, nullable=False)
+
+    # Other gunicorn workers see a change within this many seconds
+    CACHE_TTL = 30
     
     @staticmethod
     def get(key, default=None):
         setting = AppSetting.query.filter_by(key=key).first()
         return setting.value if setting else default
+
+    @staticmethod
+    def get_cached(key, default=None):
+        """Like get(), but served from an in-process cache for CACHE_TTL seconds.
+
+        Only for hot, rarely-changed settings read on nearly every request
+        (current store, pickup period, store open date). Writes through set()
+        or the ORM clear the key in this process immediately.
+        """
+        now = time.monotonic()
+        entry = _app_setting_cache.get(key)
+        if entry is None or now - entry[1] >= AppSetting.CACHE_TTL:
+            setting = AppSetting.query.filter_by(key=key).first()
+            entry = (setting.value if setting else None, now)
+            _app_setting_cache[key] = entry
+        return entry[0] if entry[0] is not None else default
+
+    @staticmethod
+    def clear_cache():
+        _app_setting_cache.clear()
     
     @staticmethod
     def set(key, value):
@@ -469,6 +542,14 @@ class AppSetting(db.Model):
             setting = AppSetting(key=key, value=str(value))
             db.session.add(setting)
         db.session.commit()
+        _app_setting_cache.pop(key, None)
+
+
+@event.listens_for(AppSetting, 'after_insert')
+@event.listens_for(AppSetting, 'after_update')
+@event.listens_for(AppSetting, 'after_delete')
+def _invalidate_app_setting_cache(mapper, connection, target):
+    _app_setting_cache.pop(target.key, None)
 
 
 class SellerAlert(db.Model):
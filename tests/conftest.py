@@ -7,7 +7,7 @@ Think of them as "test helpers" that set up common scenarios.
 import pytest
 import os
 import tempfile
-from app import app as _app, db
+from app import app as _app, db, _shop_page_cache, _admin_stats_cache, _seller_category_cache
 from models import User, InventoryCategory, InventoryItem, AppSetting
 from werkzeug.security import generate_password_hash
 
@@ -84,6 +84,11 @@ def client():
         with _app.app_context():
             # Create all tables
             db.create_all()
+            # Fresh DB per test — drop any settings/pages cached by the previous test
+            AppSetting.clear_cache()
+            _shop_page_cache.clear()
+            _admin_stats_cache["stats"] = None
+            _seller_category_cache["categories"] = None
             # Set store as open for tests (default date is future; tests need store open)
             AppSetting.set('store_open_date', '2020-01-01')
             db.session.commit()
@@ -261,3 +266,35 @@ def admin_client(client, test_admin_user):
         sess['_fresh'] = True
 
     return client
+
+
+@pytest.fixture
+def count_queries(client):
+    """
+    Count SQL statements executed inside a `with` block.
+
+    Use this to pin an endpoint's query count so N+1 regressions show up:
+
+        with count_queries() as queries:
+            client.get('/catalog.xml')
+        assert len(queries) <= 6
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with _app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', _record)
+
+    return _count
@@ -102,6 +102,48 @@ class TestAdminCategoryManagement:
                 # Deletion prevented because category has items
                 assert b'cannot delete' in response.data.lower() or b'items' in response.data.lower()
 
+    def test_admin_update_all_counts_single_statement(self, admin_client, test_category, count_queries):
+        """Category counts are written with one UPDATE; unknown ids are ignored"""
+        with admin_client.application.app_context():
+            other = InventoryCategory(name='Second Category', image_url='fa-box', count_in_stock=0)
+            db.session.add(other)
+            db.session.commit()
+            other_id = other.id
+
+        with count_queries() as queries:
+            response = admin_client.post('/admin', data={
+                'update_all_counts': 'true',
+                f'counts_{test_category.id}': '7',
+                f'counts_{other_id}': '3',
+                'counts_999999': '5',
+                'counts_bogus': 'x',
+            }, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+        assert response.status_code == 200
+        assert response.get_json() == {'success': True, 'message': 'Updated 2 categories.'}
+        updates = [q for q in queries if q.lstrip().upper().startswith('UPDATE inventory_category'.upper())]
+        assert len(updates) == 1
+        with admin_client.application.app_context():
+            db.session.expire_all()
+            assert InventoryCategory.query.get(test_category.id).count_in_stock == 7
+            assert InventoryCategory.query.get(other_id).count_in_stock == 3
+
+    def test_bump_category_count_is_atomic_and_floors_at_zero(self, app, test_category):
+        """Stock counts change in SQL and never go below zero"""
+        from app import _bump_category_count
+
+        cat = db.session.get(InventoryCategory, test_category.id)
+        cat.count_in_stock = 1
+        db.session.commit()
+
+        _bump_category_count(cat.id, 2)
+        db.session.commit()
+        assert db.session.get(InventoryCategory, cat.id).count_in_stock == 3
+
+        _bump_category_count(cat.id, -5)
+        db.session.commit()
+        assert db.session.get(InventoryCategory, cat.id).count_in_stock == 0
+
 
 @pytest.mark.integration
 class TestAdminItemManagement:
@@ -159,6 +201,82 @@ class TestAdminItemManagement:
         with admin_client.application.app_context():
             item = InventoryItem.query.get(test_item.id)
             assert item.price == 75.00
+
+    def test_admin_bulk_approval_queues_seller_email_after_commit(self, admin_client, test_user, test_category, monkeypatch):
+        """Approving a pending item queues the seller email instead of sending inline"""
+        import app as app_module
+        with admin_client.application.app_context():
+            item = InventoryItem(description='Pending lamp', quality=4, status='pending_valuation',
+                                 category_id=test_category.id, seller_id=test_user.id, photo_url='x.jpg')
+            db.session.add(item)
+            db.session.commit()
+            item_id = item.id
+
+        queued = []
+        monkeypatch.setattr(app_module, 'queue_email', lambda *args, **kwargs: queued.append(args))
+        monkeypatch.setattr(app_module, 'send_email', lambda *args, **kwargs: pytest.fail('sent inline'))
+
+        response = admin_client.post('/admin', data={
+            'bulk_update_items': 'true',
+            f'price_{item_id}': '30.00',
+        }, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+        assert response.get_json()['success'] is True
+        assert [(to, subject) for to, subject, _ in queued] == [
+            (test_user.email, 'Your Item Has Been Approved - Campus Swap')
+        ]
+
+    def test_admin_bulk_update_without_prices_is_a_no_op(self, admin_client, count_queries):
+        """A bulk update with no price fields returns early without touching items"""
+        with count_queries() as queries:
+            response = admin_client.post('/admin', data={'bulk_update_items': 'true'},
+                                         headers={'X-Requested-With': 'XMLHttpRequest'})
+
+        assert response.get_json() == {'success': True, 'message': 'No changes.'}
+        assert not [q for q in queries if 'inventory_item' in q]
+
+    def test_admin_bulk_update_loads_items_once(self, admin_client, test_item, count_queries):
+        """Bulk update fetches items in bulk and moves category counts without reading categories"""
+        with admin_client.application.app_context():
+            other_cat = InventoryCategory(name='Other Category', image_url='fa-box', count_in_stock=0)
+            db.session.add(other_cat)
+            extra = [
+                InventoryItem(description=f'Bulk {n}', price=10.0, quality=3, status='available',
+                              category_id=test_item.category_id, photo_url='x.jpg')
+                for n in range(3)
+            ]
+            db.session.add_all(extra)
+            db.session.commit()
+            ids = [test_item.id] + [i.id for i in extra]
+            other_cat_id = other_cat.id
+            old_cat_id = test_item.category_id
+            InventoryCategory.query.get(old_cat_id).count_in_stock = len(ids)
+            db.session.commit()
+
+        data = {'bulk_update_items': 'true'}
+        for item_id in ids:
+            data[f'price_{item_id}'] = '20.00'
+            data[f'category_{item_id}'] = str(other_cat_id)
+            data[f'quality_{item_id}'] = '5'
+
+        with count_queries() as queries:
+            response = admin_client.post('/admin', data=data,
+                                         headers={'X-Requested-With': 'XMLHttpRequest'})
+
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+        item_selects = [q for q in queries if q.lstrip().upper().startswith('SELECT')
+                        and 'FROM inventory_item' in q and 'inventory_item.price' in q]
+        category_selects = [q for q in queries if q.lstrip().upper().startswith('SELECT')
+                            and 'FROM inventory_category' in q]
+        assert len(item_selects) == 1
+        assert category_selects == []
+        with admin_client.application.app_context():
+            db.session.expire_all()
+            assert InventoryCategory.query.get(other_cat_id).count_in_stock == len(ids)
+            assert InventoryCategory.query.get(old_cat_id).count_in_stock == 0
+            assert all(InventoryItem.query.get(i).price == 20.0 for i in ids)
+            assert all(InventoryItem.query.get(i).quality == 5 for i in ids)
     
     def test_admin_delete_item(self, admin_client, test_item):
         """Test that admin can delete an item"""
@@ -175,6 +293,95 @@ class TestAdminItemManagement:
             item = InventoryItem.query.get(item_id)
             assert item is None
 
+    def test_admin_delete_item_removes_gallery_photos(self, admin_client, test_item, monkeypatch):
+        """Gallery rows go in one DELETE and the files are removed after commit"""
+        import app as app_module
+        from models import ItemPhoto
+
+        item_id = test_item.id
+        with admin_client.application.app_context():
+            db.session.add_all([
+                ItemPhoto(item_id=item_id, photo_url='gallery_a.jpg'),
+                ItemPhoto(item_id=item_id, photo_url='gallery_b.jpg'),
+            ])
+            db.session.commit()
+
+        deleted = []
+        monkeypatch.setattr(app_module.photo_storage, 'delete_photo', deleted.append)
+
+        response = admin_client.post(f'/admin/item/{item_id}/delete', data={'modal': '1'})
+
+        assert response.status_code == 200
+        assert response.get_json() == {'success': True}
+        assert {'gallery_a.jpg', 'gallery_b.jpg'} <= set(deleted)
+        with admin_client.application.app_context():
+            assert db.session.get(InventoryItem, item_id) is None
+            assert ItemPhoto.query.filter_by(item_id=item_id).count() == 0
+
+    def test_admin_delete_stock_unit_keeps_sibling_photos(self, admin_client, test_item, monkeypatch):
+        """Deleting one clone of a stock group leaves the files its siblings still show"""
+        import app as app_module
+        from models import ItemPhoto
+
+        with admin_client.application.app_context():
+            item = db.session.get(InventoryItem, test_item.id)
+            db.session.add(ItemPhoto(item_id=item.id, photo_url='shared_gallery.jpg'))
+            item.stock_quantity = 2
+            db.session.flush()
+            app_module._expand_stock_group(item)
+            db.session.commit()
+            clone_id = InventoryItem.query.filter(
+                InventoryItem.stock_group_id == item.stock_group_id, InventoryItem.id != item.id
+            ).one().id
+
+        deleted = []
+        monkeypatch.setattr(app_module.photo_storage, 'delete_photo', deleted.append)
+
+        response = admin_client.post(f'/admin/item/{clone_id}/delete', data={'modal': '1'})
+
+        assert response.get_json() == {'success': True}
+        assert deleted == []
+        with admin_client.application.app_context():
+            sibling = db.session.get(InventoryItem, test_item.id)
+            assert sibling.photo_url == 'test.jpg'
+            assert [p.photo_url for p in sibling.gallery_photos] == ['shared_gallery.jpg']
+
+    def test_admin_stats_cached_until_items_change(self, app, test_item, count_queries):
+        """Dashboard counts are served from cache and rebuilt after an item changes"""
+        from app import _admin_stats
+
+        first = _admin_stats()
+        assert first['available_items'] == 1 and first['total_items'] == 1
+
+        with count_queries() as queries:
+            assert _admin_stats() == first
+        assert queries == []
+
+        db.session.get(InventoryItem, test_item.id).status = 'sold'
+        db.session.commit()
+        after = _admin_stats()
+        assert after['available_items'] == 0 and after['sold_items'] == 1
+
+    def test_admin_list_queries_eager_load_what_cards_read(self, app, test_user, test_category):
+        """raiseload('*') fence: admin list cards can read category and seller without lazy loads"""
+        from sqlalchemy.orm import raiseload
+        from app import _admin_gallery_query, _admin_pending_query
+
+        for status in ('pending_valuation', 'available', 'sold'):
+            db.session.add(InventoryItem(description=f'{status} chair', price=5.0, quality=3, status=status,
+                                         category_id=test_category.id, seller_id=test_user.id, photo_url='x.jpg'))
+        db.session.commit()
+        db.session.expunge_all()
+
+        pending = _admin_pending_query().options(raiseload('*')).all()
+        gallery = _admin_gallery_query().options(raiseload('*')).all()
+
+        assert [i.status for i in pending] == ['pending_valuation']
+        assert sorted(i.status for i in gallery) == ['available', 'sold']
+        for item in pending + gallery:
+            assert item.category.name == test_category.name
+            assert item.seller.email == test_user.email
+
 
 @pytest.mark.integration
 class TestAdminUserDeletion:
@@ -85,6 +85,68 @@ class TestRegistration:
         assert response.status_code == 200
         assert b'6 characters' in response.data.lower() or b'password' in response.data.lower()
 
+    def test_register_creates_stripe_customer_in_background(self, client, monkeypatch):
+        """Signup queues the Stripe customer so create_setup_intent can skip Customer.create"""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+        import app as app_module
+        from models import db, User
+        if app_module.limiter:
+            monkeypatch.setattr(app_module.limiter, 'enabled', False)  # /register is 3/hour
+        monkeypatch.setattr(app_module.stripe, 'api_key', 'sk_test_dummy')
+        create = MagicMock(return_value=SimpleNamespace(id='cus_123'))
+        monkeypatch.setattr(app_module.stripe.Customer, 'create', create)
+        futures = []
+        real_queue = app_module.queue_stripe_customer
+        monkeypatch.setattr(app_module, 'queue_stripe_customer',
+                            lambda uid: futures.append(real_queue(uid)))
+
+        client.post('/register', data={
+            'email': 'stripe@example.com',
+            'password': 'password123',
+            'full_name': 'Stripe User',
+            'phone': '555-123-4567'
+        })
+        assert len(futures) == 1
+        futures[0].result(timeout=5)
+
+        with client.application.app_context():
+            user = User.query.filter_by(email='stripe@example.com').first()
+            assert user.stripe_customer_id == 'cus_123'
+            key = create.call_args.kwargs['idempotency_key']
+            assert key.startswith(f'customer-user-{user.id}-')
+            # Same user row, same key; a reused id with another email gets a different one
+            assert app_module._create_stripe_customer(user) == 'cus_123'
+            assert create.call_args.kwargs['idempotency_key'] == key
+            user.email = 'someone-else@example.com'
+            app_module._create_stripe_customer(user)
+            assert create.call_args.kwargs['idempotency_key'] != key
+
+    def test_register_applies_pending_admin_email_in_the_insert(self, client, count_queries, monkeypatch):
+        """A pre-approved admin email is promoted in the same transaction as the new user row"""
+        import app as app_module
+        from models import db, User, AdminEmail
+        if app_module.limiter:
+            monkeypatch.setattr(app_module.limiter, 'enabled', False)  # /register is 3/hour
+        with client.application.app_context():
+            db.session.add(AdminEmail(email='boss@example.com', is_super_admin=True))
+            db.session.commit()
+
+        with count_queries() as queries:
+            client.post('/register', data={
+                'email': 'boss@example.com',
+                'password': 'password123',
+                'full_name': 'Boss',
+                'phone': '555-123-4567'
+            })
+        assert not any(q.lstrip().upper().startswith('UPDATE USER') or
+                       q.lstrip().upper().startswith('UPDATE "USER"') for q in queries)
+
+        with client.application.app_context():
+            user = User.query.filter_by(email='boss@example.com').first()
+            assert user.is_admin and user.is_super_admin
+            assert AdminEmail.query.filter_by(email='boss@example.com').count() == 0
+
 
 @pytest.mark.integration
 class TestLogin:
@@ -124,7 +186,21 @@ class TestLogin:
         
         assert response.status_code == 200
         assert b'invalid' in response.data.lower() or b'incorrect' in response.data.lower() or b'wrong' in response.data.lower()
-    
+
+    def test_login_upgrades_legacy_hash_to_argon2(self, client, test_user):
+        """A PBKDF2 hash from before the Argon2 switch is rehashed on successful login."""
+        from models import db, User, check_password_hash
+        client.post('/login', data={
+            'email': test_user.email,
+            'password': 'testpass123',
+            'form_type': 'login'
+        })
+        with client.application.app_context():
+            user = db.session.get(User, test_user.id)
+            assert user.password_hash.startswith('$argon2id$')
+            assert check_password_hash(user.password_hash, 'testpass123')
+            assert not check_password_hash(user.password_hash, 'wrongpassword')
+
     def test_login_nonexistent_user(self, client):
         """Test that logging in with non-existent email shows error"""
         response = client.post('/login', data={
@@ -136,6 +212,21 @@ class TestLogin:
         assert response.status_code == 200
         assert b'not found' in response.data.lower() or b'create' in response.data.lower()
     
+    def test_login_nonexistent_user_still_verifies_a_hash(self, client, monkeypatch):
+        """Unknown emails are checked against the dummy hash so timing matches a wrong password"""
+        import app as app_module
+        checked = []
+        real_check = app_module.check_password_hash
+        monkeypatch.setattr(app_module, 'check_password_hash',
+                            lambda h, pw: checked.append(h) or real_check(h, pw))
+        monkeypatch.setattr(app_module, 'render_template', lambda *a, **kw: '')
+        client.post('/login', data={
+            'email': 'nonexistent@example.com',
+            'password': 'password123',
+            'form_type': 'login'
+        })
+        assert checked == [app_module.DUMMY_PASSWORD_HASH]
+
     def test_login_invalid_email_format(self, client):
         """Test that invalid email format is rejected"""
         response = client.post('/login', data={
@@ -175,6 +266,78 @@ class TestLogout:
         assert b'campus swap' in response.data.lower() or response.request.path == '/'
 
 
+@pytest.mark.integration
+class TestLoadUser:
+    """Test the Flask-Login user loader"""
+
+    def test_malformed_session_user_id_is_anonymous(self, client, test_user):
+        """Test that a garbage user id in the session cookie loads no user instead of raising"""
+        from app import load_user
+        with client.application.app_context():
+            assert load_user('not-a-number') is None
+            assert load_user(None) is None
+            assert load_user(str(test_user.id)).email == test_user.email
+
+
+@pytest.mark.integration
+class TestBecomeASellerSignup:
+    """Test the email capture form on /become-a-seller"""
+
+    def test_pickup_closed_saves_guest_email(self, client):
+        """When pickups are closed, a new email is saved as a guest and redirected back"""
+        from models import User, AppSetting
+        with client.application.app_context():
+            AppSetting.set('pickup_period_active', 'false')
+
+        response = client.post('/become-a-seller', data={'email': 'lead@example.com'})
+        assert response.status_code == 302
+        assert '/become-a-seller' in response.headers['Location']
+        with client.application.app_context():
+            user = User.query.filter_by(email='lead@example.com').first()
+            assert user is not None
+            assert not user.is_seller
+
+    def test_pickup_open_creates_seller(self, client):
+        """When pickups are open, a new email becomes a seller account and is logged in"""
+        from models import User, AppSetting
+        with client.application.app_context():
+            AppSetting.set('pickup_period_active', 'true')
+
+        response = client.post('/become-a-seller', data={'email': 'newseller@example.com'})
+        assert response.status_code == 302
+        with client.application.app_context():
+            user = User.query.filter_by(email='newseller@example.com').first()
+            assert user is not None
+            assert user.is_seller
+
+    def test_existing_account_with_password_redirects_to_login(self, client, test_user):
+        """An email that already has a password isn't duplicated; the visitor is sent to log in"""
+        from models import User, AppSetting
+        with client.application.app_context():
+            AppSetting.set('pickup_period_active', 'true')
+
+        response = client.post('/become-a-seller', data={'email': test_user.email})
+        assert response.status_code == 302
+        assert '/login' in response.headers['Location']
+        with client.application.app_context():
+            assert User.query.filter_by(email=test_user.email).count() == 1
+
+    def test_existing_guest_is_upgraded_to_seller(self, client):
+        """A passwordless guest signing up again becomes a seller instead of a duplicate row"""
+        from models import db, User, AppSetting
+        with client.application.app_context():
+            AppSetting.set('pickup_period_active', 'true')
+            db.session.add(User(email='guest@example.com'))
+            db.session.commit()
+
+        response = client.post('/become-a-seller', data={'email': 'guest@example.com'})
+        assert response.status_code == 302
+        with client.application.app_context():
+            users = User.query.filter_by(email='guest@example.com').all()
+            assert len(users) == 1
+            assert users[0].is_seller
+
+
 @pytest.mark.integration
 class TestProtectedRoutes:
     """Test that protected routes require authentication"""
@@ -197,3 +360,47 @@ class TestProtectedRoutes:
         response = client.get('/add_item', follow_redirects=True)
         assert response.status_code == 200
         assert b'login' in response.data.lower()
+
+
+@pytest.mark.integration
+class TestAccountInfo:
+    """Test the account settings update route"""
+
+    def test_update_account_info_commits_once(self, authenticated_client, test_user, count_queries):
+        """Name/phone and pickup preferences are saved in a single UPDATE"""
+        from models import db, User
+        with authenticated_client.application.app_context():
+            user = db.session.get(User, test_user.id)
+            user.pickup_week = 'week1'
+            db.session.commit()
+
+        with count_queries() as queries:
+            response = authenticated_client.post('/update_account_info', data={
+                'full_name': 'Renamed User',
+                'phone': '',
+                'pickup_time_preference': 'morning',
+                'moveout_date': '2026-05-02',
+            })
+        assert response.status_code == 302
+        assert sum(1 for q in queries if q.lstrip().upper().startswith('UPDATE')) == 1, queries
+
+        with authenticated_client.application.app_context():
+            user = db.session.get(User, test_user.id)
+            assert user.full_name == 'Renamed User'
+            assert user.pickup_time_preference == 'morning'
+            assert str(user.moveout_date) == '2026-05-02'
+
+    def test_update_account_info_skips_commit_when_unchanged(self, authenticated_client, test_user, count_queries):
+        """Re-posting the saved name/phone issues no UPDATE"""
+        from models import db, User
+        with authenticated_client.application.app_context():
+            db.session.get(User, test_user.id).phone = '5551234567'
+            db.session.commit()
+
+        with count_queries() as queries:
+            response = authenticated_client.post('/update_account_info', data={
+                'full_name': test_user.full_name,
+                'phone': '(555) 123-4567',
+            })
+        assert response.status_code == 302
+        assert not any(q.lstrip().upper().startswith('UPDATE') for q in queries), queries
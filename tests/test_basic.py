@@ -67,6 +67,187 @@ def test_sitemap_generates(client):
     assert b'urlset' in response.data
 
 
+def test_sitemap_is_cached(client):
+    """
+    Test that sitemap.xml is served from the in-process cache on repeat hits.
+
+    Crawlers hit the sitemap often, so it should not rebuild every time.
+    """
+    from app import _sitemap_cache
+    _sitemap_cache["xml"] = None
+
+    first = client.get('/sitemap.xml')
+    assert first.status_code == 200
+    assert 'max-age' in first.headers.get('Cache-Control', '')
+    # The first hit streams; the cache is filled once the body has been sent
+    assert first.data.endswith(b'</urlset>')
+    assert _sitemap_cache["xml"] == first.data.decode()
+
+    _sitemap_cache["xml"] = _sitemap_cache["xml"].replace('</urlset>', '<!-- cached --></urlset>')
+    second = client.get('/sitemap.xml')
+    assert b'<!-- cached -->' in second.data
+    _sitemap_cache["xml"] = None
+
+
+def test_favicon_served_from_memory_with_etag(client, monkeypatch):
+    """
+    Test that the favicon comes from the bytes loaded at startup and honours If-None-Match.
+    """
+    import app as app_module
+    monkeypatch.setattr(app_module, '_FAVICON_BYTES', b'\x89PNG fake')
+    monkeypatch.setattr(app_module, '_FAVICON_ETAG', 'abc123')
+
+    response = client.get('/favicon.png')
+    assert response.status_code == 200
+    assert response.data == b'\x89PNG fake'
+    assert response.headers['ETag'] == '"abc123"'
+
+    cached = client.get('/favicon.ico', headers={'If-None-Match': '"abc123"'})
+    assert cached.status_code == 304
+
+
+def test_uploads_are_cacheable_for_a_year(client, tmp_path, monkeypatch):
+    """
+    Test that uploaded photos are served with a long immutable cache lifetime and honour If-None-Match.
+    """
+    (tmp_path / 'item_1_1700000000_ab12cd34_0.jpg').write_bytes(b'\xff\xd8 fake jpeg')
+    monkeypatch.setitem(client.application.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    response = client.get('/uploads/item_1_1700000000_ab12cd34_0.jpg')
+    assert response.status_code == 200
+    assert response.data == b'\xff\xd8 fake jpeg'
+    cache_control = response.headers['Cache-Control']
+    assert 'max-age=31536000' in cache_control and 'immutable' in cache_control
+
+    cached = client.get('/uploads/item_1_1700000000_ab12cd34_0.jpg', headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_uploads_without_random_token_are_revalidated(client, tmp_path, monkeypatch):
+    """
+    Test that names without a random token, which could be rewritten in place, are not marked immutable.
+    """
+    (tmp_path / 'item_1_1700000000_0.jpg').write_bytes(b'\xff\xd8 fake jpeg')
+    monkeypatch.setitem(client.application.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    response = client.get('/uploads/item_1_1700000000_0.jpg')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+    assert 'ETag' in response.headers
+
+
+def test_uploads_hand_off_to_proxy_when_configured(client, monkeypatch):
+    """
+    Test that with UPLOADS_ACCEL_PREFIX set the body is left to nginx via X-Accel-Redirect.
+    """
+    import app as app_module
+    monkeypatch.setattr(app_module, 'UPLOADS_ACCEL_PREFIX', '/_uploads/')
+
+    response = client.get('/uploads/item_1_1700000000_0.jpg')
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == '/_uploads/item_1_1700000000_0.jpg'
+    assert response.mimetype == 'image/jpeg'
+
+    response = client.get('/uploads/item%201%3F.jpg')
+    assert response.headers['X-Accel-Redirect'] == '/_uploads/item%201%3F.jpg'
+
+
+def test_sitemap_lists_live_items(client, test_item):
+    """
+    Test that a shop-visible item shows up in the sitemap with its lastmod date.
+    """
+    from datetime import datetime
+    from app import db, _sitemap_cache
+    from models import ItemPhoto, InventoryItem
+    _sitemap_cache["xml"] = None
+    with client.application.app_context():
+        db.session.add(ItemPhoto(item_id=test_item.id, photo_url='x.jpg', captured_at=datetime.utcnow()))
+        item = db.session.get(InventoryItem, test_item.id)
+        item.date_added = datetime(2026, 5, 1)
+        db.session.commit()
+
+    response = client.get('/sitemap.xml')
+    assert f'/item/{test_item.id}</loc>'.encode() in response.data
+    assert b'<lastmod>2026-05-01</lastmod>' in response.data
+    _sitemap_cache["xml"] = None
+
+
+def test_catalog_feed_query_count_does_not_grow_with_items(client, test_user, test_category, count_queries):
+    """
+    Test that the Meta catalog feed loads categories/photos in bulk, not per item.
+    """
+    from datetime import datetime
+    from app import db, _catalog_cache
+    from models import InventoryItem, ItemPhoto, StorageLocation
+
+    def add_items(n):
+        with client.application.app_context():
+            unit = StorageLocation.query.first()
+            if not unit:
+                unit = StorageLocation(name='Unit A')
+                db.session.add(unit)
+                db.session.flush()
+            for i in range(n):
+                item = InventoryItem(
+                    description=f'Desk {i}', price=40, quality=4, status='available',
+                    category_id=test_category.id, seller_id=test_user.id,
+                    photo_url='cover.jpg', ai_approved=True, storage_location_id=unit.id,
+                )
+                db.session.add(item)
+                db.session.flush()
+                db.session.add(ItemPhoto(item_id=item.id, photo_url=f'g{i}.jpg', captured_at=datetime.utcnow()))
+            db.session.commit()
+
+    def feed_queries():
+        _catalog_cache["xml"] = None
+        with count_queries() as queries:
+            response = client.get('/catalog.xml')
+        assert response.status_code == 200
+        return len(queries)
+
+    add_items(2)
+    few = feed_queries()
+    add_items(8)
+    many = feed_queries()
+    _catalog_cache["xml"] = None
+    assert many == few
+
+
+def test_static_page_cached_for_anonymous_visitors(client, monkeypatch):
+    """
+    Test that content-only pages render once for anonymous visitors.
+    """
+    import app as app_module
+    calls = []
+    monkeypatch.setattr(app_module, 'render_template', lambda name, **kw: calls.append(name) or name)
+    app_module._static_page_cache.clear()
+
+    client.get('/privacy-policy')
+    client.get('/privacy-policy')
+    assert calls == ['privacy_policy.html']
+
+    monkeypatch.setattr(app_module, 'STATIC_PAGE_CACHE_TTL', 0)
+    client.get('/privacy-policy')
+    assert calls == ['privacy_policy.html', 'privacy_policy.html']
+    app_module._static_page_cache.clear()
+
+
+def test_static_page_not_cached_for_logged_in_users(authenticated_client, monkeypatch):
+    """
+    Test that logged-in users always get a fresh render (the layout shows their nav).
+    """
+    import app as app_module
+    calls = []
+    monkeypatch.setattr(app_module, 'render_template', lambda name, **kw: calls.append(name) or name)
+    app_module._static_page_cache.clear()
+
+    authenticated_client.get('/privacy-policy')
+    authenticated_client.get('/privacy-policy')
+    assert calls == ['privacy_policy.html', 'privacy_policy.html']
+    assert not app_module._static_page_cache
+
+
 def test_robots_txt_exists(client):
     """
     Test that robots.txt exists.
@@ -76,3 +257,156 @@ def test_robots_txt_exists(client):
     response = client.get('/robots.txt')
     assert response.status_code == 200
     assert b'User-agent' in response.data
+
+
+def test_robots_txt_points_at_requesting_host(client):
+    """
+    Test that robots.txt names the sitemap on the host it was requested from, cached per host.
+    """
+    from app import _robots_cache
+    _robots_cache.clear()
+
+    response = client.get('/robots.txt', base_url='https://example.com')
+    assert response.data.endswith(b'Sitemap: https://example.com/sitemap.xml')
+    assert 'max-age' in response.headers.get('Cache-Control', '')
+
+    other = client.get('/robots.txt', base_url='https://other.example.com')
+    assert b'Sitemap: https://other.example.com/sitemap.xml' in other.data
+    assert len(_robots_cache) == 2
+    _robots_cache.clear()
+
+
+def test_stored_jpeg_is_draft_decoded(monkeypatch):
+    """Test that storage DCT-downscales large JPEGs on decode before the final resize"""
+    from io import BytesIO
+    from PIL import Image, JpegImagePlugin
+    from storage import _process_image
+
+    buf = BytesIO()
+    Image.new('RGB', (4000, 3000), (200, 40, 40)).save(buf, 'JPEG')
+    buf.seek(0)
+    drafts = []
+    real_draft = JpegImagePlugin.JpegImageFile.draft
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, 'draft',
+                        lambda self, mode, size: drafts.append(size) or real_draft(self, mode, size))
+
+    out = Image.open(BytesIO(_process_image(buf)))
+
+    assert drafts == [(2000, 1500)]
+    assert out.mode == 'RGB' and out.size == (2000, 1500)
+
+
+def test_stored_photo_keeps_aspect_when_downscaled():
+    """Test that oversized stored photos fit within MAX_DIMENSION with aspect preserved"""
+    from io import BytesIO
+    from PIL import Image
+    from storage import _process_image, MAX_DIMENSION
+
+    buf = BytesIO()
+    Image.new('RGBA', (3000, 6000), (10, 120, 10, 255)).save(buf, 'PNG')
+    buf.seek(0)
+
+    out = Image.open(BytesIO(_process_image(buf)))
+
+    assert out.size == (MAX_DIMENSION // 2, MAX_DIMENSION)
+    r, g, b = out.getpixel((500, 1000))
+    assert abs(r - 10) < 8 and abs(g - 120) < 8 and abs(b - 10) < 8
+
+
+def test_stored_photo_flattens_transparency_onto_white():
+    """Test that transparent uploads are composited onto white and opaque ones pass through"""
+    from io import BytesIO
+    from PIL import Image
+    from storage import _process_image
+
+    def roundtrip(img, fmt):
+        buf = BytesIO()
+        img.save(buf, fmt)
+        buf.seek(0)
+        return Image.open(BytesIO(_process_image(buf)))
+
+    clear = roundtrip(Image.new('RGBA', (40, 40), (0, 0, 0, 0)), 'PNG')
+    assert clear.mode == 'RGB'
+    assert all(c > 245 for c in clear.getpixel((20, 20)))
+
+    gray = roundtrip(Image.new('L', (40, 40), 60), 'PNG')
+    assert gray.mode == 'RGB'
+    assert all(abs(c - 60) < 8 for c in gray.getpixel((20, 20)))
+
+
+def test_flatten_to_rgb_only_composites_transparent_images():
+    """Test that opaque uploads pass through and transparent ones land on white"""
+    from PIL import Image
+    from app import _flatten_to_rgb
+
+    opaque = Image.new('RGB', (8, 8), (1, 2, 3))
+    assert _flatten_to_rgb(opaque) is opaque
+
+    clear = _flatten_to_rgb(Image.new('RGBA', (8, 8), (0, 0, 0, 0)))
+    assert clear.mode == 'RGB' and clear.getpixel((4, 4)) == (255, 255, 255)
+
+    palette = Image.new('P', (8, 8), 0)
+    palette.info['transparency'] = 0
+    assert _flatten_to_rgb(palette).getpixel((4, 4)) == (255, 255, 255)
+
+    assert _flatten_to_rgb(Image.new('L', (8, 8), 40)).getpixel((4, 4)) == (40, 40, 40)
+
+
+def test_local_storage_writes_and_deletes_one_resized_photo(tmp_path):
+    """Test that save_photo writes a single downscaled progressive JPEG and delete_photo removes it"""
+    from io import BytesIO
+    from PIL import Image
+    from storage import LocalStorage
+
+    buf = BytesIO()
+    Image.new('RGB', (3000, 1500), (90, 90, 90)).save(buf, 'JPEG')
+    buf.seek(0)
+    store = LocalStorage(str(tmp_path))
+
+    store.save_photo(buf, 'item_1_1.jpg')
+
+    assert [p.name for p in tmp_path.iterdir()] == ['item_1_1.jpg']
+    assert Image.open(tmp_path / 'item_1_1.jpg').size == (2000, 1000)
+    assert Image.open(tmp_path / 'item_1_1.jpg').info.get('progressive')
+
+    assert store.delete_photo('item_1_1.jpg') is True
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_local_storage_moves_temp_photo_and_reports_missing(tmp_path):
+    """Test that move_photo_from_path renames the temp file in and raises once it is gone"""
+    from storage import LocalStorage
+
+    temp = tmp_path / 'temp_abc.jpg'
+    temp.write_bytes(b'jpeg')
+    store = LocalStorage(str(tmp_path / 'uploads'))
+
+    assert store.move_photo_from_path(str(temp), 'item_1_0.jpg') == 'item_1_0.jpg'
+    assert (tmp_path / 'uploads' / 'item_1_0.jpg').read_bytes() == b'jpeg'
+    assert not temp.exists()
+    with pytest.raises(FileNotFoundError):
+        store.move_photo_from_path(str(temp), 'item_1_1.jpg')
+
+
+def test_save_photos_stores_every_upload_and_reraises(monkeypatch):
+    """Test that multi-photo saves run on worker threads, surface a failed save and clean up the rest"""
+    import threading
+    import app as app_module
+
+    saved = []
+    monkeypatch.setattr(app_module.photo_storage, 'save_photo',
+                        lambda file, key: saved.append((key, threading.current_thread().name)))
+    app_module._save_photos([(object(), f'item_1_{n}.jpg') for n in range(3)])
+    assert sorted(key for key, _ in saved) == ['item_1_0.jpg', 'item_1_1.jpg', 'item_1_2.jpg']
+    assert all(name != threading.current_thread().name for _, name in saved)
+
+    def boom(file, key):
+        if key == 'b.jpg':
+            raise OSError('disk full')
+    deleted = []
+    monkeypatch.setattr(app_module.photo_storage, 'save_photo', boom)
+    monkeypatch.setattr(app_module.photo_storage, 'delete_photo', deleted.append)
+    with pytest.raises(OSError):
+        app_module._save_photos([(object(), 'a.jpg'), (object(), 'b.jpg'), (object(), 'c.jpg')])
+    # Photos that did save are removed so the failed post leaves no orphans
+    assert sorted(deleted) == ['a.jpg', 'c.jpg']
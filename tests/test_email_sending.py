@@ -14,7 +14,7 @@ Run: pytest tests/test_email_sending.py -v
 import pytest
 from unittest.mock import patch, MagicMock, call
 import app
-from app import db, User, send_email, wrap_email_template, html_to_text, ensure_unsubscribe_token
+from app import db, User, send_email, wrap_email_template, html_to_text, make_unsubscribe_token
 
 
 @pytest.mark.integration
@@ -100,7 +100,7 @@ class TestSendEmailFunction:
         mock_send.return_value = {'id': 'test_email_id'}
         
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
             result = send_email(
                 to_email=test_user.email,
                 subject='Marketing Email',
@@ -205,6 +205,38 @@ class TestSendEmailFunction:
         assert result == False
         mock_send.assert_called_once()
 
+    @patch('app.resend.Emails.send')
+    def test_queue_email_sends_on_background_thread(self, mock_send, client, test_user):
+        """Test that queue_email delivers through send_email off the calling thread"""
+        import threading
+        app.resend.api_key = 'test_api_key'
+        sender_threads = []
+        mock_send.side_effect = lambda data: sender_threads.append(threading.current_thread().name)
+
+        with client.application.app_context():
+            future = app.queue_email(test_user.email, 'Queued', '<p>Later</p>')
+        assert future.result(timeout=5) == True
+
+        assert mock_send.call_args[0][0]['subject'] == 'Queued'
+        assert sender_threads and sender_threads[0].startswith('email')
+
+    @patch('app.queue_email')
+    def test_register_queues_welcome_email(self, mock_queue, client, monkeypatch):
+        """Test that signup hands the welcome email to the background queue"""
+        if app.limiter:
+            monkeypatch.setattr(app.limiter, 'enabled', False)  # /register is 3/hour
+        response = client.post('/register', data={
+            'email': 'welcome@example.com',
+            'password': 'password123',
+            'full_name': 'Welcome User',
+            'phone': '555-123-4567'
+        })
+
+        assert response.status_code == 302
+        mock_queue.assert_called_once()
+        assert mock_queue.call_args[0][0] == 'welcome@example.com'
+        assert mock_queue.call_args[0][1] == 'Welcome to Campus Swap!'
+
 
 @pytest.mark.integration
 class TestEmailTemplateWrapping:
@@ -215,7 +247,7 @@ class TestEmailTemplateWrapping:
         from flask import url_for
         
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
             unsubscribe_url = url_for('unsubscribe', token=token, _external=True)
             
             html_content = '<p>Marketing content</p>'
@@ -253,7 +285,7 @@ class TestEmailTemplateWrapping:
         from flask import url_for
         
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
             unsubscribe_url = url_for('unsubscribe', token=token, _external=True)
             
             wrapped = wrap_email_template('<p>Content</p>', unsubscribe_url, is_marketing=True)
@@ -299,6 +331,70 @@ class TestHtmlToText:
         assert 'Important' in text
         assert 'Your item has sold' in text
 
+    def test_html_to_text_keeps_unclosed_brackets(self):
+        """Test that stray '<' with no closing '>' is left as text, not swallowed"""
+        text = html_to_text('<p>Total</p> is <b>5</b> <3')
+        assert text == 'Total is 5 <3'
+
+    def test_html_to_text_malformed_input_is_fast(self):
+        """Test that a long run of '<' with no '>' doesn't backtrack quadratically"""
+        import time
+        start = time.time()
+        html_to_text('<' * 200000)
+        assert time.time() - start < 1.0
+
+
+@pytest.mark.integration
+class TestTransactionalEmailContent:
+    """Test the HTML bodies of transactional emails"""
+
+    def test_item_sold_email_escapes_seller_text(self):
+        """Test that seller-entered fields can't inject markup into the sold email"""
+        from types import SimpleNamespace
+        from app import _item_sold_email_html
+        item = SimpleNamespace(description='<script>x</script> Lamp', price=40)
+        seller = SimpleNamespace(payout_method='Venmo', payout_handle='<b>me</b>')
+        html = _item_sold_email_html(item, seller)
+        assert '<script>' not in html
+        assert '&lt;script&gt;x&lt;/script&gt; Lamp' in html
+        assert '(@&lt;b&gt;me&lt;/b&gt;)' in html
+        assert '$40.00' in html and '$20.00' in html
+
+    def test_item_approved_email_escapes_description(self, app):
+        """Test that the approval email escapes the description and names the next step"""
+        from types import SimpleNamespace
+        from app import _item_approved_email_html
+        item = SimpleNamespace(description='<img src=x onerror=alert(1)> Desk', collection_method='free')
+        with app.test_request_context():
+            html = _item_approved_email_html(item, 35)
+        assert '<img' not in html
+        assert '&lt;img src=x onerror=alert(1)&gt; Desk' in html
+        assert '$35.00' in html and 'no payment required' in html
+        assert '/dashboard' in html
+
+    def test_dashboard_url_built_once_per_request(self, app):
+        """Test that bulk emails in one request share a single dashboard url_for call"""
+        from types import SimpleNamespace
+        from flask import url_for
+        from app import _item_approved_email_html
+        item = SimpleNamespace(description='Desk', collection_method='online')
+        with patch('app.url_for', wraps=url_for) as mock_url_for:
+            with app.test_request_context():
+                first = _item_approved_email_html(item, 10)
+                second = _item_approved_email_html(item, 20)
+        assert mock_url_for.call_count == 1
+        assert '/dashboard' in first and '/dashboard' in second
+
+    def test_welcome_email_escapes_name(self, app):
+        """Test that the signup welcome email escapes the user-entered name"""
+        from app import _welcome_email_html
+        with app.test_request_context():
+            html = _welcome_email_html('<b>Eve</b>')
+            guest_html = _welcome_email_html(None, converted_guest=True)
+        assert '<b>Eve</b>' not in html
+        assert 'Hi &lt;b&gt;Eve&lt;/b&gt;,' in html
+        assert 'Hi there,' in guest_html and 'all set to start selling' in guest_html
+
 
 @pytest.mark.integration
 class TestMassEmail:
@@ -374,6 +470,20 @@ class TestMassEmail:
         # Unsubscribed user should not be in the list
         assert test_user.email not in emails_sent_to
     
+    def test_marketing_recipients_filters_unsubscribed_in_query(self, app, test_user):
+        """Test that marketing_recipients returns (id, email) rows for subscribed users only"""
+        from app import marketing_recipients
+        with app.app_context():
+            opted_out = User(email='optedout@test.com', password_hash='hash', unsubscribed=True)
+            db.session.add(opted_out)
+            db.session.commit()
+
+            rows = marketing_recipients()
+            assert (test_user.id, test_user.email) in [tuple(r) for r in rows]
+            assert 'optedout@test.com' not in [r.email for r in rows]
+
+            assert marketing_recipients(user_ids=[opted_out.id]) == []
+
     def test_mass_email_requires_admin(self, client, test_user):
         """Test that mass email requires admin access"""
         response = client.post('/admin/mass-email', data={
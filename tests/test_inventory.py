@@ -56,6 +56,94 @@ class TestInventoryPage:
         # Check that search is preserved in links (may be in URL or form)
         assert item_link.encode() in response.data
 
+    def test_shop_cursor_round_trip(self):
+        """Test the keyset cursor used by infinite scroll encodes/decodes, and rejects junk"""
+        from datetime import datetime
+        from types import SimpleNamespace
+        from app import _encode_shop_cursor, _decode_shop_cursor
+        added = datetime(2026, 5, 1, 12, 30, 15, 123456)
+        cursor = _encode_shop_cursor(SimpleNamespace(date_added=added, id=42))
+        assert _decode_shop_cursor(cursor) == (added, 42)
+        assert _decode_shop_cursor('garbage') is None
+        assert _decode_shop_cursor('') is None
+
+    def test_shop_ajax_scroll_accepts_cursor(self, client, monkeypatch):
+        """Test that an ajax batch with ?after= returns has_next and the next cursor"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'render_template', lambda *a, **kw: '')
+        response = client.get('/shop?ajax=1&after=2026-05-01T12:30:15_42')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['has_next'] is False
+        assert data['next_after'] is None
+
+    def test_shop_query_does_not_select_long_text_columns(self, client, monkeypatch, count_queries):
+        """Test that the shop grid SELECT leaves out long_description and other card-unused text"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'render_template', lambda *a, **kw: '')
+        with count_queries() as queries:
+            client.get('/shop?ajax=1')
+        item_selects = [q for q in queries if 'FROM inventory_item' in q and 'inventory_item.description' in q]
+        assert item_selects
+        assert not any('long_description' in q.split('FROM')[0] for q in item_selects)
+
+    def test_anonymous_shop_render_is_cached_until_items_change(self, client, monkeypatch, test_category):
+        """Test that anonymous /shop hits reuse the render, and an item write invalidates it"""
+        import app as app_module
+        from app import db
+        from models import InventoryItem
+        calls = []
+        monkeypatch.setattr(app_module, 'render_template', lambda name, **kw: calls.append(name) or 'shop')
+
+        assert client.get('/shop?page=1').data == b'shop'
+        assert client.get('/shop?page=1').data == b'shop'
+        assert len(calls) == 1
+        client.get('/shop?page=2')
+        assert len(calls) == 2
+
+        with client.application.app_context():
+            db.session.add(InventoryItem(description='New', price=5, category_id=test_category.id))
+            db.session.commit()
+        client.get('/shop?page=1')
+        assert len(calls) == 3
+
+    def test_shop_cache_ignores_unknown_params_and_is_capped(self, client, monkeypatch):
+        """Test that junk query params share one cached render and the cache stays under its cap"""
+        import app as app_module
+        calls = []
+        monkeypatch.setattr(app_module, 'render_template', lambda name, **kw: calls.append(name) or 'shop')
+        monkeypatch.setattr(app_module, 'SHOP_CACHE_MAX_ENTRIES', 2)
+
+        client.get('/shop?utm_source=a')
+        client.get('/shop?utm_source=b&x=1')
+        assert len(calls) == 1
+
+        for n in range(5):
+            client.get(f'/shop?search=q{n}')
+        assert len(app_module._shop_page_cache) == 2
+
+    def test_shop_cache_cleared_after_commit_and_on_teaser_toggle(self, client, monkeypatch, test_category):
+        """Test that an item write drops cached pages only once it commits, as does a teaser-mode change"""
+        import app as app_module
+        from app import db
+        from models import AppSetting, InventoryItem
+        monkeypatch.setattr(app_module, 'render_template', lambda name, **kw: 'shop')
+
+        client.get('/shop')
+        assert app_module._shop_page_cache
+        with client.application.app_context():
+            db.session.add(InventoryItem(description='New', price=5, category_id=test_category.id))
+            db.session.flush()
+            assert app_module._shop_page_cache
+            db.session.commit()
+        assert not app_module._shop_page_cache
+
+        client.get('/shop')
+        assert app_module._shop_page_cache
+        with client.application.app_context():
+            AppSetting.set('shop_teaser_mode', 'false')
+        assert not app_module._shop_page_cache
+
 
 @pytest.mark.integration
 class TestProductDetail:
@@ -94,6 +182,21 @@ class TestProductDetail:
         if test_item.long_description:
             assert test_item.long_description.encode() in response.data
 
+    def test_share_card_revalidates_with_etag(self, client, test_item, monkeypatch):
+        """Test that a matching If-None-Match gets a 304 without re-rendering the card"""
+        import app as app_module
+        renders = []
+        monkeypatch.setattr(app_module, '_generate_share_card_png',
+                            lambda item: renders.append(item.id) or b'png')
+
+        first = client.get(f'/share/item/{test_item.id}/card.png')
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+
+        again = client.get(f'/share/item/{test_item.id}/card.png', headers={'If-None-Match': etag})
+        assert again.status_code == 304
+        assert renders == [test_item.id]
+
 
 @pytest.mark.integration
 class TestBuyItem:
@@ -162,3 +265,299 @@ class TestBuyItem:
         assert (b'not available' in response.data.lower() or
                 b'not yet available' in response.data.lower() or
                 b'invalid' in response.data.lower())
+
+    def test_buy_item_db_error_rolls_back_and_redirects(self, client, test_item, monkeypatch):
+        """Test that a database error while loading the item rolls the session back instead of 500ing"""
+        from sqlalchemy.exc import OperationalError
+        from app import db
+
+        def broken_get(*args, **kwargs):
+            raise OperationalError('SELECT', {}, Exception('connection lost'))
+        rollbacks = []
+        monkeypatch.setattr(db.session, 'get', broken_get)
+        monkeypatch.setattr(db.session, 'rollback', lambda: rollbacks.append(True))
+
+        response = client.get(f'/buy_item/{test_item.id}', follow_redirects=False)
+        assert response.status_code == 302
+        assert rollbacks == [True]
+
+    def test_claim_item_for_sale_only_succeeds_once(self, app, test_item, test_category):
+        """Test that the webhook's conditional UPDATE sells an item once and decrements stock once"""
+        from app import db, _claim_item_for_sale, InventoryItem, InventoryCategory
+        category = db.session.get(InventoryCategory, test_category.id)
+        category.count_in_stock = 3
+        db.session.commit()
+
+        assert _claim_item_for_sale(str(test_item.id)) is True
+        db.session.commit()
+        assert _claim_item_for_sale(test_item.id) is False
+        db.session.commit()
+
+        item = db.session.get(InventoryItem, test_item.id)
+        assert item.status == 'sold' and item.sold_at is not None
+        assert db.session.get(InventoryCategory, test_category.id).count_in_stock == 2
+
+    def test_release_paid_pickup_items_bulk_updates_once(self, app, test_user, test_category):
+        """Test that paid pickup release flips only the seller's pending items and bumps stock per category"""
+        from app import db, _release_paid_pickup_items, InventoryItem, InventoryCategory, User
+        other = User(email='other@test.com', password_hash='hash')
+        db.session.add(other)
+        db.session.flush()
+
+        def make(seller, status, method='online'):
+            item = InventoryItem(description='Lamp', quality=3, price=10, status=status,
+                                 category_id=test_category.id, seller_id=seller.id, collection_method=method)
+            db.session.add(item)
+            return item
+        mine = [make(test_user, 'pending_logistics'), make(test_user, 'pending_logistics')]
+        dropoff = make(test_user, 'pending_logistics', method='dropoff')
+        live = make(test_user, 'available')
+        theirs = make(other, 'pending_logistics')
+        db.session.commit()
+        ids = [i.id for i in mine + [dropoff, live, theirs]]
+
+        released = _release_paid_pickup_items(ids, test_user.id, 'week1', online_only=True)
+        db.session.commit()
+        assert _release_paid_pickup_items(ids, test_user.id, 'week1', online_only=True) == []
+        db.session.expire_all()  # the rows were inserted in this session; read back what the UPDATE wrote
+
+        assert sorted(released) == sorted(i.id for i in mine)
+        assert {db.session.get(InventoryItem, i.id).status for i in mine} == {'available'}
+        assert db.session.get(InventoryItem, mine[0].id).pickup_week == 'week1'
+        assert db.session.get(InventoryItem, dropoff.id).status == 'pending_logistics'
+        assert db.session.get(InventoryItem, theirs.id).status == 'pending_logistics'
+        assert db.session.get(InventoryCategory, test_category.id).count_in_stock == 2
+
+
+@pytest.mark.integration
+class TestUploadSession:
+    """Test phone photo upload sessions (QR code, expiry cleanup)"""
+
+    def test_create_upload_session_returns_qr_png(self, authenticated_client):
+        """Test that the session comes back with a scaled, two-colour PNG QR code"""
+        import base64
+        from io import BytesIO
+        from PIL import Image
+
+        response = authenticated_client.post('/api/upload_session/create')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['token'] in data['upload_url']
+
+        img = Image.open(BytesIO(base64.b64decode(data['qr_code_base64'])))
+        assert img.format == 'PNG'
+        assert img.size[0] == img.size[1] and img.size[0] % 8 == 0
+        colours = {c for _, c in img.convert('RGB').getcolors()}
+        assert colours == {(255, 255, 255), (0x1A, 0x3D, 0x1A)}
+
+    def test_cleanup_removes_expired_sessions_and_their_files(self, app):
+        """Test that expired sessions, their temp upload rows and files are removed; fresh ones stay"""
+        import os
+        from datetime import datetime, timedelta
+        from app import db, _cleanup_expired_upload_sessions
+        from models import UploadSession, TempUpload
+
+        with app.app_context():
+            old = datetime.utcnow() - timedelta(days=1)
+            db.session.add(UploadSession(session_token='old-token', created_at=old))
+            db.session.add(TempUpload(session_token='old-token', filename='temp_old.jpg'))
+            db.session.add(UploadSession(session_token='new-token'))
+            db.session.add(TempUpload(session_token='new-token', filename='temp_new.jpg'))
+            db.session.commit()
+            fp = os.path.join(app.config['TEMP_UPLOAD_FOLDER'], 'temp_old.jpg')
+            with open(fp, 'wb') as f:
+                f.write(b'x')
+
+            _cleanup_expired_upload_sessions()
+
+            assert not os.path.exists(fp)
+            assert [s.session_token for s in UploadSession.query.all()] == ['new-token']
+            assert [t.filename for t in TempUpload.query.all()] == ['temp_new.jpg']
+
+    def test_remove_files_tolerates_missing_paths(self, tmp_path):
+        """Test that bulk temp-file deletion removes what exists and skips what's already gone"""
+        from app import _remove_files
+        paths = []
+        for i in range(3):
+            p = tmp_path / f'temp_{i}.jpg'
+            p.write_bytes(b'x')
+            paths.append(str(p))
+        paths.append(str(tmp_path / 'already_gone.jpg'))
+
+        _remove_files(paths)
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_phone_upload_downscales_and_flattens_transparency(self, app, tmp_path, monkeypatch):
+        """Test that a large transparent PNG comes back as a <=2000px JPEG on a white background"""
+        from io import BytesIO
+        from PIL import Image
+        from app import db, upload_from_phone_post
+        from models import UploadSession
+
+        monkeypatch.setitem(app.config, 'TEMP_UPLOAD_FOLDER', str(tmp_path))
+        db.session.add(UploadSession(session_token='phone-token'))
+        db.session.commit()
+
+        src = Image.new('RGBA', (2400, 1200), (0, 0, 0, 0))
+        src.paste((200, 30, 30, 255), (1200, 0, 2400, 1200))
+        buf = BytesIO()
+        src.save(buf, 'PNG')
+        buf.seek(0)
+
+        with app.test_request_context('/upload_from_phone', method='POST', data={
+            'token': 'phone-token',
+            'photo': (buf, 'photo.png', 'image/png'),
+        }, content_type='multipart/form-data'):
+            response = upload_from_phone_post()
+        filename = response.get_json()['filename']
+
+        out = Image.open(tmp_path / filename)
+        assert out.format == 'JPEG' and out.mode == 'RGB'
+        assert out.size == (2000, 1000)
+        assert all(c > 245 for c in out.getpixel((100, 500)))
+        r, g, b = out.getpixel((1900, 500))
+        assert r > 180 and g < 60 and b < 60
+
+    def test_phone_upload_jpeg_is_draft_decoded(self, app, tmp_path, monkeypatch):
+        """Test that a full-size phone JPEG is DCT-downscaled on decode and saved at <=2000px"""
+        from io import BytesIO
+        from PIL import Image, JpegImagePlugin
+        from app import db, upload_from_phone_post
+        from models import UploadSession
+
+        monkeypatch.setitem(app.config, 'TEMP_UPLOAD_FOLDER', str(tmp_path))
+        db.session.add(UploadSession(session_token='phone-token'))
+        db.session.commit()
+
+        buf = BytesIO()
+        Image.new('RGB', (4032, 3024), (30, 90, 200)).save(buf, 'JPEG')
+        buf.seek(0)
+        drafts = []
+        real_draft = JpegImagePlugin.JpegImageFile.draft
+        monkeypatch.setattr(JpegImagePlugin.JpegImageFile, 'draft',
+                            lambda self, mode, size: drafts.append(size) or real_draft(self, mode, size))
+
+        with app.test_request_context('/upload_from_phone', method='POST', data={
+            'token': 'phone-token',
+            'photo': (buf, 'photo.jpg', 'image/jpeg'),
+        }, content_type='multipart/form-data'):
+            response = upload_from_phone_post()
+        filename = response.get_json()['filename']
+
+        assert drafts == [(2000, 1500)]
+        out = Image.open(tmp_path / filename)
+        assert out.mode == 'RGB' and out.size == (2000, 1500)
+        r, g, b = out.getpixel((1000, 750))
+        assert abs(r - 30) < 8 and abs(g - 90) < 8 and abs(b - 200) < 8
+
+    def test_session_status_lists_upload_urls(self, authenticated_client):
+        """Test that polling returns absolute /uploads/ URLs for each temp upload, images and videos split"""
+        from app import db
+        from models import TempUpload
+
+        token = authenticated_client.post('/api/upload_session/create').get_json()['token']
+        db.session.add(TempUpload(session_token=token, filename='temp_abc_1_ff.jpg'))
+        db.session.add(TempUpload(session_token=token, filename='temp_video_abc_2.mp4'))
+        db.session.commit()
+
+        data = authenticated_client.get(f'/api/upload_session/status?token={token}').get_json()
+        assert data['images'] == [{'filename': 'temp_abc_1_ff.jpg', 'url': 'http://localhost/uploads/temp_abc_1_ff.jpg'}]
+        assert [v['url'] for v in data['videos']] == ['http://localhost/uploads/temp_video_abc_2.mp4']
+
+    def test_single_photo_bodies_are_parsed_in_memory(self, app):
+        """Test that a phone-sized upload stays in memory while a bulk post still spools to disk"""
+        from io import BytesIO
+        from flask import request
+        from constants import IN_MEMORY_REQUEST_SIZE
+
+        photo = b'\xff\xd8' + b'\x00' * (2 * 1024 * 1024)
+        with app.test_request_context('/upload_from_phone', method='POST', data={
+            'photo': (BytesIO(photo), 'photo.jpg', 'image/jpeg'),
+        }, content_type='multipart/form-data'):
+            assert isinstance(request.files['photo'].stream, BytesIO)
+
+        bulk = b'\x00' * (IN_MEMORY_REQUEST_SIZE + 1)
+        with app.test_request_context('/upload_from_phone', method='POST', data={
+            'photo': (BytesIO(bulk), 'photo.jpg', 'image/jpeg'),
+        }, content_type='multipart/form-data'):
+            assert not isinstance(request.files['photo'].stream, BytesIO)
+
+    def test_phone_upload_accepts_several_photos_in_one_post(self, app, tmp_path, monkeypatch):
+        """Test that multiple photo parts are all saved and recorded against the session"""
+        import re
+        from io import BytesIO
+        from PIL import Image
+        from app import db, upload_from_phone_post
+        from models import UploadSession, TempUpload
+
+        monkeypatch.setitem(app.config, 'TEMP_UPLOAD_FOLDER', str(tmp_path))
+        db.session.add(UploadSession(session_token='phone-token'))
+        db.session.commit()
+
+        def jpeg():
+            buf = BytesIO()
+            Image.new('RGB', (40, 30), (10, 120, 10)).save(buf, 'JPEG')
+            buf.seek(0)
+            return buf
+
+        with app.test_request_context('/upload_from_phone', method='POST', data={
+            'token': 'phone-token',
+            'photo': [(jpeg(), 'a.jpg', 'image/jpeg'), (jpeg(), 'b.jpg', 'image/jpeg')],
+        }, content_type='multipart/form-data'):
+            data = upload_from_phone_post().get_json()
+
+        assert len(data['files']) == 2
+        assert data['filename'] == data['files'][0]['filename']
+        # Time-ordered UUIDv7 names that don't leak the session token into /uploads/ URLs
+        assert all(re.fullmatch(r'temp_[0-9a-f]{12}7[0-9a-f]{19}\.jpg', f['filename']) for f in data['files'])
+        rows = TempUpload.query.filter_by(session_token='phone-token').all()
+        assert sorted(r.filename for r in rows) == sorted(f['filename'] for f in data['files'])
+        assert all(r.created_at is not None for r in rows)
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f['filename'] for f in data['files'])
+
+
+class TestSellerCategories:
+    """Tests for the cached category list behind the onboard and add_item forms"""
+
+    def test_seller_categories_cached_until_a_category_changes(self, app, count_queries):
+        """Test that repeat renders skip the category SELECT and admin edits bust the cache"""
+        from app import db, _seller_categories
+        from models import InventoryCategory
+
+        parent = InventoryCategory(name='Couch')
+        db.session.add(parent)
+        db.session.flush()
+        db.session.add(InventoryCategory(name='Mattress', parent_id=parent.id))
+        db.session.commit()
+
+        categories, price_ranges = _seller_categories()
+        assert [c.name for c in categories] == ['Couch']
+        assert len(price_ranges) == 2
+
+        with count_queries() as queries:
+            categories, _ = _seller_categories()
+        assert not queries
+        assert categories[0] in db.session
+
+        db.session.add(InventoryCategory(name='Desk'))
+        db.session.commit()
+        categories, price_ranges = _seller_categories()
+        assert [c.name for c in categories] == ['Couch', 'Desk']
+        assert len(price_ranges) == 3
+
+
+class TestAddItem:
+    """Tests for the add_item form"""
+
+    def test_add_item_validation_error_redirects_back_to_form(self, authenticated_client, test_item):
+        """Test that a failed submission flashes and redirects (PRG) instead of re-rendering"""
+        response = authenticated_client.post('/add_item', data={
+            'category_id': str(test_item.category_id),
+            'description': 'Lamp',
+            'quality': '4',
+        })
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/add_item')
+        with authenticated_client.session_transaction() as sess:
+            assert ('error', 'Please add at least one photo.') in sess['_flashes']
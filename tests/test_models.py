@@ -35,6 +35,18 @@ class TestUserModel:
             assert user.has_paid == False
             assert user.date_joined is not None
     
+    def test_commit_does_not_expire_loaded_attributes(self, client, count_queries):
+        """Test that reading a user right after commit doesn't re-SELECT it"""
+        with client.application.app_context():
+            user = User(email='fresh@example.com', password_hash='hashed_password')
+            db.session.add(user)
+            db.session.commit()
+
+            with count_queries() as queries:
+                assert user.email == 'fresh@example.com'
+                assert user.password_hash == 'hashed_password'
+            assert len(queries) == 0
+    
     def test_user_email_unique(self, client, test_user):
         """Test that email addresses must be unique"""
         with client.application.app_context():
@@ -191,6 +203,24 @@ class TestAppSettingModel:
             settings = AppSetting.query.filter_by(key='test_key').all()
             assert len(settings) == 1
     
+    def test_app_setting_get_cached_invalidated_on_set(self, client):
+        """Test that get_cached serves from cache but sees writes made through set()"""
+        with client.application.app_context():
+            AppSetting.set('cached_key', 'one')
+            assert AppSetting.get_cached('cached_key') == 'one'
+
+            # A raw write the cache doesn't hear about is not visible until TTL
+            db.session.execute(
+                AppSetting.__table__.update()
+                .where(AppSetting.key == 'cached_key')
+                .values(value='raw')
+            )
+            assert AppSetting.get_cached('cached_key') == 'one'
+
+            AppSetting.set('cached_key', 'two')
+            assert AppSetting.get_cached('cached_key') == 'two'
+            assert AppSetting.get_cached('missing_key', 'fallback') == 'fallback'
+    
     def test_app_setting_string_conversion(self, client):
         """Test that AppSetting converts values to strings"""
         with client.application.app_context():
@@ -11,7 +11,7 @@ These test the unsubscribe flow including:
 Run: pytest tests/test_unsubscribe.py -v
 """
 import pytest
-from app import db, User, ensure_unsubscribe_token, wrap_email_template
+from app import db, User, make_unsubscribe_token, wrap_email_template
 
 
 @pytest.mark.integration
@@ -22,7 +22,7 @@ class TestUnsubscribePage:
         """Test that unsubscribe page loads with valid token"""
         with client.application.app_context():
             # Generate unsubscribe token for user
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
         
         response = client.get(f'/unsubscribe/{token}')
         assert response.status_code == 200
@@ -55,7 +55,7 @@ class TestUnsubscribeProcess:
     def test_unsubscribe_confirmation_shows_email(self, client, test_user):
         """Test that confirmation page displays user's email"""
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
         
         response = client.get(f'/unsubscribe/{token}')
         assert response.status_code == 200
@@ -68,7 +68,7 @@ class TestUnsubscribeProcess:
             test_user.unsubscribed = False
             db.session.commit()
             
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
         
         # POST to unsubscribe
         response = client.post(f'/unsubscribe/{token}', follow_redirects=True)
@@ -85,7 +85,7 @@ class TestUnsubscribeProcess:
         with client.application.app_context():
             test_user.unsubscribed = True
             db.session.commit()
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
         
         response = client.post(f'/unsubscribe/{token}', follow_redirects=True)
         assert response.status_code == 200
@@ -115,37 +115,22 @@ class TestUnsubscribeProcess:
 class TestUnsubscribeTokenGeneration:
     """Test unsubscribe token generation and management"""
     
-    def test_ensure_unsubscribe_token_creates_token(self, client, test_user):
-        """Test that ensure_unsubscribe_token creates token if missing"""
+    def test_make_unsubscribe_token_does_not_write_to_db(self, client, test_user):
+        """Test that tokens are signed, not stored on the user row"""
         with client.application.app_context():
-            # Clear existing token
-            test_user.unsubscribe_token = None
-            db.session.commit()
-            
-            # Generate token
-            token = ensure_unsubscribe_token(test_user)
-            
-            # Refresh user from DB to get updated token
+            token = make_unsubscribe_token(test_user)
+
             from models import User
             user = User.query.get(test_user.id)
-            
+
             assert token is not None
             assert len(token) > 0
-            assert user.unsubscribe_token == token
-    
-    def test_ensure_unsubscribe_token_reuses_existing(self, client, test_user):
-        """Test that ensure_unsubscribe_token reuses existing token"""
+            assert user.unsubscribe_token is None
+
+    def test_make_unsubscribe_token_is_stable(self, client, test_user):
+        """Test that the same user always gets the same link"""
         with client.application.app_context():
-            # Set existing token
-            existing_token = 'existing_token_12345'
-            test_user.unsubscribe_token = existing_token
-            db.session.commit()
-            
-            # Call ensure_unsubscribe_token
-            token = ensure_unsubscribe_token(test_user)
-            
-            assert token == existing_token
-            assert test_user.unsubscribe_token == existing_token
+            assert make_unsubscribe_token(test_user) == make_unsubscribe_token(test_user)
     
     def test_unsubscribe_token_is_unique(self, client):
         """Test that each user gets a unique unsubscribe token"""
@@ -162,11 +147,34 @@ class TestUnsubscribeTokenGeneration:
             db.session.add(user2)
             db.session.commit()
             
-            token1 = ensure_unsubscribe_token(user1)
-            token2 = ensure_unsubscribe_token(user2)
+            token1 = make_unsubscribe_token(user1)
+            token2 = make_unsubscribe_token(user2)
             
             assert token1 != token2
-            assert user1.unsubscribe_token != user2.unsubscribe_token
+
+    def test_token_resolves_to_user(self, client, test_user):
+        """Test that a signed token maps back to its user without a stored column"""
+        from app import _user_for_unsubscribe_token
+        with client.application.app_context():
+            token = make_unsubscribe_token(test_user)
+            assert _user_for_unsubscribe_token(token).id == test_user.id
+
+    def test_tampered_token_rejected(self, client, test_user):
+        """Test that a token whose signature doesn't match is not accepted"""
+        from app import _user_for_unsubscribe_token
+        with client.application.app_context():
+            token = make_unsubscribe_token(test_user)
+            assert _user_for_unsubscribe_token(token[:-2] + 'xx') is None
+
+    def test_legacy_stored_token_still_works(self, client, test_user):
+        """Test that links from emails sent before signed tokens still resolve"""
+        from app import _user_for_unsubscribe_token
+        with client.application.app_context():
+            user = User.query.get(test_user.id)
+            user.unsubscribe_token = 'legacy_token_12345'
+            db.session.commit()
+
+            assert _user_for_unsubscribe_token('legacy_token_12345').id == test_user.id
 
 
 @pytest.mark.integration
@@ -246,7 +254,7 @@ class TestEmailUnsubscribeLink:
         from flask import url_for
         
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
             unsubscribe_url = url_for('unsubscribe', token=token, _external=True)
             
             # Test email template wrapper
@@ -277,7 +285,7 @@ class TestUnsubscribeSuccessPage:
     def test_unsubscribe_success_page_displays(self, client, test_user):
         """Test that success page displays after unsubscribe"""
         with client.application.app_context():
-            token = ensure_unsubscribe_token(test_user)
+            token = make_unsubscribe_token(test_user)
         
         # Unsubscribe the user
         response = client.post(f'/unsubscribe/{token}', follow_redirects=True)
@@ -29,6 +29,10 @@ class TestEmailValidation:
         assert validate_email('user@') == False
         assert validate_email('') == False
         assert validate_email(None) == False
+
+    def test_email_trailing_newline_rejected(self):
+        """Test that a trailing newline can't sneak past the end anchor"""
+        assert validate_email('user@example.com\n') == False
     
     def test_email_length_limit(self):
         """Test that emails over the max length are rejected"""
@@ -177,6 +181,32 @@ class TestFileUploadValidation:
         assert is_valid == False
         assert 'size' in error.lower() or 'exceeds' in error.lower()
     
+    def test_declared_oversize_rejected_without_reading(self):
+        """Test that a part whose Content-Length exceeds the limit is rejected up front"""
+        from werkzeug.datastructures import FileStorage, Headers
+        file = FileStorage(
+            stream=BytesIO(b'tiny'), filename='huge.jpg', content_type='image/jpeg',
+            headers=Headers({'Content-Length': str(MAX_UPLOAD_SIZE + 1)}),
+        )
+        is_valid, error = validate_file_upload(file)
+        assert is_valid == False
+        assert 'exceeds' in error.lower()
+
+    def test_understated_content_length_still_measured(self):
+        """Test that a small declared length can't sneak a large file through"""
+        from werkzeug.datastructures import FileStorage, Headers
+        file = FileStorage(
+            stream=BytesIO(b'0' * (MAX_UPLOAD_SIZE + 1000)), filename='huge.jpg',
+            content_type='image/jpeg', headers=Headers({'Content-Length': '10'}),
+        )
+        is_valid, error = validate_file_upload(file)
+        assert is_valid == False
+
+    def test_max_content_length_configured(self, client):
+        """Test that Flask is told to reject oversized bodies before parsing them"""
+        from constants import MAX_REQUEST_SIZE
+        assert client.application.config['MAX_CONTENT_LENGTH'] == MAX_REQUEST_SIZE
+    
     def test_no_file_provided(self):
         """Test that missing files are rejected"""
         file = BytesIO()